@@ -0,0 +1,247 @@
+""" module for approximate assertions on pandas Series, backed by probabilistic sketches.
+    Sketches take a few MB instead of a hash table of the column, rows flagged by them are re-checked exactly.
+"""
+
+import math
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from assertions.base import BaseAssertion, COST_HASH
+from core.backends import isin
+from core.exceptions import ValidationError
+from core.failure import FailureDetail, MAX_VALUES
+from core.sketches import BloomFilter, CountMinSketch, HyperLogLog, iter_hashes
+from core.valueset import ValueSet
+
+
+class ApproxHasNoDuplicatesAssertion(BaseAssertion):
+    """ approximate `HasNoDuplicatesAssertion` without a hash table of the column. Rows are flagged by a Bloom filter
+        of the hashes of previous rows, which has no false negatives: every repeated value is flagged. Values of flagged
+        rows are then re-checked exactly, so the assertion never passes a column with duplicates as exact.
+        If there are more than `max_candidates` flagged rows, the column fails only if sketches show repeats: rows of
+        heavy hitters - values counted by Count-Min sketch above its error bound - are re-checked exactly, and
+        HyperLogLog estimates the distinct count. Otherwise flagged rows are re-checked exactly in `max_candidates`
+        batches by hash ranges, one pass over the column per batch. Above `max_passes` batches the assertion passes
+        with an explicit `estimate` instead
+    """
+    name = "ApproxHasNoDuplicatesAssertion"
+    cost = COST_HASH
+    # description of the estimated result, when flagged rows weren't re-checked exactly
+    estimate: str = None
+
+    def __init__(self,
+                 column: pd.Series,
+                 error: float = 0.01,
+                 max_candidates: int = 1_000_000,
+                 width: int = 2**17,
+                 depth: int = 4,
+                 block_rows: int = 2**16,
+                 error_rate: float = 0.01,
+                 bloom_bytes: int = 8 * 2**20,
+                 max_passes: int = 8):
+        """ aseerts `column.duplicated().sum() == 0` approximately
+            :param error: relative standard error of the distinct count estimation
+            :param max_candidates: max number of flagged rows re-checked exactly at once
+            :param width: number of counters in a row of Count-Min sketch, heavy hitters are values
+                counted more than `1 + e * len(column) / width` times
+            :param depth: number of rows of Count-Min sketch, `exp(-depth)` of the rest of values are re-checked needlessly
+            :param block_rows: number of rows hashed at once
+            :param error_rate: false positive rate of the Bloom filter, which takes `1.2 * log(1 / error_rate) / log(100)`
+                bytes per row up to `bloom_bytes`. False positives are only re-checked needlessly
+            :param bloom_bytes: memory budget of the Bloom filter, bigger columns get more false positives
+            :param max_passes: max number of passes over the column, which re-check batches of flagged rows exactly
+        """
+        self.column = column
+        self.error = error
+        self.max_candidates = max_candidates
+        self.width = width
+        self.depth = depth
+        self.block_rows = block_rows
+        self.error_rate = error_rate
+        self.bloom_bytes = bloom_bytes
+        self.max_passes = max_passes
+        self.hll = None
+        self.cms = None
+
+    def validate(self):
+        if not isinstance(self.column, pd.Series): raise ValidationError("`column` must be type of: pd.Series")
+        if not 0 < self.error < 1: raise ValidationError("`error` must be in range (0, 1)")
+        if not 0 < self.error_rate < 1: raise ValidationError("`error_rate` must be in range (0, 1)")
+        if not isinstance(self.max_candidates, int) or self.max_candidates < 1: raise ValidationError("`max_candidates` must be positive int")
+        if not isinstance(self.bloom_bytes, int) or self.bloom_bytes < 8: raise ValidationError("`bloom_bytes` must be int >= 8")
+        if not isinstance(self.max_passes, int) or self.max_passes < 0: raise ValidationError("`max_passes` must be non-negative int")
+
+    def reset(self) -> None:
+        super().reset()
+        self.estimate = None
+
+    def _bloom(self, n_rows: int) -> BloomFilter:
+        """ filter of `error_rate` false positives at `n_rows` values, which fits into `bloom_bytes` """
+        n_bits = math.ceil(-max(n_rows, 1) * math.log(self.error_rate) / math.log(2) ** 2)
+        return BloomFilter(capacity=n_rows, n_bits=max(64, min(n_bits, 8 * self.bloom_bytes)))
+
+    def _flagged(self, n_rows: int, batch: int = 0, n_batches: int = 1, limit: int = None) -> Tuple[np.ndarray, int]:
+        """ one pass over the column, which flags rows repeating a hash of previous rows. Only rows of hashes
+            in the batch (`hash % n_batches == batch`) are flagged, sketches are updated by the first pass
+            :returns: positions of flagged rows, at most about `limit` of them, and number of flagged rows
+        """
+        bloom = self._bloom(n_rows)
+        flagged = []
+        n_flagged = 0
+        for i, hashes in enumerate(iter_hashes(self.column, self.block_rows)):
+            if n_batches == 1:
+                self.hll.add(hashes)
+                self.cms.add(hashes)
+            # rows repeating a hash of previous blocks or of the same block
+            repeated = bloom.contains(hashes) | pd.Series(hashes).duplicated().to_numpy()
+            bloom.add(hashes)
+            if n_batches > 1:
+                repeated &= hashes % np.uint64(n_batches) == np.uint64(batch)
+            block_flagged = np.flatnonzero(repeated)
+            if limit is None or n_flagged <= limit:
+                flagged.append(block_flagged + i * self.block_rows)
+            n_flagged += len(block_flagged)
+        return (np.concatenate(flagged) if flagged else np.array([], dtype=np.intp)), n_flagged
+
+    def _candidates(self, threshold: float) -> np.ndarray:
+        """ positions of rows counted more than `threshold` times, at most `max_candidates + 1` """
+        positions = []
+        n_found = 0
+        for i, hashes in enumerate(iter_hashes(self.column, self.block_rows)):
+            block_positions = np.flatnonzero(self.cms.estimate(hashes) > threshold)
+            positions.append(block_positions + i * self.block_rows)
+            n_found += len(block_positions)
+            if n_found > self.max_candidates:
+                break
+        return np.concatenate(positions) if positions else np.array([], dtype=np.intp)
+
+    def _verify(self, flagged: np.ndarray) -> bool:
+        """ exact check of values of the flagged rows: their other occurrences aren't flagged, so all rows
+            with these values are compared
+        """
+        values = self.column.iloc[flagged].unique()
+        positions = np.flatnonzero(isin(self.column, values))
+        candidates = self.column.iloc[positions]
+        duplicated = candidates.duplicated().to_numpy()
+        if not duplicated.any():
+            return self.set_passed()
+        detail = FailureDetail("Column contains duplicates", n_failed=int(duplicated.sum()), n_total=len(self.column),
+                               positions=positions[duplicated][:MAX_VALUES].tolist(),
+                               values=candidates[duplicated].iloc[:MAX_VALUES].tolist())
+        detail.sample = candidates.value_counts().head(MAX_VALUES)[lambda counts: counts > 1].to_dict()
+        return self.set_failed(detail)
+
+    def assertion(self) -> bool:
+        n_rows = len(self.column)
+        self.hll = HyperLogLog(self.error)
+        self.cms = CountMinSketch(width=self.width, depth=self.depth)
+        flagged, n_flagged = self._flagged(n_rows, limit=self.max_candidates)
+        if n_flagged <= self.max_candidates:
+            return self._verify(flagged)
+
+        # false positives of the filter alone may flag too many rows, the column fails only on repeats shown by sketches
+        failure = self._heavy_hitters(n_rows)
+        if failure is not None:
+            return self.set_failed(failure)
+        n_distinct = self.hll.estimate()
+        if n_distinct < n_rows * (1 - 3 * self.hll.error):
+            return self.set_failed(FailureDetail(f"Column contains about {n_rows - n_distinct:.0f} duplicates (estimated)",
+                                                 n_total=n_rows))
+        # batches are a quarter smaller than `max_candidates`, so uneven hash ranges still fit
+        n_batches = math.ceil(1.25 * n_flagged / self.max_candidates)
+        if n_batches > self.max_passes:
+            self.estimate = (f"estimated: about {n_distinct:.0f} distinct values in {n_rows} rows, "
+                             f"{n_flagged} flagged rows weren't re-checked")
+            return self.set_passed()
+        for batch in range(n_batches):
+            flagged, _ = self._flagged(n_rows, batch, n_batches)
+            if not self._verify(flagged):
+                return False
+        return self.set_passed()
+
+    def _heavy_hitters(self, n_rows: int) -> Union[FailureDetail, None]:
+        """ failure of repeated heavy hitters re-checked exactly, the rest of duplicates is estimated """
+        positions = self._candidates(threshold=max(1.0, math.e * n_rows / self.width))
+        if len(positions) > self.max_candidates:
+            # too many rows to re-check exactly
+            return None
+        candidates = self.column.iloc[positions]
+        duplicated = candidates.duplicated().to_numpy()
+        n_duplicated = int(duplicated.sum())
+        if not n_duplicated:
+            return None
+        # duplicates of values, which are not heavy hitters
+        n_rest = max(n_rows - self.hll.estimate(), 0) - n_duplicated
+        message = "Column contains duplicates"
+        if n_rest > 3 * self.hll.error * n_rows:
+            message += f" (and about {n_rest:.0f} more estimated)"
+        detail = FailureDetail(message, n_failed=n_duplicated, n_total=n_rows,
+                               positions=positions[duplicated][:MAX_VALUES].tolist(),
+                               values=candidates[duplicated].iloc[:MAX_VALUES].tolist())
+        detail.sample = candidates.value_counts().head(MAX_VALUES)[lambda counts: counts > 1].to_dict()
+        return detail
+
+
+class ApproxNotInColumnAssertion(BaseAssertion):
+    """ approximate `NotInColumnAssertion` for big value lists, e.g. blocklists: values are probed in Bloom filter,
+        which has no false negatives, and only rows flagged by it are checked exactly against `values`.
+        The filter can be built once, serialized with `BloomFilter.to_bytes` and passed as `bloom`
+    """
+    name = "ApproxNotInColumnAssertion"
+    cost = COST_HASH
+
+    def __init__(self,
+                 column: pd.Series,
+                 values: Union[Sequence, pd.Series, ValueSet] = None,
+                 bloom: BloomFilter = None,
+                 error_rate: float = 0.01,
+                 block_rows: int = 2**16):
+        """ aseerts `(~column.isin(values)).sum() == 0` approximately
+            :param values: values, which must not be in the column. Without them flagged rows aren't re-checked,
+                so up to `error_rate` of them may be false positives
+            :param bloom: prebuilt filter of the values, must be built from the values of the same dtype as the column
+            :param error_rate: false positive rate of the filter built from `values`
+            :param block_rows: number of rows probed at once
+        """
+        self.column = column
+        self.values = values
+        self.bloom = bloom
+        self.error_rate = error_rate
+        self.block_rows = block_rows
+
+    def validate(self):
+        valid_dtypes_values = (pd.Series, pd.Index, tuple, list, np.ndarray, ValueSet)
+        if not isinstance(self.column, pd.Series): raise ValidationError("`column` must be type of: pd.Series")
+        if self.values is None and self.bloom is None: raise ValidationError("`values` or `bloom` must be given")
+        if self.values is not None and not isinstance(self.values, valid_dtypes_values):
+            raise ValidationError(f"`values` must be type of: {valid_dtypes_values}")
+        if self.bloom is not None and not isinstance(self.bloom, BloomFilter):
+            raise ValidationError("`bloom` must be type of: BloomFilter")
+
+    def prepare_args(self):
+        self._filter = self.bloom
+        if self._filter is None:
+            values = self.values.to_index() if isinstance(self.values, ValueSet) else self.values
+            self._filter = BloomFilter.from_values(values, self.error_rate, dtype=self.column.dtype)
+
+    def assertion(self) -> bool:
+        positions = [np.flatnonzero(self._filter.contains(hashes)) + i * self.block_rows
+                     for i, hashes in enumerate(iter_hashes(self.column, self.block_rows))]
+        positions = np.concatenate(positions) if positions else np.array([], dtype=np.intp)
+        if not len(positions):
+            return self.set_passed()
+
+        candidates = self.column.iloc[positions]
+        message = "Column contains values in list"
+        if self.values is not None:
+            is_in = isin(candidates, self.values)
+            if not is_in.any():
+                return self.set_passed()
+            positions, candidates = positions[is_in], candidates[is_in]
+        else:
+            message = "Column probably contains values in list, rows weren't re-checked without `values`"
+        return self.set_failed(FailureDetail(message, n_failed=len(positions), n_total=len(self.column),
+                                             positions=positions[:MAX_VALUES].tolist(),
+                                             values=candidates.iloc[:MAX_VALUES].tolist()))
@@ -1,19 +1,56 @@
 """ module for base assertions """
 
-from typing import Union, Literal, List
+import weakref
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Union, Literal, List
 from abc import ABC, abstractmethod
 
+import numpy as np
 import pandas as pd
-import pandera as pa
 
+from core.backends import is_column, is_frame
+from core.cache import ComputationCache, NO_CACHE
 from core.exceptions import ValidationError
+from core.failure import FailureDetail, MAX_VALUES
+from core.masks import RowMask
+from core.metrics import AssertionMetrics
+from core.sampling import SampleEstimate, sample_positions
 
+if TYPE_CHECKING:
+    # pandera is heavy, it is imported by `PanderaSchemaAssertion` on its first run
+    import pandera as pa
+
+
+
+# estimated cost classes of assertions, pipe can run cheap assertions first
+COST_METADATA = 0   # O(1): shapes, lengths, columns
+COST_SCAN = 1       # O(n): isin, equality
+COST_HASH = 2       # O(n log n) / hash tables: duplicates
+COST_UNKNOWN = 3    # custom functions, schemas
+
+
+def is_data(value: Any) -> bool:
+    """ input data of assertions: columns, frames and arrays """
+    if isinstance(value, np.ndarray):
+        return True
+    return type(value).__module__.partition(".")[0] in ("pandas", "pyarrow", "polars") and (is_column(value) or is_frame(value))
 
 
 class BaseAssertion(ABC):
     name: str = "Assertion"
-    status: Literal["passed", "failed"] = None
-    error_message: str = None
+    status: Literal["passed", "failed", "skipped"] = None
+    # details of the failure, rendered into `error_message` only when asked
+    failure: FailureDetail = None
+    cost: int = COST_UNKNOWN
+    # cache of derived computations, shared by assertions of the running pipe
+    cache: ComputationCache = NO_CACHE
+    # metrics of the last run and memory measurement mode of the run: `None`, `tracemalloc` or `rss`
+    metrics: AssertionMetrics = None
+    memory_metrics: Literal[None, "tracemalloc", "rss"] = None
+    # input data was dropped after the run, the assertion can't run again
+    released: bool = False
+    # input data is held by weak references
+    weak: bool = False
 
     @abstractmethod
     def assertion(self) -> bool:
@@ -24,13 +61,34 @@ class BaseAssertion(ABC):
         self.status = "passed"
         return True
 
-    def set_failed(self, error_message: str = None) -> bool:
-        """ set status of assertion as failed with message """
+    @property
+    def error_message(self) -> str:
+        """ text of the failure """
+        return None if self.failure is None else str(self.failure)
+
+    @error_message.setter
+    def error_message(self, message: Union[str, FailureDetail]) -> None:
+        self.failure = message if message is None or isinstance(message, FailureDetail) else FailureDetail(message)
+
+    def set_failed(self, error_message: Union[str, FailureDetail] = None) -> bool:
+        """ set status of assertion as failed with message or structured failure detail """
         self.status = "failed"
         if error_message:
             self.error_message = error_message
         return False
 
+    def set_skipped(self, reason: str = None) -> None:
+        """ set status of assertion as skipped, e.g. by a fail fast pipe """
+        self.status = "skipped"
+        if reason:
+            self.error_message = reason
+
+    def reset(self) -> None:
+        """ clear result of the previous run """
+        self.status = None
+        self.failure = None
+        self.metrics = None
+
     def prepare_args(self):
         """ prepare self attributes for assertion, will be run before `assertion` itself """
         pass
@@ -39,11 +97,88 @@ class BaseAssertion(ABC):
         """ validation of passed args """
         pass
 
+    def rows_processed(self) -> Union[int, None]:
+        """ number of rows checked by the assertion, `None` for metadata assertions """
+        if self.cost == COST_METADATA:
+            return None
+        for attr in ("column", "column1", "df", "df1"):
+            data = getattr(self, attr, None)
+            if data is not None:
+                try:
+                    return len(data)
+                except TypeError:
+                    return None
+        return None
+
+    def violations(self) -> Union[np.ndarray, None]:
+        """ boolean mask of rows violating the assertion, over all rows. `None` if the result isn't row-level """
+        return None
+
+    def row_mask(self) -> Union[RowMask, None]:
+        """ `violations` packed into 1 bit per row, `None` if the result isn't row-level """
+        with self._strong_inputs():
+            violations = self.violations()
+        return None if violations is None else RowMask.from_bool(violations)
+
+    def _map_inputs(self, predicate: Callable[[Any], bool], fn: Callable[[Any], Any]) -> None:
+        """ replaces input values of attributes, one level deep into tuples and dicts (args and kwargs of `FnAssertion`) """
+        for attr, value in list(vars(self).items()):
+            if predicate(value):
+                setattr(self, attr, fn(value))
+            elif isinstance(value, tuple) and any(predicate(item) for item in value):
+                setattr(self, attr, type(value)(fn(item) if predicate(item) else item for item in value))
+            elif isinstance(value, dict) and any(predicate(item) for item in value.values()):
+                setattr(self, attr, {key: fn(item) if predicate(item) else item for key, item in value.items()})
+
+    def release(self) -> None:
+        """ drops references to input data (columns, frames, arrays), status, failure and metrics are kept """
+        self._map_inputs(lambda value: is_data(value) or isinstance(value, weakref.ref), lambda value: None)
+        self.released = True
+
+    def hold_weakly(self) -> "BaseAssertion":
+        """ keeps input data by weak references, so the assertion doesn't keep it alive.
+            The data must be referenced elsewhere until the assertion runs
+        """
+        self._map_inputs(is_data, weakref.ref)
+        self.weak = True
+        return self
+
+    @contextmanager
+    def _strong_inputs(self) -> Iterator[None]:
+        """ resolves weakly held inputs for the run """
+        if not self.weak:
+            yield
+            return
+        held = dict(vars(self))
+        def resolve(ref: weakref.ref) -> Any:
+            data = ref()
+            if data is None: raise ValidationError(f"input data of {self.name} was garbage collected before its run")
+            return data
+        self._map_inputs(lambda value: isinstance(value, weakref.ref), resolve)
+        replaced = {attr: value for attr, value in held.items() if getattr(self, attr) is not value}
+        try:
+            yield
+        finally:
+            for attr, value in replaced.items():
+                setattr(self, attr, value)
+
+    def _run_phases(self, assertion: Callable[[], bool]) -> bool:
+        """ runs validation, preparation and `assertion`, measuring every phase into `metrics` """
+        if self.released: raise ValidationError(f"input data of {self.name} was released after its run")
+        self.metrics = AssertionMetrics(self.name, self.memory_metrics)
+        with self._strong_inputs():
+            with self.metrics.phase("validate"):
+                self.validate()
+            with self.metrics.phase("prepare_args"):
+                self.prepare_args()
+            with self.metrics.phase("assertion"):
+                passed = assertion()
+            self.metrics.rows = self.rows_processed()
+        return passed
+
     def run(self) -> bool:
         """ run validation, preparation and assertion """
-        self.validate()
-        self.prepare_args()
-        return self.assertion()
+        return self._run_phases(self.assertion)
 
     def __str__(self):
         return f"<Assertion {self.name}>"
@@ -53,27 +188,141 @@ class BaseAssertion(ABC):
     
 
 
+class RowWiseAssertion(BaseAssertion):
+    """ assertion, which holds when no row violates it. With `sample` the violation rate is estimated
+        on a random sample of rows, and the assertion passes if it is within `tolerance`
+    """
+    # fraction (float) or number (int) of sampled rows, `None` - full scan
+    sample: Union[int, float] = None
+    seed: int = None
+    tolerance: float = 0.0
+    confidence: float = 0.95
+    # estimation of the last sampled run
+    estimate: SampleEstimate = None
+    # failure message of violating rows
+    violation_message: str = "Rows violate the assertion"
+
+    def set_sampling(self, sample: Union[int, float] = None, seed: int = None, tolerance: float = 0.0, confidence: float = 0.95) -> None:
+        """
+        Parameters
+            :param sample: check only a random sample of rows: fraction of rows if float, number of rows if int
+            :param seed: seed of the sample, the same seed samples the same rows
+            :param tolerance: max acceptable violation rate. With `0` the sample must have no violations,
+                otherwise the upper bound of the confidence interval must be within it
+            :param confidence: confidence level of the violation rate interval
+        """
+        self.sample = sample
+        self.seed = seed
+        self.tolerance = tolerance
+        self.confidence = confidence
+
+    def n_rows(self) -> int:
+        """ number of rows to sample from """
+        return len(self.column)
+
+    def check_metadata(self) -> Union[str, FailureDetail, None]:
+        """ checks, which don't depend on rows (e.g. lengths), run before sampling. Returns failure or None """
+        return None
+
+    @abstractmethod
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        """ boolean mask of violating rows at the positions """
+        ...
+
+    def violating_values(self, positions: np.ndarray) -> list:
+        """ values of violating rows for the failure, `None` if they have no single value """
+        return None
+
+    def violations(self) -> Union[np.ndarray, None]:
+        if self.check_metadata() is not None:
+            return None
+        return self.violation_mask(np.arange(self.n_rows()))
+
+    def reset(self) -> None:
+        super().reset()
+        self.estimate = None
+
+    def rows_processed(self) -> int:
+        return self.estimate.n_sampled if self.estimate is not None else self.n_rows()
+
+    def run(self) -> bool:
+        if self.sample is None:
+            return super().run()
+        if not 0 <= self.tolerance < 1: raise ValidationError("`tolerance` must be in range [0, 1)")
+        return self._run_phases(self.sampled_assertion)
+
+    def sampled_assertion(self) -> bool:
+        failure = self.check_metadata()
+        if failure is not None:
+            return self.set_failed(failure)
+        n_rows = self.n_rows()
+        positions = sample_positions(n_rows, self.sample, self.seed)
+        violations = self.violation_mask(positions)
+        self.estimate = SampleEstimate(int(violations.sum()), len(positions), n_rows, self.tolerance, self.confidence)
+        if self.estimate.passed:
+            return self.set_passed()
+        positions = positions[violations][:MAX_VALUES]
+        return self.set_failed(self.estimate.to_failure(self.violation_message, positions, self.violating_values(positions)))
+
+
 class PanderaSchemaAssertion(BaseAssertion):
     """ Pandera DataFrame Schema  """
     name = "PanderaDataFrameSchema"
     def __init__(self, 
-                 schema: pa.DataFrameSchema,
-                 df: pd.DataFrame):
+                 schema: "pa.DataFrameSchema",
+                 df: pd.DataFrame,
+                 lazy: bool = True,
+                 split: Literal[None, "columns", "rows"] = None,
+                 workers: int = None,
+                 chunk_rows: int = 1_000_000,
+                 max_failure_cases: int = MAX_VALUES):
+        """
+        Parameters
+            :param schema: pandera schema, prepared (capped and split) once and cached for next frames
+            :param df: DataFrame
+            :param lazy: collect failure cases of all checks in one pass, otherwise stop at the first error
+            :param split: `columns` - validate groups of columns in parallel, `rows` - validate chunks of rows in parallel,
+                dataframe-wide and aggregate checks see one chunk then (uniqueness is still checked on all rows)
+            :param workers: number of threads of split validation
+            :param chunk_rows: number of rows in chunk of `rows` split
+            :param max_failure_cases: max failure cases collected by every check, `None` - all
+        """
         self.pa_schema = schema
         self.df = df
+        self.lazy = lazy
+        self.split = split
+        self.workers = workers
+        self.chunk_rows = chunk_rows
+        self.max_failure_cases = max_failure_cases
 
     def validate(self):
         """  """
+        import pandera as pa
+        from core.schema import SPLITS
+
         if not isinstance(self.df, pd.DataFrame): raise ValidationError("`df` must be type of: pd.DataFrame")
         if not isinstance(self.pa_schema, pa.DataFrameSchema): raise ValidationError("`schema` must be type of: pa.DataFrameSchema")
+        if self.split not in SPLITS: raise ValidationError(f"`split` must be one of: {SPLITS}")
+        if self.workers is not None and (not isinstance(self.workers, int) or self.workers < 1): raise ValidationError("`workers` must be positive int")
+        if not isinstance(self.chunk_rows, int) or self.chunk_rows < 1: raise ValidationError("`chunk_rows` must be positive int")
+        if self.max_failure_cases is not None and (not isinstance(self.max_failure_cases, int) or self.max_failure_cases < 1):
+            raise ValidationError("`max_failure_cases` must be positive int or None")
 
     def assertion(self) -> bool:
-        try:
-            self.pa_schema.validate(self.df)
-        except pa.errors.SchemaError as e:
-            return self.set_failed(str(e))
-        else:
+        from core.schema import validate as validate_schema
+
+        result = validate_schema(self.pa_schema, self.df, lazy=self.lazy, split=self.split, workers=self.workers,
+                                 chunk_rows=self.chunk_rows, n_failure_cases=self.max_failure_cases)
+        if result is None:
             return self.set_passed()
+        if isinstance(result, str):
+            return self.set_failed(result)
+        counts = result.groupby(["column", "check"], dropna=False, sort=False).size().sort_values(ascending=False)
+        capped = f", at most {self.max_failure_cases} per check" if self.max_failure_cases is not None else ""
+        return self.set_failed(FailureDetail(
+            f"DataFrame failed schema validation: {len(result)} failure cases{capped}",
+            values=result["failure_case"].head(MAX_VALUES).tolist(),
+            sample={f"{column}: {check}": int(count) for (column, check), count in counts.head(MAX_VALUES).items()}))
 
 
 class FnAssertion(BaseAssertion):
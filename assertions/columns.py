@@ -1,47 +1,63 @@
-""" module for assertions on pandas Series """
+""" module for assertions on pandas Series (and pyarrow/polars columns) """
 
 from typing import Union, List, Sequence
 
 import pandas as pd
 import numpy as np
 
-from assertions.base import BaseAssertion
+from assertions.base import BaseAssertion, RowWiseAssertion, COST_HASH, COST_METADATA, COST_SCAN
+from core.equality import column_pairs, compare_series, differing_rows
 from core.exceptions import ValidationError
+from core.failure import FailureDetail, MAX_VALUES
+from core.validators import url_validator
+from core.backends import get_backend, is_column, isin, take_list
+from core.valueset import ValueSet
 
 
-class NotInColumnAssertion(BaseAssertion):
+class NotInColumnAssertion(RowWiseAssertion):
     """  """
     name = "NotInColumnAssertion"
+    cost = COST_SCAN
+    violation_message = "Column contains values in list"
 
     def __init__(self, 
                  column: pd.Series,
-                 values: Union[Sequence, pd.Series]):
-        """ aseerts `(~column.isin(values)).sum() == 0` """
+                 values: Union[Sequence, pd.Series, ValueSet],
+                 **sampling):
+        """ aseerts `(~column.isin(values)).sum() == 0`
+            :param sampling: `sample`, `seed`, `tolerance`, `confidence` of sampling mode, see `RowWiseAssertion.set_sampling`
+        """
         self.column = column
         self.values = values
+        self.set_sampling(**sampling)
 
     def validate(self):
-        valid_dtypes_values = (pd.Series, pd.Index, tuple, list, np.ndarray)
-        if not isinstance(self.column, pd.Series): raise ValidationError("`column` must be type of: pd.Series")
+        valid_dtypes_values = (pd.Series, pd.Index, tuple, list, np.ndarray, ValueSet)
+        if not is_column(self.column): raise ValidationError("`column` must be type of: pd.Series, pl.Series, pa.Array")
         if not isinstance(self.values, valid_dtypes_values): 
             raise ValidationError(f"`values` must be type of: {valid_dtypes_values}")
 
     def assertion(self) -> bool:
-        if (self.column.isin(self.values)).sum() == 0:
+        isin = self.cache.isin(self.column, self.values)
+        if not isin.any():
             return self.set_passed()
         
-        values_in = list(self.column.loc[self.column.isin(self.values)].unique())
-        if len(values_in) > 20:
-            values_in = ", ".join(values_in[:20]) + ", ..."
-        else:
-            values_in = ", ".join(values_in)
+        return self.set_failed(FailureDetail.from_mask(self.violation_message, isin, self.column))
+
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        return isin(get_backend(self.column).take(self.column, positions), self.values)
 
-        return self.set_failed(f"Column contains values in list: '{values_in}'")
+    def violations(self) -> np.ndarray:
+        return np.asarray(self.cache.isin(self.column, self.values), dtype=bool)
+
+    def violating_values(self, positions: np.ndarray) -> list:
+        return take_list(self.column, positions)
     
 
 class InColumnAssertion(BaseAssertion):
     """  """
     name = "InColumnAssertion"
+    cost = COST_SCAN
 
     def __init__(self, 
                  column: pd.Series,
@@ -51,27 +67,23 @@ class InColumnAssertion(BaseAssertion):
         self.values = values
 
     def validate(self):
-        valid_dtypes_values = (pd.Series, pd.Index, tuple, list, np.ndarray)
-        if not isinstance(self.column, pd.Series): raise ValidationError("`column` must be type of: pd.Series")
+        valid_dtypes_values = (pd.Series, pd.Index, tuple, list, np.ndarray, ValueSet)
+        if not is_column(self.column): raise ValidationError("`column` must be type of: pd.Series, pl.Series, pa.Array")
         if not isinstance(self.values, valid_dtypes_values): 
             raise ValidationError(f"`values` must be type of: {valid_dtypes_values}")
 
     def assertion(self) -> bool:
-        if (self.column.isin(self.values)).sum() > 0:
+        isin = self.cache.isin(self.column, self.values)
+        if isin.any():
             return self.set_passed()
         
-        values_not_in = list(self.column.loc[~self.column.isin(self.values)].unique())
-        if len(values_not_in) > 20:
-            values_not_in = ", ".join(values_not_in[:20]) + ", ..."
-        else:
-            values_not_in = ", ".join(values_not_in)
-
-        return self.set_failed(f"Column does not contain values in list: '{values_not_in}'")
+        return self.set_failed(FailureDetail.from_mask("Column does not contain values in list", ~isin, self.column))
     
 
 class HasNoDuplicatesAssertion(BaseAssertion):
     """  """
     name = "HasNoDuplicatesAssertion"
+    cost = COST_HASH
 
     def __init__(self, 
                  column: pd.Series):
@@ -79,18 +91,27 @@ class HasNoDuplicatesAssertion(BaseAssertion):
         self.column = column
 
     def validate(self):
-        if not isinstance(self.column, pd.Series): raise ValidationError("`column` must be type of: pd.Series")
+        if not is_column(self.column): raise ValidationError("`column` must be type of: pd.Series, pl.Series, pa.Array")
 
     def assertion(self) -> bool:
-        if self.column.duplicated().sum() == 0:
+        duplicated = self.cache.duplicated(self.column)
+        if not duplicated.any():
             return self.set_passed()
         
-        duplicateds = {key: value for key, value in self.column.value_counts().to_dict().items() if value > 1}
-        return self.set_failed(f"Column contains duplicates: \n\t{duplicateds}")
+        detail = FailureDetail.from_mask("Column contains duplicates", duplicated, self.column)
+        # value counts are sorted, so the most duplicated values are the first
+        value_counts = self.cache.value_counts(self.column, MAX_VALUES)
+        detail.sample = value_counts[lambda counts: counts > 1].to_dict()
+        return self.set_failed(detail)
+
+    def violations(self) -> np.ndarray:
+        """ repeated occurrences, first occurrences of values are valid """
+        return np.asarray(self.cache.duplicated(self.column), dtype=bool)
     
 
 class HasSameIndexAssertion(BaseAssertion):
     name = "HasSameIndexAssertion"
+    cost = COST_SCAN
 
     def __init__(self, 
                  column1: pd.Series,
@@ -107,53 +128,101 @@ class HasSameIndexAssertion(BaseAssertion):
         if self.column1.index.equals(self.column2.index):
             return self.set_passed()
         
-        return self.set_failed(f"Column1: {self.column1.index} and Column2: {self.column2.index} have different index")
+        index1, index2 = self.column1.index, self.column2.index
+        if len(index1) != len(index2):
+            return self.set_failed(f"Column1 and Column2 have different index lengths: {len(index1)} and {len(index2)}")
+        return self.set_failed(FailureDetail.from_mask("Column1 and Column2 have different index", index1 != index2, index1.to_series()))
     
 
-class HasSameDataAssertion(BaseAssertion):
+class HasSameDataAssertion(RowWiseAssertion):
     name = "HasSameDataAssertion"
+    cost = COST_SCAN
+    violation_message = "Column1 and Column2 have different data"
 
     def __init__(self, 
                  column1: pd.Series,
-                 column2: pd.Series):
-        """ aseerts `column1.equals(column2)` """
+                 column2: pd.Series,
+                 use_hash: bool = False,
+                 **sampling):
+        """ aseerts `(column1.values == column2.values).all()`
+            :param use_hash: compare cached 64-bit hashes of the columns first, pays off when columns are compared repeatedly
+            :param sampling: `sample`, `seed`, `tolerance`, `confidence` of sampling mode, see `RowWiseAssertion.set_sampling`
+        """
         self.column1 = column1
         self.column2 = column2
+        self.use_hash = use_hash
+        self.set_sampling(**sampling)
 
     def validate(self):
-        if not isinstance(self.column1, pd.Series): raise ValidationError("`column1` must be type of: pd.Series")
-        if not isinstance(self.column2, pd.Series): raise ValidationError("`column2` must be type of: pd.Series")
+        if not is_column(self.column1): raise ValidationError("`column1` must be type of: pd.Series, pl.Series, pa.Array")
+        if not is_column(self.column2): raise ValidationError("`column2` must be type of: pd.Series, pl.Series, pa.Array")
 
     def assertion(self) -> bool:
-        if (self.column1.values == self.column2.values).all():
+        difference = compare_series(self.column1, self.column2, check_dtype=False, nan_equal=False,
+                                    use_hash=self.use_hash, cache=self.cache)
+        if difference.equal:
             return self.set_passed()
         
-        return self.set_failed(f"Column1: {self.column1} and Column2: {self.column2} have different data")
+        return self.set_failed(difference.to_failure(self.violation_message))
+
+    def n_rows(self) -> int:
+        return len(self.column1)
+
+    def check_metadata(self) -> Union[FailureDetail, None]:
+        difference, _ = column_pairs(self.column1, self.column2, check_dtype=False)
+        return None if difference.equal else difference.to_failure(self.violation_message)
+
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        _, pairs = column_pairs(self.column1, self.column2, check_dtype=False)
+        return differing_rows(pairs, positions, nan_equal=False)
     
 
-class AreSomeAssertion(BaseAssertion):
+class AreSomeAssertion(RowWiseAssertion):
     name = "AreSomeAssertion"
+    cost = COST_SCAN
+    violation_message = "Column1 and Column2 are different"
 
     def __init__(self, 
                  column1: pd.Series,
-                 column2: pd.Series):
-        """ aseerts `column1.equals(column2)` """
+                 column2: pd.Series,
+                 use_hash: bool = False,
+                 **sampling):
+        """ aseerts `column1.equals(column2)`
+            :param use_hash: compare cached 64-bit hashes of the columns first, pays off when columns are compared repeatedly
+            :param sampling: `sample`, `seed`, `tolerance`, `confidence` of sampling mode, see `RowWiseAssertion.set_sampling`
+        """
         self.column1 = column1
         self.column2 = column2
+        self.use_hash = use_hash
+        self.set_sampling(**sampling)
 
     def validate(self):
-        if not isinstance(self.column1, pd.Series): raise ValidationError("`column1` must be type of: pd.Series")
-        if not isinstance(self.column2, pd.Series): raise ValidationError("`column2` must be type of: pd.Series")
+        if not is_column(self.column1): raise ValidationError("`column1` must be type of: pd.Series, pl.Series, pa.Array")
+        if not is_column(self.column2): raise ValidationError("`column2` must be type of: pd.Series, pl.Series, pa.Array")
 
     def assertion(self) -> bool:
-        if self.column1.equals(self.column2):
+        difference = compare_series(self.column1, self.column2, check_dtype=True, nan_equal=True, check_index=True,
+                                    use_hash=self.use_hash, cache=self.cache)
+        if difference.equal:
             return self.set_passed()
         
-        return self.set_failed(f"Column1: {self.column1} and Column2: {self.column2} are different")
+        return self.set_failed(difference.to_failure(self.violation_message))
+
+    def n_rows(self) -> int:
+        return len(self.column1)
+
+    def check_metadata(self) -> Union[FailureDetail, None]:
+        difference, _ = column_pairs(self.column1, self.column2, check_dtype=True, check_index=True)
+        return None if difference.equal else difference.to_failure(self.violation_message)
+
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        _, pairs = column_pairs(self.column1, self.column2, check_dtype=True, check_index=True)
+        return differing_rows(pairs, positions, nan_equal=True)
     
 
 class AreSameLenAssertion(BaseAssertion):
     name = "AreSameLen"
+    cost = COST_METADATA
 
     def __init__(self, 
                  column1: Union[pd.Series, np.ndarray, list, tuple, pd.Index],
@@ -164,8 +233,8 @@ class AreSameLenAssertion(BaseAssertion):
 
     def validate(self):
         valid_types = (pd.Series, pd.Index, np.ndarray, list, tuple)
-        if not isinstance(self.column1, valid_types): raise ValidationError(f"`column1` must be type of: {valid_types}")
-        if not isinstance(self.column2, valid_types): raise ValidationError(f"`column2` must be type of: {valid_types}")
+        if not isinstance(self.column1, valid_types) and not is_column(self.column1): raise ValidationError(f"`column1` must be type of: {valid_types}")
+        if not isinstance(self.column2, valid_types) and not is_column(self.column2): raise ValidationError(f"`column2` must be type of: {valid_types}")
 
     def assertion(self) -> bool:
         if len(self.column1) == len(self.column2):
@@ -176,6 +245,7 @@ class AreSameLenAssertion(BaseAssertion):
 
 class LenIsAssertion(BaseAssertion):
     name = "LenIs"
+    cost = COST_METADATA
 
     def __init__(self, 
                  column: Union[pd.Series, np.ndarray, list, tuple, pd.Index],
@@ -186,7 +256,7 @@ class LenIsAssertion(BaseAssertion):
 
     def validate(self):
         valid_types = (pd.Series, pd.Index, np.ndarray, list, tuple)
-        if not isinstance(self.column, valid_types): raise ValidationError(f"`column` must be type of: {valid_types}")
+        if not isinstance(self.column, valid_types) and not is_column(self.column): raise ValidationError(f"`column` must be type of: {valid_types}")
         if not isinstance(self.length, int) and self.length < 0: raise ValidationError("`length` must be type of: int")
 
     def assertion(self) -> bool:
@@ -194,4 +264,55 @@ class LenIsAssertion(BaseAssertion):
             return self.set_passed()
         
         return self.set_failed(f"Column: {len(self.column)} has different length: {self.length}")
+    
+
+class UrlColumnAssertion(RowWiseAssertion):
+    name = "UrlColumnAssertion"
+    cost = COST_SCAN
+    violation_message = "Column contains invalid urls"
+
+    def __init__(self,
+                 column: pd.Series,
+                 include_protocol: bool = False,
+                 allow_na: bool = False,
+                 workers: int = None,
+                 **sampling):
+        """ aseerts all values of `column` are valid urls
+            :param include_protocol: urls must start with `http://`, `https://` or `ftp://`
+            :param allow_na: missing values are valid
+            :param workers: number of threads, which validate chunks of the column in parallel (with pyarrow)
+            :param sampling: `sample`, `seed`, `tolerance`, `confidence` of sampling mode, see `RowWiseAssertion.set_sampling`
+        """
+        self.column = column
+        self.include_protocol = include_protocol
+        self.allow_na = allow_na
+        self.workers = workers
+        self.set_sampling(**sampling)
+
+    def validate(self):
+        if not is_column(self.column): raise ValidationError("`column` must be type of: pd.Series, pl.Series, pa.Array")
+
+    def prepare_args(self):
+        self.validator = url_validator(self.include_protocol, na=self.allow_na)
+
+    def _invalid(self) -> np.ndarray:
+        """ mask of invalid urls, cached for `violations` of the same column and options """
+        validator = getattr(self, "validator", None) or url_validator(self.include_protocol, na=self.allow_na)
+        return self.cache.get(("invalid_urls", self.include_protocol, self.allow_na),
+                              lambda: ~np.asarray(validator.mask(self.column, self.workers), dtype=bool), self.column)
+
+    def assertion(self) -> bool:
+        invalid = self._invalid()
+        if not invalid.any():
+            return self.set_passed()
+
+        return self.set_failed(FailureDetail.from_mask(self.violation_message, invalid, self.column))
+
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        return ~self.validator.mask(get_backend(self.column).take(self.column, positions))
+
+    def violations(self) -> np.ndarray:
+        return self._invalid()
 
+    def violating_values(self, positions: np.ndarray) -> list:
+        return take_list(self.column, positions)
@@ -1,18 +1,24 @@
-""" module for assertions on pandas dataframes """
+""" module for assertions on pandas dataframes (and pyarrow tables/polars dataframes) """
 
 from typing import Union, Literal, List
 
 import numpy as np
 import pandas as pd
 
+from core.backends import get_backend, is_frame
+from core.diff import diff_frames
+from core.sources import Frame
+from core.equality import column_pairs, compare_frames, differing_rows
 from core.exceptions import ValidationError
-from .base import BaseAssertion
+from core.failure import FailureDetail, MAX_VALUES
+from .base import BaseAssertion, RowWiseAssertion, COST_METADATA, COST_SCAN, COST_HASH
 
 
 
 
 class HasColumnsAssertion(BaseAssertion):
     name = "DFHasColumns"
+    cost = COST_METADATA
 
     def __init__(self,
                  df: pd.DataFrame,
@@ -24,14 +30,14 @@ class HasColumnsAssertion(BaseAssertion):
             :param columns: columns list
             :param strict: if `True`, will raise error if there is any columns not listed in `columns`, defaults to `False`
         """
-        assert isinstance(df, pd.DataFrame), "df must be of type pd.DataFrame"
+        assert is_frame(df) or isinstance(df, Frame), "df must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
         self.df = df
         self.columns = columns
         self.strict = strict
 
     def validate(self):
-        if not isinstance(self.df, pd.DataFrame): raise ValidationError(f"{self.df} must be of type pd.DataFrame")
-        if not isinstance(self.columns, (List[str], pd.Index)): raise ValidationError(f"{self.df} must be of type pd.DataFrame")
+        if not is_frame(self.df): raise ValidationError(f"{self.df} must be of type pd.DataFrame, pl.DataFrame or pa.Table")
+        if not isinstance(self.columns, (list, pd.Index)): raise ValidationError("`columns` must be of type list or pd.Index")
 
     def prepare_args(self) -> None:
         # convert columns into a list
@@ -39,7 +45,7 @@ class HasColumnsAssertion(BaseAssertion):
             self.columns = self.columns.to_list()
 
     def assertion(self):
-        df_cols = self.df.columns.to_list()
+        df_cols = list(get_backend(self.df).columns(self.df))
         not_in_df = set(self.columns) - set(df_cols)
         if not self.strict:
             if not not_in_df:
@@ -61,6 +67,7 @@ class HasColumnsAssertion(BaseAssertion):
 
 class HasSameColumnsAssertion(BaseAssertion):
     name = "HasSameColumns"
+    cost = COST_METADATA
 
     def __init__(self,
                  df1: Union[pd.DataFrame, pd.Index, List[str], np.ndarray],
@@ -70,8 +77,8 @@ class HasSameColumnsAssertion(BaseAssertion):
             :param df1: pandas dataframe
             :param df2: pandas dataframe
         """
-        assert isinstance(df1, pd.DataFrame), "df1 must be of type pd.DataFrame"
-        assert isinstance(df2, pd.DataFrame), "df2 must be of type pd.DataFrame"
+        assert is_frame(df1) or isinstance(df1, Frame), "df1 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
+        assert is_frame(df2) or isinstance(df2, Frame), "df2 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
         self.df1 = df1
         self.df2 = df2
 
@@ -79,16 +86,17 @@ class HasSameColumnsAssertion(BaseAssertion):
         pass
 
     def assertion(self):
-        diff = set(self.df1.columns.to_list()).symmetric_difference(set(self.df2.columns.to_list()))
-        if diff:
+        diff = set(get_backend(self.df1).columns(self.df1)).symmetric_difference(get_backend(self.df2).columns(self.df2))
+        if not diff:
             return self.set_passed()
         else:
-            
-            return self.set_failed(f"df1: {self.df1.columns} and df2: {self.df2.columns} have different columns: {diff}")
+            return self.set_failed(FailureDetail("df1 and df2 have different columns", n_failed=len(diff),
+                                                 values=list(diff)[:MAX_VALUES]))
 
 
 class HasSameIndexAssertion(BaseAssertion):
     name = "HasSameIndex"
+    cost = COST_SCAN
 
     def __init__(self,
                  df1: Union[pd.DataFrame, pd.Index, List[str], np.ndarray],
@@ -98,8 +106,8 @@ class HasSameIndexAssertion(BaseAssertion):
             :param df1: pandas dataframe
             :param df2: pandas dataframe
         """
-        assert isinstance(df1, pd.DataFrame), "df1 must be of type pd.DataFrame"
-        assert isinstance(df2, pd.DataFrame), "df2 must be of type pd.DataFrame"
+        assert isinstance(df1, (pd.DataFrame, Frame)), "df1 must be of type pd.DataFrame or Frame"
+        assert isinstance(df2, (pd.DataFrame, Frame)), "df2 must be of type pd.DataFrame or Frame"
         self.df1 = df1
         self.df2 = df2
 
@@ -110,38 +118,62 @@ class HasSameIndexAssertion(BaseAssertion):
         if self.df1.index.equals(self.df2.index):
             return self.set_passed()
         else:
-            return self.set_failed(f"df1: {self.df1.index} and df2: {self.df2.index} have different index")
+            index1, index2 = self.df1.index, self.df2.index
+            if len(index1) != len(index2):
+                return self.set_failed(f"df1 and df2 have different index lengths: {len(index1)} and {len(index2)}")
+            return self.set_failed(FailureDetail.from_mask("df1 and df2 have different index", index1 != index2, index1.to_series()))
         
 
-class HasSameDataAssertion(BaseAssertion):
+class HasSameDataAssertion(RowWiseAssertion):
     name = "HasSameData"
+    cost = COST_SCAN
+    violation_message = "df1 and df2 have different data"
 
     def __init__(self,
                  df1: Union[pd.DataFrame, pd.Index, List[str], np.ndarray],
-                 df2: Union[pd.DataFrame, pd.Index, List[str], np.ndarray]
+                 df2: Union[pd.DataFrame, pd.Index, List[str], np.ndarray],
+                 use_hash: bool = False,
+                 **sampling
                  ):
-        """ df1 and df2 pandas dataframes must have the same data
+        """ df1 and df2 pandas dataframes must have the same columns and data, columns are compared by name
             :param df1: pandas dataframe
             :param df2: pandas dataframe
+            :param use_hash: compare cached 64-bit hashes of columns first, pays off when columns are compared repeatedly
+            :param sampling: `sample`, `seed`, `tolerance`, `confidence` of sampling mode, see `RowWiseAssertion.set_sampling`
         """
-        assert isinstance(df1, pd.DataFrame), "df1 must be of type pd.DataFrame"
-        assert isinstance(df2, pd.DataFrame), "df2 must be of type pd.DataFrame"
+        assert is_frame(df1) or isinstance(df1, Frame), "df1 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
+        assert is_frame(df2) or isinstance(df2, Frame), "df2 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
         self.df1 = df1
         self.df2 = df2
+        self.use_hash = use_hash
+        self.set_sampling(**sampling)
 
     def prepare_args(self) -> None:
         pass
 
     def assertion(self):
-        if set(self.df1.columns.to_list()) == set(self.df2.columns.to_list()) and\
-                (self.df1.values == self.df2.values).all():
+        difference = compare_frames(self.df1, self.df2, check_dtype=False, nan_equal=False, align_columns=True,
+                                    use_hash=self.use_hash, cache=self.cache)
+        if difference.equal:
             return self.set_passed()
         else:
-            return self.set_failed(f"df1: {self.df1} and df2: {self.df2} have different data")
+            return self.set_failed(difference.to_failure(self.violation_message))
+
+    def n_rows(self) -> int:
+        return len(self.df1)
+
+    def check_metadata(self) -> Union[FailureDetail, None]:
+        difference, _ = column_pairs(self.df1, self.df2, check_dtype=False, align_columns=True)
+        return None if difference.equal else difference.to_failure(self.violation_message)
+
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        _, pairs = column_pairs(self.df1, self.df2, check_dtype=False, align_columns=True)
+        return differing_rows(pairs, positions, nan_equal=False)
 
 
 class HasSameShape(BaseAssertion):
     name = "HasSameShape"
+    cost = COST_METADATA
 
     def __init__(self,
                  df1: Union[pd.DataFrame, pd.Index, List[str], np.ndarray],
@@ -151,8 +183,8 @@ class HasSameShape(BaseAssertion):
             :param df1: pandas dataframe
             :param df2: pandas dataframe
         """
-        assert isinstance(df1, pd.DataFrame), "df1 must be of type pd.DataFrame"
-        assert isinstance(df2, pd.DataFrame), "df2 must be of type pd.DataFrame"
+        assert is_frame(df1) or isinstance(df1, Frame), "df1 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
+        assert is_frame(df2) or isinstance(df2, Frame), "df2 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
         self.df1 = df1
         self.df2 = df2
 
@@ -160,14 +192,16 @@ class HasSameShape(BaseAssertion):
         pass
 
     def assertion(self):
-        if self.df1.shape == self.df2.shape:
+        shape1, shape2 = get_backend(self.df1).shape(self.df1), get_backend(self.df2).shape(self.df2)
+        if shape1 == shape2:
             return self.set_passed()
         else:
-            return self.set_failed(f"df1: {self.df1.shape} and df2: {self.df2.shape} have different shape")
+            return self.set_failed(f"df1: {shape1} and df2: {shape2} have different shape")
         
 
 class ShapeIs(BaseAssertion):
     name = "ShapeIs"
+    cost = COST_METADATA
 
     def __init__(self,
                  df: pd.DataFrame,
@@ -177,7 +211,7 @@ class ShapeIs(BaseAssertion):
             :param df: pandas dataframe
             :param shape: shape. if one of the dimensions is -1, then won't check for that dimension
         """
-        assert isinstance(df, pd.DataFrame), "df must be of type pd.DataFrame"
+        assert is_frame(df) or isinstance(df, Frame), "df must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
         self.df = df
         self.shape = shape
 
@@ -185,36 +219,101 @@ class ShapeIs(BaseAssertion):
         pass
 
     def assertion(self):
-        if len(self.df.shape) != len(self.shape):
-            return self.set_failed(f"df: {self.df.shape} has different shape: {self.shape}")
+        df_shape = get_backend(self.df).shape(self.df)
+        if len(df_shape) != len(self.shape):
+            return self.set_failed(f"df: {df_shape} has different shape: {self.shape}")
         else:
-            for df_ax, shape_ax in zip(self.df.shape, self.shape):
+            for df_ax, shape_ax in zip(df_shape, self.shape):
                 if df_ax != shape_ax and shape_ax != -1:
-                    return self.set_failed(f"df: {self.df.shape} has different shape: {self.shape}")
+                    return self.set_failed(f"df: {df_shape} has different shape: {self.shape}")
                 
             return self.set_passed()
         
 
-class AreSomeAssertion(BaseAssertion):
+class AreSomeAssertion(RowWiseAssertion):
     name = "AreSome"
+    cost = COST_SCAN
+    violation_message = "df1 and df2 have different data"
 
-    def __init__(self, df1: pd.DataFrame, df2: pd.DataFrame):
+    def __init__(self, df1: pd.DataFrame, df2: pd.DataFrame, use_hash: bool = False, **sampling):
         """ df1 and df2 pandas dataframes must have the some elements
             :param df1: pandas dataframe
             :param df2: pandas dataframe
+            :param use_hash: compare cached 64-bit hashes of columns first, pays off when columns are compared repeatedly
+            :param sampling: `sample`, `seed`, `tolerance`, `confidence` of sampling mode, see `RowWiseAssertion.set_sampling`
         """
-        assert isinstance(df1, pd.DataFrame), "df1 must be of type pd.DataFrame"
-        assert isinstance(df2, pd.DataFrame), "df2 must be of type pd.DataFrame"
+        assert is_frame(df1) or isinstance(df1, Frame), "df1 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
+        assert is_frame(df2) or isinstance(df2, Frame), "df2 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
         self.df1 = df1
         self.df2 = df2
+        self.use_hash = use_hash
+        self.set_sampling(**sampling)
 
     def prepare_args(self) -> None:
         pass
 
     def assertion(self):
-        if self.df1.equals(self.df2):
+        difference = compare_frames(self.df1, self.df2, check_dtype=True, nan_equal=True, check_index=True,
+                                    use_hash=self.use_hash, cache=self.cache)
+        if difference.equal:
             return self.set_passed()
         else:
-            return self.set_failed(f"df1: {self.df1} and df2: {self.df2} have different data")
-        
-    
\ No newline at end of file
+            return self.set_failed(difference.to_failure(self.violation_message))
+
+    def n_rows(self) -> int:
+        return len(self.df1)
+
+    def check_metadata(self) -> Union[FailureDetail, None]:
+        difference, _ = column_pairs(self.df1, self.df2, check_dtype=True, check_index=True)
+        return None if difference.equal else difference.to_failure(self.violation_message)
+
+    def violation_mask(self, positions: np.ndarray) -> np.ndarray:
+        _, pairs = column_pairs(self.df1, self.df2, check_dtype=True, check_index=True)
+        return differing_rows(pairs, positions, nan_equal=True)
+
+
+class HasSameRowsAssertion(BaseAssertion):
+    name = "HasSameRows"
+    cost = COST_HASH
+    violation_message = "df1 and df2 have different rows"
+
+    def __init__(self,
+                 df1: pd.DataFrame,
+                 df2: pd.DataFrame,
+                 keys: List[str],
+                 columns: List[str] = None,
+                 nan_equal: bool = True,
+                 partitions: int = 1):
+        """ df1 and df2 must have the same rows by keys, in any order. The failure counts added, removed and changed rows
+            and changes of every column
+            :param df1: pandas dataframe, polars dataframe or pyarrow table, e.g. expected output
+            :param df2: dataframe of the same backend, e.g. actual output
+            :param keys: key columns, which must be unique in both frames
+            :param columns: compared columns, defaults to all columns besides keys, which must be the same in both frames
+            :param nan_equal: missing values of the same key are equal
+            :param partitions: number of key hash partitions diffed one by one, bounds memory of large frames
+        """
+        assert is_frame(df1) or isinstance(df1, Frame), "df1 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
+        assert is_frame(df2) or isinstance(df2, Frame), "df2 must be of type pd.DataFrame, pl.DataFrame, pa.Table or Frame"
+        self.df1 = df1
+        self.df2 = df2
+        self.keys = [keys] if isinstance(keys, str) else list(keys)
+        self.columns = columns
+        self.nan_equal = nan_equal
+        self.partitions = partitions
+
+    def validate(self):
+        if not self.keys: raise ValidationError("`keys` must be non-empty list of columns")
+        if not isinstance(self.partitions, int) or self.partitions < 1: raise ValidationError("`partitions` must be positive int")
+
+    def assertion(self):
+        difference = diff_frames(self.df1, self.df2, self.keys, self.columns, self.nan_equal, self.partitions)
+        if difference.equal:
+            return self.set_passed()
+        else:
+            return self.set_failed(difference.to_failure(self.violation_message))
+
+    def violations(self) -> Union[np.ndarray, None]:
+        """ rows of df1, which are removed or changed in df2. `None` if keys aren't unique """
+        difference = diff_frames(self.df1, self.df2, self.keys, self.columns, self.nan_equal, self.partitions, with_rows=True)
+        return None if difference.duplicates1 or difference.duplicates2 else difference.rows1
@@ -0,0 +1 @@
+""" benchmark suite of assertions, see `benchmarks/run.py` """
@@ -0,0 +1,174 @@
+""" benchmark cases: every assertion of `assertions.base`, `assertions.columns` and `assertions.df`, `TestPipe.run`
+    and `validate_url`. Every case runs on passing and failing inputs of the same size, failing inputs have
+    `FAIL_RATE` of corrupted rows spread over the whole column.
+"""
+
+from functools import cached_property
+from typing import Callable, Tuple
+
+import numpy as np
+import pandas as pd
+import pandera
+
+from assertions import columns, df
+from assertions.base import BaseAssertion, FnAssertion, PanderaSchemaAssertion
+from core.reporters import QuietReporter
+from core.testpipe import TestPipe
+from core.validators import validate_url
+from .data import STRING_DTYPES, corrupt, fail_positions, make_column, make_frame, make_urls, outside_values
+
+
+class Inputs:
+    """ inputs of one (size, dtype, outcome) combination, built lazily and shared by the cases """
+    def __init__(self, n_rows: int, dtype: str, failing: bool):
+        self.n_rows = n_rows
+        self.dtype = dtype
+        self.failing = failing
+
+    @cached_property
+    def column(self) -> pd.Series:
+        return make_column(self.n_rows, self.dtype)
+
+    @cached_property
+    def positions(self) -> np.ndarray:
+        return fail_positions(self.n_rows)
+
+    @cached_property
+    def other(self) -> pd.Series:
+        """ equal copy of `column`, or a copy with corrupted rows """
+        return corrupt(self.column, self.positions) if self.failing else self.column.copy()
+
+    @cached_property
+    def duplicated(self) -> pd.Series:
+        """ `column` or its copy, where corrupted rows repeat the first value """
+        return self.other if self.failing else self.column
+
+    @cached_property
+    def missing(self) -> pd.Series:
+        """ `column` or its copy with missing values """
+        return corrupt(self.column, self.positions, np.nan if self.dtype in ("int", "float") else None) if self.failing else self.column
+
+    @cached_property
+    def reindexed(self) -> pd.Series:
+        """ `column` with the same index, or a copy with corrupted index labels """
+        if not self.failing:
+            return self.column.copy()
+        index = np.arange(self.n_rows)
+        index[self.positions] = -1
+        return self.column.set_axis(index)
+
+    @cached_property
+    def blocked(self) -> list:
+        """ values of `NotInColumnAssertion`, some of them are in the column if failing """
+        blocked = outside_values(self.dtype)
+        return blocked + self.column.iloc[self.positions].tolist() if self.failing else blocked
+
+    @cached_property
+    def wanted(self) -> list:
+        """ values of `InColumnAssertion`, none of them is in the column if failing """
+        wanted = outside_values(self.dtype)
+        return wanted if self.failing else wanted + [self.column.iloc[-1]]
+
+    @cached_property
+    def urls(self) -> pd.Series:
+        urls = make_urls(self.n_rows, self.dtype)
+        return corrupt(urls, self.positions, "not a url") if self.failing else urls
+
+    @cached_property
+    def frame(self) -> pd.DataFrame:
+        return make_frame(self.column)
+
+    @cached_property
+    def other_frame(self) -> pd.DataFrame:
+        return make_frame(self.other)
+
+    @cached_property
+    def reindexed_frame(self) -> pd.DataFrame:
+        return make_frame(self.reindexed)
+
+    @cached_property
+    def renamed_frame(self) -> pd.DataFrame:
+        return self.frame.rename(columns={"x": "y"}) if self.failing else self.frame.copy()
+
+    @cached_property
+    def duplicated_frame(self) -> pd.DataFrame:
+        return make_frame(self.duplicated)
+
+    @cached_property
+    def shuffled_frame(self) -> pd.DataFrame:
+        """ rows of `other_frame` in random order, `x` is their unique key """
+        return self.other_frame.sample(frac=1, random_state=0)
+
+
+def _assert_no_missing(column: pd.Series) -> None:
+    if column.isna().any():
+        raise AssertionError("column contains missing values")
+
+
+def _run(assertion: BaseAssertion) -> str:
+    assertion.run()
+    return assertion.status
+
+
+def _run_pipe(d: Inputs) -> str:
+    assertions = [df.HasColumnsAssertion(d.frame, ["key", "x"]),
+                  columns.NotInColumnAssertion(d.column, d.blocked),
+                  columns.InColumnAssertion(d.column, d.wanted),
+                  columns.HasNoDuplicatesAssertion(d.duplicated),
+                  df.HasSameDataAssertion(d.frame, d.other_frame)]
+    return "passed" if TestPipe("benchmark", assertions, reporters=[QuietReporter()]).run() else "failed"
+
+
+class Case:
+    """ benchmarked call, built from inputs outside of the timed region """
+    def __init__(self, name: str, build: Callable[[Inputs], Callable[[], str]], dtypes: Tuple[str, ...] = None):
+        """
+        Parameters
+            :param name: name of the case
+            :param build: returns the timed call for inputs, the call returns `passed` or `failed`
+            :param dtypes: dtypes the case runs on, all dtypes by default
+        """
+        self.name = name
+        self.build = build
+        self.dtypes = dtypes
+
+    def supports(self, dtype: str) -> bool:
+        return self.dtypes is None or dtype in self.dtypes
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+CASES = [
+    # assertions.base
+    Case("base.FnAssertion", lambda d: lambda: _run(FnAssertion(_assert_no_missing, d.missing))),
+    Case("base.PanderaSchemaAssertion",
+         lambda d: lambda: _run(PanderaSchemaAssertion(pandera.DataFrameSchema({"key": pandera.Column(unique=True)}),
+                                                       d.duplicated_frame))),
+    # assertions.columns
+    Case("columns.NotInColumnAssertion", lambda d: lambda: _run(columns.NotInColumnAssertion(d.column, d.blocked))),
+    Case("columns.NotInColumnAssertion[sample=1%]",
+         lambda d: lambda: _run(columns.NotInColumnAssertion(d.column, d.blocked, sample=0.01, seed=0))),
+    Case("columns.InColumnAssertion", lambda d: lambda: _run(columns.InColumnAssertion(d.column, d.wanted))),
+    Case("columns.HasNoDuplicatesAssertion", lambda d: lambda: _run(columns.HasNoDuplicatesAssertion(d.duplicated))),
+    Case("columns.HasSameIndexAssertion", lambda d: lambda: _run(columns.HasSameIndexAssertion(d.column, d.reindexed))),
+    Case("columns.HasSameDataAssertion", lambda d: lambda: _run(columns.HasSameDataAssertion(d.column, d.other))),
+    Case("columns.AreSomeAssertion", lambda d: lambda: _run(columns.AreSomeAssertion(d.column, d.other))),
+    Case("columns.AreSameLenAssertion",
+         lambda d: lambda: _run(columns.AreSameLenAssertion(d.column, d.column.iloc[:-1] if d.failing else d.other))),
+    Case("columns.LenIsAssertion", lambda d: lambda: _run(columns.LenIsAssertion(d.column, d.n_rows + d.failing))),
+    Case("columns.UrlColumnAssertion", lambda d: lambda: _run(columns.UrlColumnAssertion(d.urls)), STRING_DTYPES),
+    # assertions.df
+    Case("df.HasColumnsAssertion",
+         lambda d: lambda: _run(df.HasColumnsAssertion(d.frame, ["key", "missing"] if d.failing else ["key", "x"]))),
+    Case("df.HasSameColumnsAssertion", lambda d: lambda: _run(df.HasSameColumnsAssertion(d.frame, d.renamed_frame))),
+    Case("df.HasSameIndexAssertion", lambda d: lambda: _run(df.HasSameIndexAssertion(d.frame, d.reindexed_frame))),
+    Case("df.HasSameDataAssertion", lambda d: lambda: _run(df.HasSameDataAssertion(d.frame, d.other_frame))),
+    Case("df.HasSameShape", lambda d: lambda: _run(df.HasSameShape(d.frame, d.frame.iloc[:-1] if d.failing else d.other_frame))),
+    Case("df.ShapeIs", lambda d: lambda: _run(df.ShapeIs(d.frame, (d.n_rows, 3 if d.failing else 2)))),
+    Case("df.AreSomeAssertion", lambda d: lambda: _run(df.AreSomeAssertion(d.frame, d.other_frame))),
+    Case("df.HasSameRowsAssertion", lambda d: lambda: _run(df.HasSameRowsAssertion(d.frame, d.shuffled_frame, ["x"]))),
+    # pipe and validators
+    Case("TestPipe.run", lambda d: lambda: _run_pipe(d)),
+    Case("validate_url", lambda d: lambda: "passed" if validate_url(d.urls) else "failed", STRING_DTYPES),
+]
@@ -0,0 +1,89 @@
+""" synthetic inputs of the benchmarks: unique columns of every benchmarked dtype and their corrupted copies """
+
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+DTYPES = ("int", "float", "category", "string", "pyarrow-string")
+STRING_DTYPES = ("category", "string", "pyarrow-string")
+# share of corrupted rows of failing inputs, failures are spread over the whole column
+FAIL_RATE = 0.001
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_dtypes() -> Tuple[str, ...]:
+    return DTYPES if _has_pyarrow() else tuple(dtype for dtype in DTYPES if dtype != "pyarrow-string")
+
+
+def make_column(n_rows: int, dtype: str, seed: int = 0) -> pd.Series:
+    """ column of `n_rows` unique values in shuffled order """
+    order = np.random.default_rng(seed).permutation(n_rows)
+    if dtype == "int":
+        return pd.Series(order, dtype="int64", name="key")
+    if dtype == "float":
+        return pd.Series(order * 0.5, dtype="float64", name="key")
+    return _strings(pd.Series(order.astype(str), dtype=object, name="key").radd("k"), dtype)
+
+
+def _strings(strings: pd.Series, dtype: str) -> pd.Series:
+    """ object strings converted to the string `dtype` """
+    if dtype == "string":
+        return strings
+    if dtype == "category":
+        return strings.astype("category")
+    if dtype == "pyarrow-string":
+        return strings.astype("string[pyarrow]")
+    raise ValueError(f"unknown dtype: {dtype}, must be one of: {DTYPES}")
+
+
+def make_urls(n_rows: int, dtype: str, seed: int = 0) -> pd.Series:
+    """ valid urls, with the dtype of `make_column` (string dtypes only) """
+    if dtype not in STRING_DTYPES: raise ValueError(f"urls are strings, dtype must be one of: {STRING_DTYPES}")
+    order = np.random.default_rng(seed).permutation(n_rows)
+    urls = pd.Series(order.astype(str), dtype=object, name="url").radd("https://k").add(".example.com/path")
+    return _strings(urls, dtype)
+
+
+def outside_values(dtype: str, k: int = 1000) -> list:
+    """ `k` values of the dtype, which `make_column` never contains """
+    if dtype == "int":
+        return list(range(-k, 0))
+    if dtype == "float":
+        return [-0.25 - i for i in range(k)]
+    return [f"x{i}" for i in range(k)]
+
+
+def fail_positions(n_rows: int, seed: int = 0) -> np.ndarray:
+    """ sorted positions of corrupted rows, at least one """
+    size = max(1, int(n_rows * FAIL_RATE))
+    positions = np.random.default_rng(seed + 1).choice(n_rows, size=size, replace=False)
+    positions.sort()
+    return positions
+
+
+# default `value` of `corrupt`, `None` is a valid value
+FIRST = object()
+
+
+def corrupt(column: pd.Series, positions: np.ndarray, value=FIRST) -> pd.Series:
+    """ copy of the column, where rows at `positions` are replaced by `value`, the first value of the column by default """
+    value = column.iloc[0] if value is FIRST else value
+    corrupted = column.copy()
+    if isinstance(corrupted.dtype, pd.CategoricalDtype) and value is not None and value not in corrupted.cat.categories:
+        corrupted = corrupted.cat.add_categories([value])
+    corrupted.iloc[positions] = value
+    return corrupted
+
+
+def make_frame(column: pd.Series) -> pd.DataFrame:
+    """ two columns frame: the benchmarked column and a float column """
+    return pd.DataFrame({"key": column, "x": np.arange(len(column), dtype="float64")})
@@ -0,0 +1,108 @@
+""" import time of datatest modules, checked against a baseline
+
+    python -m benchmarks.imports                                        # compared with benchmarks/import_baseline.json
+    python -m benchmarks.imports --save benchmarks/import_baseline.json  # refresh the baseline
+
+Every module is imported by a fresh interpreter `--repeat` times, the best time is reported. pandas and numpy are
+required anyway, so they are imported before the clock starts and the time is the own cost of datatest.
+The run fails if a module imports optional heavy dependencies, which must be imported on their first use.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+from .run import THRESHOLD, environment
+
+
+IMPORT_BASELINE = os.path.join(os.path.dirname(__file__), "import_baseline.json")
+MODULES = ("assertions.base", "assertions.columns", "assertions.df", "assertions.approx", "core.testpipe",
+           "core.chunked", "core.incremental", "core.asyncpipe", "core.batch", "core.reporters", "core.sources")
+# imported on first use: `PanderaSchemaAssertion`, colored output, polars data, url validation
+LAZY_MODULES = ("pandera", "colorama", "polars", "validators")
+# shorter imports are dominated by noise, they aren't compared
+MIN_SECONDS = 0.01
+
+_SCRIPT = """
+import json, sys, time
+import numpy, pandas
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module: str, repeat: int) -> Dict:
+    """ best import time of the module in fresh interpreters and optional modules it loaded """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _SCRIPT.format(module=module, lazy=LAZY_MODULES)],
+                                capture_output=True, text=True, check=True, env=env, cwd=root).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {"module": module, "seconds": min(run["seconds"] for run in runs), "loaded": runs[0]["loaded"]}
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float = THRESHOLD) -> List[Dict]:
+    """ results, which import `threshold` times slower than the baseline. Ratios are added to the compared results """
+    base = {result["module"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        old = base.get(result["module"])
+        if old is None:
+            continue
+        result["time_ratio"] = result["seconds"] / old["seconds"] if old["seconds"] >= MIN_SECONDS else 1.0
+        if result["time_ratio"] > threshold and result["seconds"] >= MIN_SECONDS:
+            regressions.append(result)
+    return regressions
+
+
+def _format(result: Dict) -> str:
+    loaded = f" loads: {', '.join(result['loaded'])}" if result["loaded"] else ""
+    return f"{result['module']:<24} {result['seconds'] * 1000:>9.1f}ms{loaded}"
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="datatest import time")
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="imports of every module, the best one is reported")
+    parser.add_argument("--save", default=None, help="path of JSON file to save results to")
+    parser.add_argument("--compare", default=IMPORT_BASELINE, help="baseline JSON file, `none` to skip the comparison")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="ratio to the baseline reported as regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for module in args.modules:
+        results.append(measure_import(module, args.repeat))
+        print(_format(results[-1]), flush=True)
+    failed = False
+
+    eager = [result for result in results if result["loaded"]]
+    for result in eager:
+        print(f"eager import: {result['module']} loads {', '.join(result['loaded'])}, import them on first use")
+        failed = True
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=1)
+        print(f"\nsaved {len(results)} results to {args.save}")
+
+    if args.compare.lower() != "none" and os.path.exists(args.compare) and os.path.abspath(args.compare) != os.path.abspath(args.save or ""):
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        compared = sum("time_ratio" in result for result in results)
+        print(f"\ncompared {compared} results with {args.compare} ({baseline['environment']['platform']})")
+        for result in regressions:
+            print(f"regression: {_format(result)} time x{result['time_ratio']:.2f}")
+        failed = failed or bool(regressions)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
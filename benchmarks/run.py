@@ -0,0 +1,156 @@
+""" runs the benchmark suite and compares it with a baseline
+
+    python -m benchmarks.run                                   # default sizes, compared with benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1e6 1e7 1e8 --dtypes int pyarrow-string --cases columns.
+    python -m benchmarks.run --sizes 1e3 1e5 --save benchmarks/baseline.json   # refresh the baseline
+
+Every case is timed `--repeat` times on the same inputs, the best time is reported as throughput (rows/s).
+Peak memory is measured by a separate run under `tracemalloc`, which sees numpy and Python allocations,
+but not buffers allocated by pyarrow's own memory pool.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cases import CASES, Case, Inputs
+from .data import available_dtypes
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# slowdown/memory growth against the baseline, which is reported as a regression
+THRESHOLD = 2.0
+# shorter times and smaller peaks are dominated by noise, they aren't compared
+MIN_SECONDS = 1e-3
+MIN_PEAK_BYTES = 2**16
+
+
+def measure(call: Callable[[], str], repeat: int) -> Tuple[float, int, str]:
+    """ best time of `repeat` calls in seconds, peak traced memory in bytes and status of the call """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        status = call()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak, status
+
+
+def run_cases(cases: List[Case], sizes: List[int], dtypes: List[str], repeat: int) -> List[Dict]:
+    results = []
+    for n_rows in sizes:
+        for dtype in dtypes:
+            for failing in (False, True):
+                inputs = Inputs(n_rows, dtype, failing)
+                for case in cases:
+                    if not case.supports(dtype):
+                        continue
+                    seconds, peak, status = measure(case.build(inputs), repeat)
+                    result = {"case": case.name, "dtype": dtype, "rows": n_rows,
+                              "expected": "failed" if failing else "passed", "status": status,
+                              "seconds": seconds, "rows_per_s": n_rows / seconds if seconds else None,
+                              "peak_bytes": peak}
+                    results.append(result)
+                    print(_format(result), flush=True)
+                del inputs
+    return results
+
+
+def _key(result: Dict) -> Tuple:
+    return result["case"], result["dtype"], result["rows"], result["expected"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], threshold: float = THRESHOLD) -> List[Dict]:
+    """ results, which are `threshold` times slower or use `threshold` times more memory than the baseline.
+        Ratios are added to the compared results
+    """
+    base = {_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = base.get(_key(result))
+        if old is None:
+            continue
+        time_ratio = result["seconds"] / old["seconds"] if old["seconds"] >= MIN_SECONDS else 1.0
+        memory_ratio = result["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] >= MIN_PEAK_BYTES else 1.0
+        result["time_ratio"], result["memory_ratio"] = time_ratio, memory_ratio
+        if time_ratio > threshold or memory_ratio > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def _format(result: Dict) -> str:
+    mark = "" if result["status"] == result["expected"] else f" [expected {result['expected']}]"
+    rate = f"{result['rows_per_s']:>14,.0f}" if result["rows_per_s"] else f"{'-':>14}"
+    return (f"{result['case']:<42} {result['dtype']:<15} {result['rows']:>11,} {result['status']:<7}"
+            f" {result['seconds'] * 1000:>11.3f}ms {rate} rows/s {result['peak_bytes'] / 2**20:>9.2f}MiB{mark}")
+
+
+def environment() -> Dict:
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.machine(),
+            "cpus": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__, "pyarrow": pyarrow_version}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="datatest benchmarks")
+    parser.add_argument("--sizes", nargs="+", type=float, default=DEFAULT_SIZES, help="numbers of rows, e.g. 1e3 1e8")
+    parser.add_argument("--dtypes", nargs="+", default=None, help=f"dtypes, defaults to all of: {available_dtypes()}")
+    parser.add_argument("--cases", nargs="+", default=None, help="prefixes of case names, e.g. columns. TestPipe")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of every case, the best one is reported")
+    parser.add_argument("--save", default=None, help="path of JSON file to save results to")
+    parser.add_argument("--compare", default=BASELINE, help="baseline JSON file, `none` to skip the comparison")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="ratio to the baseline reported as regression")
+    args = parser.parse_args(argv)
+
+    dtypes = args.dtypes or list(available_dtypes())
+    unknown = set(dtypes) - set(available_dtypes())
+    if unknown: parser.error(f"unknown or unavailable dtypes: {sorted(unknown)}")
+    cases = [case for case in CASES if args.cases is None or case.name.startswith(tuple(args.cases))]
+    sizes = [int(size) for size in args.sizes]
+
+    results = run_cases(cases, sizes, dtypes, args.repeat)
+    unexpected = [result for result in results if result["status"] != result["expected"]]
+    if unexpected:
+        print(f"\n{len(unexpected)} cases ended with unexpected status (sampled cases may miss failures)")
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=1)
+        print(f"\nsaved {len(results)} results to {args.save}")
+
+    if args.compare.lower() != "none" and os.path.exists(args.compare) and os.path.abspath(args.compare) != os.path.abspath(args.save or ""):
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        compared = sum("time_ratio" in result for result in results)
+        print(f"\ncompared {compared} results with {args.compare} ({baseline['environment']['platform']})")
+        for result in sorted(regressions, key=lambda result: -max(result["time_ratio"], result["memory_ratio"])):
+            print(f"regression: {_format(result)} time x{result['time_ratio']:.2f}, memory x{result['memory_ratio']:.2f}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
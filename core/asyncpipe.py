@@ -0,0 +1,189 @@
+""" asyncio pipe: datasets are loaded ahead while assertions of the previous dataset are running """
+
+import asyncio
+import inspect
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Union
+
+import pandas as pd
+
+from assertions.base import BaseAssertion
+from .chunked import AssertionFactory
+from .exceptions import ValidationError
+from .reporters import ConsoleReporter, Reporter
+from .results import PipeResult
+from .sources import read_frame
+from .testpipe import TestPipe
+
+
+# data itself, awaitable, async or sync callable, which loads it, or path to csv/parquet file
+DataSource = Union[pd.DataFrame, Awaitable, Callable[[], Any], str, os.PathLike]
+
+
+async def load(source: DataSource, executor: ThreadPoolExecutor, columns: List[str] = None) -> Any:
+    """ loads the source, blocking loaders and file reads run in the executor """
+    loop = asyncio.get_running_loop()
+    if inspect.isawaitable(source):
+        return await source
+    if isinstance(source, (str, os.PathLike)):
+        return await loop.run_in_executor(executor, read_frame, source, columns)
+    if callable(source):
+        if inspect.iscoroutinefunction(source):
+            return await source()
+        data = await loop.run_in_executor(executor, source)
+        return await data if inspect.isawaitable(data) else data
+    return source
+
+
+class Dataset:
+    """ data source and factories of assertions on its data """
+    def __init__(self, name: str, source: DataSource, assertions: List[AssertionFactory], columns: List[str] = None):
+        """
+        Parameters
+            :param name: name of the dataset
+            :param source: data, awaitable, async or sync callable returning data, or path to csv/parquet file.
+                Awaitables (e.g. coroutine objects) can be awaited once, pass callables to run the pipe again
+            :param assertions: factories of assertions, which build assertion on the loaded data: `lambda df: LenIsAssertion(df["id"], 100)`
+            :param columns: read only these columns of the file, defaults to all columns
+        """
+        self.name = name
+        self.source = source
+        self.assertions = assertions
+        self.columns = columns
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}>"
+
+
+class AsyncTestPipe:
+    """ Pipe of datasets, which are loaded asynchronously: while assertions of one dataset run in the executor,
+        next datasets are already loading, so wall time approaches max(I/O, compute) instead of their sum.
+        Each dataset is checked by its own `TestPipe`, so fusing, ordering and metrics work the same.
+    """
+    def __init__(self,
+                 name: str,
+                 datasets: List[Dataset],
+                 prefetch: int = 1,
+                 loaders: int = 4,
+                 cache_bytes: int = 256 * 2**20,
+                 reporters: List[Reporter] = None):
+        """
+        Parameters
+            :param name: name of the pipe
+            :param datasets: datasets in the order they are checked
+            :param prefetch: number of datasets loaded ahead of the checked one, bounds memory of loaded data
+            :param loaders: number of threads of blocking loaders and file reads
+            :param cache_bytes: memory budget of computations shared by assertions of a dataset
+            :param reporters: receive results of every dataset pipe, defaults to `ConsoleReporter`
+        """
+        self.name = name
+        self.datasets = datasets
+        self.prefetch = prefetch
+        self.loaders = loaders
+        self.cache_bytes = cache_bytes
+        self.reporters = [ConsoleReporter()] if reporters is None else reporters
+        # pipes of checked datasets by name, filled by `run`
+        self.pipes: Dict[str, TestPipe] = {}
+        self.results: Dict[str, PipeResult] = {}
+        # names of datasets, which weren't checked because of `fail_fast` or a failed dataset
+        self.skipped: List[str] = []
+        self.__validate()
+
+    def __validate(self):
+        for dataset in self.datasets:
+            if not isinstance(dataset, Dataset): raise ValidationError(f"Dataset must be instance of `Dataset`, but got: `{type(dataset)}`")
+        names = [dataset.name for dataset in self.datasets]
+        if len(set(names)) != len(names): raise ValidationError("names of datasets must be unique")
+        if not isinstance(self.prefetch, int) or self.prefetch < 0: raise ValidationError("`prefetch` must be non-negative int")
+        if not isinstance(self.loaders, int) or self.loaders < 1: raise ValidationError("`loaders` must be positive int")
+
+    def _build(self, dataset: Dataset, data: Any) -> TestPipe:
+        assertions = []
+        for factory in dataset.assertions:
+            assertion = factory(data)
+            if not isinstance(assertion, BaseAssertion):
+                raise ValidationError(f"Assertion must be instance of subclass `BaseAssertion`, but got: `{type(assertion)}`")
+            assertions.append(assertion)
+        return TestPipe(f"{self.name}/{dataset.name}", assertions, cache_bytes=self.cache_bytes, reporters=self.reporters,
+                        release_inputs=True)
+
+    def _check(self, dataset: Dataset, data: Any, run_kwargs: Dict[str, Any]) -> TestPipe:
+        """ builds and runs assertions of the dataset, runs in the executor """
+        pipe = self._build(dataset, data)
+        self.results[dataset.name] = pipe.run(**run_kwargs)
+        return pipe
+
+    async def run(self,
+                  workers: int = None,
+                  backend: Literal["thread", "process"] = "thread",
+                  fuse: bool = True,
+                  fail_fast: bool = False,
+                  order: Literal["declared", "cost"] = "declared",
+                  memory: Literal[None, "tracemalloc", "rss"] = None,
+                  show_metrics: bool = False) -> Dict[str, PipeResult]:
+        """ run assertions of all datasets, arguments are passed to `TestPipe.run` of every dataset.
+            With `fail_fast` datasets after the first failed one are neither loaded nor checked.
+            If loading or checking of a dataset raises, results of checked datasets are kept in `results`,
+            the rest are listed in `skipped` and the error is raised
+            :returns: results of checked datasets by name
+        """
+        loop = asyncio.get_running_loop()
+        run_kwargs = dict(workers=workers, backend=backend, fuse=fuse, fail_fast=fail_fast, order=order,
+                          memory=memory, show_metrics=show_metrics)
+        self.pipes = {}
+        self.results = {}
+        self.skipped = []
+        loads: List[asyncio.Task] = []
+        load_executor, executor = ThreadPoolExecutor(max_workers=self.loaders), ThreadPoolExecutor(max_workers=1)
+        try:
+            for i, dataset in enumerate(self.datasets):
+                # keep `prefetch` datasets loading ahead of the checked one
+                while len(loads) < min(i + 1 + self.prefetch, len(self.datasets)):
+                    ahead = self.datasets[len(loads)]
+                    loads.append(asyncio.ensure_future(load(ahead.source, load_executor, ahead.columns)))
+                try:
+                    data = await loads[i]
+                    loads[i] = None
+                    pipe = await loop.run_in_executor(executor, self._check, dataset, data, run_kwargs)
+                except Exception:
+                    # results of checked datasets are kept and summarized, the rest are skipped
+                    self.skipped = [dataset.name for dataset in self.datasets[i:]]
+                    self._summarize(f"loading or checking `{dataset.name}` failed")
+                    raise
+                del data
+                self.pipes[dataset.name] = pipe
+                if fail_fast and self.results[dataset.name].n_failed:
+                    self.skipped = [dataset.name for dataset in self.datasets[i + 1:]]
+                    break
+        finally:
+            for task in loads:
+                if task is None:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    # errors of prefetched datasets, which aren't checked, are dropped
+                    task.exception()
+            # running blocking loaders can't be interrupted, executors are shut down off the event loop
+            await loop.run_in_executor(None, self._shutdown, load_executor, executor)
+
+        self._summarize()
+        return self.results
+
+    @staticmethod
+    def _shutdown(*executors: ThreadPoolExecutor) -> None:
+        for executor in executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _summarize(self, error: str = None) -> None:
+        if any(isinstance(reporter, ConsoleReporter) for reporter in self.reporters):
+            n_passed = sum(result.passed for result in self.results.values())
+            skipped = f", {len(self.skipped)} skipped" if self.skipped else ""
+            print(f"[{self.name}]: [{n_passed}/{len(self.datasets)}] datasets passed{skipped}" + (f": {error}" if error else ""))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}: {[dataset.name for dataset in self.datasets]}>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__} {self.name}: {[dataset.name for dataset in self.datasets]}"
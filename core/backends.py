@@ -0,0 +1,334 @@
+""" backends of column and frame operations: assertions run on pandas, pyarrow and polars data with their own
+    compute kernels, without conversion to pandas. pyarrow and polars are optional and imported only for their data.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .exceptions import ValidationError
+from .valueset import ValueSet
+
+
+def _module(obj: Any) -> str:
+    return type(obj).__module__.split(".")[0]
+
+
+def _pandas_isin(column, values) -> np.ndarray:
+    """ `isin` of a pyarrow or polars column in pandas, for values of types the column can't be compared with """
+    if _module(values) in ("pyarrow", "polars"):
+        values = values.to_pandas()
+    return np.asarray(PANDAS.isin(column.to_pandas(), values), dtype=bool)
+
+
+class Backend(ABC):
+    """ operations on native columns (Series, arrays) and frames (DataFrames, tables).
+        Masks are returned as numpy bool arrays, data itself is never converted
+    """
+    name: str = None
+
+    @abstractmethod
+    def is_column(self, obj: Any) -> bool:
+        ...
+
+    @abstractmethod
+    def is_frame(self, obj: Any) -> bool:
+        ...
+
+    @abstractmethod
+    def isin(self, column, values) -> np.ndarray:
+        """ mask of values of the column, which are in `values` """
+        ...
+
+    @abstractmethod
+    def duplicated(self, column) -> np.ndarray:
+        """ mask of repeated values of the column, the first occurrence is not marked """
+        ...
+
+    @abstractmethod
+    def value_counts(self, column, k: int = None) -> pd.Series:
+        """ `k` most frequent values with their counts, the most frequent first """
+        ...
+
+    @abstractmethod
+    def take(self, column, positions: np.ndarray):
+        """ native column of rows at the positions """
+        ...
+
+    @abstractmethod
+    def tolist(self, column) -> list:
+        """ values as python objects """
+        ...
+
+    @abstractmethod
+    def differs(self, column1, column2, nan_equal: bool) -> np.ndarray:
+        """ mask of positions, where the same length columns differ """
+        ...
+
+    @abstractmethod
+    def dtype(self, column) -> Any:
+        ...
+
+    @abstractmethod
+    def columns(self, frame) -> List[Hashable]:
+        ...
+
+    @abstractmethod
+    def column(self, frame, i: int):
+        """ column of the frame by position """
+        ...
+
+    def shape(self, frame) -> Tuple[int, int]:
+        return frame.shape
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__}>"
+
+
+class PandasBackend(Backend):
+    name = "pandas"
+
+    def is_column(self, obj: Any) -> bool:
+        return isinstance(obj, pd.Series)
+
+    def is_frame(self, obj: Any) -> bool:
+        return isinstance(obj, pd.DataFrame)
+
+    def isin(self, column: pd.Series, values) -> pd.Series:
+        if isinstance(values, ValueSet):
+            return pd.Series(values.contains(column), index=column.index, name=column.name)
+        return column.isin(values)
+
+    def duplicated(self, column: pd.Series) -> pd.Series:
+        return column.duplicated()
+
+    def value_counts(self, column: pd.Series, k: int = None) -> pd.Series:
+        counts = column.value_counts()
+        return counts if k is None else counts.head(k)
+
+    def take(self, column: pd.Series, positions: np.ndarray) -> pd.Series:
+        return column.iloc[positions]
+
+    def tolist(self, column: pd.Series) -> list:
+        return column.tolist()
+
+    def differs(self, column1: pd.Series, column2: pd.Series, nan_equal: bool) -> np.ndarray:
+        from .equality import _differs, _values
+        return _differs(_values(column1), _values(column2), nan_equal)
+
+    def dtype(self, column: pd.Series) -> Any:
+        return column.dtype
+
+    def columns(self, frame: pd.DataFrame) -> List[Hashable]:
+        return frame.columns.tolist()
+
+    def column(self, frame: pd.DataFrame, i: int) -> pd.Series:
+        return frame.iloc[:, i]
+
+
+class ArrowBackend(Backend):
+    """ `pyarrow.Array`/`pyarrow.ChunkedArray` columns and `pyarrow.Table` frames """
+    name = "pyarrow"
+
+    def is_column(self, obj: Any) -> bool:
+        if _module(obj) != "pyarrow":
+            return False
+        import pyarrow as pa
+        return isinstance(obj, (pa.Array, pa.ChunkedArray))
+
+    def is_frame(self, obj: Any) -> bool:
+        if _module(obj) != "pyarrow":
+            return False
+        import pyarrow as pa
+        return isinstance(obj, pa.Table)
+
+    def _value_set(self, column, values):
+        import pyarrow as pa
+        if isinstance(values, ValueSet):
+            values = values.to_numpy()
+        elif isinstance(values, (pd.Series, pd.Index)):
+            values = values.to_numpy()
+        value_set = values if isinstance(values, (pa.Array, pa.ChunkedArray)) else pa.array(values, from_pandas=True)
+        if value_set.type != column.type:
+            try:
+                value_set = value_set.cast(column.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                pass
+        return value_set
+
+    def isin(self, column, values) -> np.ndarray:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        try:
+            isin = pc.is_in(column, value_set=self._value_set(column, values), skip_nulls=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # values of a type the column can't be compared with, e.g. strings of an integer column
+            return _pandas_isin(column, values)
+        return isin.to_numpy(zero_copy_only=False)
+
+    def duplicated(self, column) -> np.ndarray:
+        import pyarrow as pa
+        # hash aggregation finds the first position of every distinct value, nulls form their own group
+        positions = pa.table({"value": column, "position": pa.array(np.arange(len(column)))})
+        first = positions.group_by("value", use_threads=False).aggregate([("position", "min")])
+        duplicated = np.ones(len(column), dtype=bool)
+        duplicated[first.column("position_min").to_numpy()] = False
+        return duplicated
+
+    def value_counts(self, column, k: int = None) -> pd.Series:
+        import pyarrow.compute as pc
+        counts = pc.value_counts(column)
+        order = np.argsort(-counts.field("counts").to_numpy(), kind="stable")[:k]
+        top = counts.take(order)
+        return pd.Series(top.field("counts").to_numpy(), index=pd.Index(top.field("values").to_pylist(), dtype=object), name="count")
+
+    def take(self, column, positions: np.ndarray):
+        return column.take(np.asarray(positions))
+
+    def tolist(self, column) -> list:
+        return column.to_pylist()
+
+    def _missing(self, column) -> np.ndarray:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        missing = pc.is_null(column, nan_is_null=pa.types.is_floating(column.type))
+        return missing.to_numpy(zero_copy_only=False)
+
+    def differs(self, column1, column2, nan_equal: bool) -> np.ndarray:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        try:
+            differs = pc.not_equal(column1, column2)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            # columns of types, which can't be compared, e.g. strings and integers, differ as in pandas
+            return PANDAS.differs(column1.to_pandas(), column2.to_pandas(), nan_equal)
+        # comparisons with nulls are null
+        differs = differs.fill_null(True).to_numpy(zero_copy_only=False)
+        missing1, missing2 = self._missing(column1), self._missing(column2)
+        if nan_equal:
+            return differs & ~(missing1 & missing2)
+        return differs | missing1 | missing2
+
+    def dtype(self, column) -> Any:
+        return column.type
+
+    def columns(self, frame) -> List[Hashable]:
+        return frame.column_names
+
+    def column(self, frame, i: int):
+        return frame.column(i)
+
+
+class PolarsBackend(Backend):
+    """ `polars.Series` columns and `polars.DataFrame` frames """
+    name = "polars"
+
+    def is_column(self, obj: Any) -> bool:
+        if _module(obj) != "polars":
+            return False
+        import polars as pl
+        return isinstance(obj, pl.Series)
+
+    def is_frame(self, obj: Any) -> bool:
+        if _module(obj) != "polars":
+            return False
+        import polars as pl
+        return isinstance(obj, pl.DataFrame)
+
+    def isin(self, column, values) -> np.ndarray:
+        import polars as pl
+        if isinstance(values, ValueSet):
+            values = values.to_numpy()
+        elif isinstance(values, (pd.Series, pd.Index)):
+            values = values.to_numpy()
+        if not isinstance(values, pl.Series):
+            try:
+                values = pl.Series(values)
+            except (TypeError, pl.exceptions.PolarsError):
+                # values of mixed types
+                return _pandas_isin(column, values)
+        cast = values.cast(column.dtype, strict=False)
+        if not cast.cast(values.dtype, strict=False).equals(values, check_names=False, null_equal=True):
+            # values the column can't hold, e.g. strings or fractions of an integer column, must not match after the cast
+            return _pandas_isin(column, values)
+        isin = column.is_in(cast.implode()).fill_null(False).to_numpy()
+        if values.null_count() or (values.dtype.is_float() and values.is_nan().any()):
+            # pandas semantics: missing values match missing values
+            isin |= column.is_null().to_numpy()
+        return isin
+
+    def duplicated(self, column) -> np.ndarray:
+        return ~column.is_first_distinct().to_numpy()
+
+    def value_counts(self, column, k: int = None) -> pd.Series:
+        counts = column.value_counts(sort=True)
+        if k is not None:
+            counts = counts.head(k)
+        return pd.Series(counts.get_column("count").to_numpy(), index=pd.Index(counts.get_column(column.name).to_list(), dtype=object), name="count")
+
+    def take(self, column, positions: np.ndarray):
+        return column.gather(np.asarray(positions))
+
+    def tolist(self, column) -> list:
+        return column.to_list()
+
+    def differs(self, column1, column2, nan_equal: bool) -> np.ndarray:
+        import polars as pl
+        try:
+            # nulls are equal to nulls only, NaNs are equal in polars
+            differs = column1.ne_missing(column2).to_numpy()
+        except pl.exceptions.PolarsError:
+            # columns of types, which can't be compared, e.g. strings and integers, differ as in pandas
+            return PANDAS.differs(column1.to_pandas(), column2.to_pandas(), nan_equal)
+        if nan_equal:
+            return differs
+        missing1, missing2 = column1.is_null(), column2.is_null()
+        if column1.dtype.is_float():
+            missing1 = missing1 | column1.is_nan().fill_null(False)
+        if column2.dtype.is_float():
+            missing2 = missing2 | column2.is_nan().fill_null(False)
+        return differs | missing1.to_numpy() | missing2.to_numpy()
+
+    def dtype(self, column) -> Any:
+        return column.dtype
+
+    def columns(self, frame) -> List[Hashable]:
+        return frame.columns
+
+    def column(self, frame, i: int):
+        return frame.to_series(i)
+
+
+PANDAS = PandasBackend()
+BACKENDS: List[Backend] = [PANDAS, ArrowBackend(), PolarsBackend()]
+
+
+def get_backend(obj: Any) -> Backend:
+    """ backend of the column or frame """
+    for backend in BACKENDS:
+        if backend.is_column(obj) or backend.is_frame(obj):
+            return backend
+    raise ValidationError(f"unsupported data type: {type(obj)}")
+
+
+def is_column(obj: Any) -> bool:
+    """ pandas/polars Series or pyarrow (chunked) array """
+    return any(backend.is_column(obj) for backend in BACKENDS)
+
+
+def is_frame(obj: Any) -> bool:
+    """ pandas/polars DataFrame or pyarrow Table """
+    return any(backend.is_frame(obj) for backend in BACKENDS)
+
+
+def take_list(column, positions: np.ndarray) -> list:
+    """ values of the column at the positions as python objects """
+    backend = get_backend(column)
+    return backend.tolist(backend.take(column, positions))
+
+
+def isin(column, values) -> np.ndarray:
+    """ `column.isin(values)` of any backend as boolean array, `values` may be a `ValueSet` """
+    return np.asarray(get_backend(column).isin(column, values), dtype=bool)
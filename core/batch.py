@@ -0,0 +1,228 @@
+""" one pipe definition mapped over many partitions in a process pool. Partitions are passed to workers as Arrow IPC
+    streams in shared memory, so they are neither pickled nor copied through pipes
+"""
+
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterable, List, Literal, Tuple, Union
+
+import pandas as pd
+
+from assertions.base import BaseAssertion
+from .chunked import AssertionFactory
+from .exceptions import ValidationError
+from .reporters import ConsoleReporter, QuietReporter, Reporter
+from .results import BatchResult, PipeResult
+from .sources import read_frame
+from .testpipe import TestPipe
+
+
+TRANSPORTS = ("arrow", "pickle")
+
+# partition: dataframe, pyarrow table or path to csv/parquet file, which is read by the worker
+Partition = Union[pd.DataFrame, Any, str, os.PathLike]
+
+# template of the running `map`. Forked workers inherit it, so factories (e.g. lambdas) aren't pickled
+_FORKED_TEMPLATE: "PipeTemplate" = None
+
+
+def share(data: Any) -> Tuple[SharedMemory, int]:
+    """ writes dataframe or pyarrow table as Arrow IPC stream into a new shared memory block
+        :returns: the block, which has to be unlinked by the caller, and size of the stream
+    """
+    import pyarrow as pa
+
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data)
+    counter = pa.MockOutputStream()
+    with pa.ipc.new_stream(counter, table.schema) as writer:
+        writer.write_table(table)
+    size = counter.size()
+    block = SharedMemory(create=True, size=max(size, 1))
+    try:
+        with pa.ipc.new_stream(pa.FixedSizeBufferWriter(pa.py_buffer(block.buf)), table.schema) as writer:
+            writer.write_table(table)
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block, size
+
+
+def _run_shared(template: "PipeTemplate", partition: str, name: str, size: int, as_arrow: bool, run_kwargs: Dict) -> PipeResult:
+    """ runs the template on the partition in shared memory, arrow buffers of the table point into the block """
+    import pyarrow as pa
+
+    block = SharedMemory(name=name)
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(block.buf)[:size]).read_all()
+        data = table if as_arrow else table.to_pandas()
+        del table
+        return template.build(partition, data).run(**run_kwargs)
+    finally:
+        data = None
+        try:
+            block.close()
+        except BufferError:
+            # arrays of the partition are still referenced (e.g. by a traceback), the mapping is released with them
+            pass
+
+
+def _run_partition(template: "PipeTemplate", partition: str, data: Partition, run_kwargs: Dict) -> PipeResult:
+    if isinstance(data, (str, os.PathLike)):
+        data = read_frame(data, template.columns)
+    return template.build(partition, data).run(**run_kwargs)
+
+
+def _forked_shared(*args) -> PipeResult:
+    return _run_shared(_FORKED_TEMPLATE, *args)
+
+
+def _forked_partition(*args) -> PipeResult:
+    return _run_partition(_FORKED_TEMPLATE, *args)
+
+
+class PipeTemplate:
+    """ Pipe definition, which isn't bound to data: assertions are built by factories from columns of every partition.
+        `map` runs it over partitions in a process pool and aggregates their results
+    """
+    def __init__(self,
+                 name: str,
+                 assertions: List[AssertionFactory],
+                 columns: List[str] = None,
+                 cache_bytes: int = 256 * 2**20):
+        """
+        Parameters
+            :param name: name of the template, pipes of partitions are named `<name>/<partition>`
+            :param assertions: factories of assertions, which build assertion on the partition: `lambda df: InColumnAssertion(df["country"], codes)`
+            :param columns: read only these columns of partition files, defaults to all columns
+            :param cache_bytes: memory budget of computations shared by assertions of a partition
+        """
+        self.name = name
+        self.assertions = assertions
+        self.columns = columns
+        self.cache_bytes = cache_bytes
+        self.__validate()
+
+    def __validate(self):
+        for factory in self.assertions:
+            if not callable(factory):
+                raise ValidationError(f"Assertion must be callable, which builds assertion on the partition, but got: `{type(factory)}`")
+
+    def build(self, partition: str, data: Any, reporters: List[Reporter] = None) -> TestPipe:
+        """ pipe of the template's assertions on data of the partition, quiet by default """
+        assertions = []
+        for factory in self.assertions:
+            assertion = factory(data)
+            if not isinstance(assertion, BaseAssertion):
+                raise ValidationError(f"Assertion must be instance of subclass `BaseAssertion`, but got: `{type(assertion)}`")
+            assertions.append(assertion)
+        return TestPipe(f"{self.name}/{partition}", assertions, cache_bytes=self.cache_bytes,
+                        reporters=[QuietReporter()] if reporters is None else reporters, release_inputs=True)
+
+    def map(self,
+            partitions: Union[Dict[str, Partition], Iterable[Tuple[str, Partition]]],
+            workers: int = None,
+            transport: Literal["arrow", "pickle"] = "arrow",
+            as_arrow: bool = False,
+            pending: int = None,
+            reporters: List[Reporter] = None,
+            fuse: bool = True,
+            fail_fast: bool = False,
+            order: Literal["declared", "cost"] = "declared",
+            memory: Literal[None, "tracemalloc", "rss"] = None) -> BatchResult:
+        """ runs the template on every partition, a partition per worker process
+            :param partitions: `{name: partition}` or iterable of `(name, partition)`, partitions are dataframes,
+                pyarrow tables or paths to csv/parquet files, which are read by workers. Iterables are consumed lazily
+            :param workers: number of worker processes, `None` or `1` - partitions run one by one in this process
+            :param transport: how frames reach workers: `arrow` - Arrow IPC stream in shared memory (needs pyarrow),
+                `pickle` - pickled by the pool
+            :param as_arrow: factories get `pyarrow.Table` over shared memory instead of `pd.DataFrame` converted from it
+            :param pending: max partitions submitted to the pool at once, bounds memory of shared blocks. Defaults to 2 * workers
+            :param reporters: receive results of every partition as it finishes, defaults to `ConsoleReporter`
+            :param fuse, fail_fast, order, memory: passed to `TestPipe.run` of every partition.
+                `fail_fast` only stops assertions within a partition
+            :returns: results of all partitions
+        """
+        global _FORKED_TEMPLATE
+        if transport not in TRANSPORTS: raise ValidationError(f"`transport` must be one of: {TRANSPORTS}")
+        if workers is not None and (not isinstance(workers, int) or workers < 1): raise ValidationError("`workers` must be positive int")
+        reporters = [ConsoleReporter()] if reporters is None else reporters
+        run_kwargs = dict(fuse=fuse, fail_fast=fail_fast, order=order, memory=memory)
+        items = partitions.items() if isinstance(partitions, dict) else partitions
+        results: Dict[str, PipeResult] = {}
+        start = time.perf_counter()
+
+        def collect(partition: str, result: PipeResult) -> None:
+            results[partition] = result
+            for reporter in reporters:
+                reporter.start(result.name, len(result))
+                for assertion_result in result.results:
+                    reporter.on_result(result.name, assertion_result)
+                reporter.finish(result)
+
+        names = []
+        def check_name(partition: str) -> None:
+            if partition in names: raise ValidationError(f"names of partitions must be unique, but got `{partition}` twice")
+            names.append(partition)
+
+        if workers is None or workers == 1:
+            for partition, data in items:
+                check_name(partition)
+                collect(partition, _run_partition(self, partition, data, run_kwargs))
+        else:
+            forked = "fork" in mp.get_all_start_methods()
+            context = mp.get_context("fork") if forked else None
+            pending = pending or 2 * workers
+            running: Dict[Future, Tuple[str, SharedMemory]] = {}
+            if forked:
+                _FORKED_TEMPLATE = self
+            try:
+                with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                    def drain(return_when: str) -> None:
+                        done, _ = wait(running, return_when=return_when)
+                        for future in done:
+                            partition, block = running.pop(future)
+                            if block is not None:
+                                block.close()
+                                block.unlink()
+                            collect(partition, future.result())
+
+                    for partition, data in items:
+                        check_name(partition)
+                        block = None
+                        if transport == "arrow" and not isinstance(data, (str, os.PathLike)):
+                            block, size = share(data)
+                            args = (partition, block.name, size, as_arrow, run_kwargs)
+                            future = (executor.submit(_forked_shared, *args) if forked
+                                      else executor.submit(_run_shared, self, *args))
+                        else:
+                            args = (partition, data, run_kwargs)
+                            future = (executor.submit(_forked_partition, *args) if forked
+                                      else executor.submit(_run_partition, self, *args))
+                        running[future] = (partition, block)
+                        del data
+                        if len(running) >= pending:
+                            drain(FIRST_COMPLETED)
+                    while running:
+                        drain(FIRST_COMPLETED)
+            finally:
+                for future, (partition, block) in running.items():
+                    future.cancel()
+                    if block is not None:
+                        block.close()
+                        block.unlink()
+                _FORKED_TEMPLATE = None
+
+        result = BatchResult(self.name, {partition: results[partition] for partition in names}, time.perf_counter() - start)
+        if any(isinstance(reporter, ConsoleReporter) for reporter in reporters):
+            print(result.summary())
+        return result
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}: {len(self.assertions)} assertions>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__} {self.name}: {len(self.assertions)} assertions"
@@ -0,0 +1,121 @@
+""" pipe-scoped cache of computations derived from pandas (or pyarrow/polars) objects """
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backends import get_backend
+
+
+def _version(obj: Any) -> Hashable:
+    """ cheap version of the object: pandas doesn't track mutations, so length and dtypes are used """
+    if isinstance(obj, pd.DataFrame):
+        return obj.shape, tuple(map(str, obj.dtypes))
+    if isinstance(obj, (pd.Series, pd.Index, np.ndarray)):
+        return len(obj), str(obj.dtype)
+    try:
+        return len(obj)
+    except TypeError:
+        return None
+
+
+def _sizeof(result: Any) -> int:
+    """ approximate memory size of the cached result in bytes """
+    if isinstance(result, (pd.Series, pd.Index)):
+        return int(result.memory_usage(deep=False))
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(deep=False).sum())
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    return sys.getsizeof(result)
+
+
+class ComputationCache:
+    """ LRU cache of derived results (isin masks, duplicated masks, value counts...) shared by assertions of a pipe.
+        Results are keyed by the operation and identity + version of the objects they derived from.
+        Objects are referenced by the cache while their results are stored, so their ids can't be reused.
+        Mutating the objects in place while the pipe is running is not detected.
+    """
+    def __init__(self, max_bytes: int = 256 * 2**20):
+        """
+        Parameters
+            :param max_bytes: memory budget of the cache in bytes, `0` disables caching
+        """
+        self.max_bytes = max_bytes
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[Any, Tuple, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, op: str, compute: Callable[[], Any], *objs: Any) -> Any:
+        """ returns result of `compute()` for the `op` on `objs`, computes it only if it is not cached yet """
+        key = (op, *((id(obj), _version(obj)) for obj in objs))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        result = compute()
+        size = _sizeof(result)
+        if size > self.max_bytes:
+            return result
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (result, objs, size)
+                self.n_bytes += size
+            while self.n_bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.n_bytes -= evicted_size
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.n_bytes = 0
+
+    def isin(self, column: pd.Series, values) -> pd.Series:
+        """ `column.isin(values)`, `values` may be a prebuilt `ValueSet`.
+            Series for pandas columns, boolean array for other backends
+        """
+        return self.get("isin", lambda: get_backend(column).isin(column, values), column, values)
+
+    def duplicated(self, column: pd.Series) -> pd.Series:
+        """ Series for pandas columns, boolean array for other backends """
+        return self.get("duplicated", lambda: get_backend(column).duplicated(column), column)
+
+    def value_counts(self, column: pd.Series, k: int = None) -> pd.Series:
+        """ `k` most frequent values with their counts """
+        return self.get(("value_counts", k), lambda: get_backend(column).value_counts(column, k), column)
+
+    def isna(self, obj: pd.Series) -> pd.Series:
+        return self.get("isna", obj.isna, obj)
+
+    def hash(self, obj: pd.Series) -> pd.Series:
+        """ 64-bit hash of every row, without index """
+        return self.get("hash", lambda: pd.util.hash_pandas_object(obj, index=False), obj)
+
+    def __getstate__(self):
+        # assertions pickled to worker processes take an empty cache with the same budget
+        return {"max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {len(self)} entries, {self.n_bytes}/{self.max_bytes} bytes>"
+
+
+# default cache of assertions ran outside of a pipe: computes everything and stores nothing
+NO_CACHE = ComputationCache(max_bytes=0)
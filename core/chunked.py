@@ -0,0 +1,482 @@
+""" chunk by chunk validation of files, which are larger than memory """
+
+import os
+import time
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from assertions.approx import ApproxHasNoDuplicatesAssertion
+from assertions.base import BaseAssertion
+from assertions.columns import HasNoDuplicatesAssertion, InColumnAssertion, LenIsAssertion
+from assertions.df import HasColumnsAssertion, ShapeIs
+from .cache import ComputationCache, NO_CACHE
+from .exceptions import ValidationError
+from .failure import FailureDetail, first_positions
+from .reporters import ConsoleReporter, Reporter
+from .results import PipeResult
+from .sketches import HyperLogLog
+from .sources import PARQUET_EXTENSIONS
+from .testpipe import TestPipe
+
+
+# builds assertion on the given chunk, e.g. `lambda df: InColumnAssertion(df["country"], codes)`
+AssertionFactory = Callable[[pd.DataFrame], BaseAssertion]
+
+
+def iter_chunks(source: Union[str, os.PathLike, pd.DataFrame, Iterable[pd.DataFrame]],
+                chunksize: int = 100_000,
+                columns: List[str] = None) -> Iterator[pd.DataFrame]:
+    """ yields dataframe chunks of the source
+        :param source: path to csv or parquet file, dataframe or iterable of dataframes
+        :param chunksize: number of rows in chunk
+        :param columns: read only these columns, defaults to all columns
+    """
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+    elif not isinstance(source, (str, os.PathLike)):
+        yield from source
+    elif str(source).lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(source, chunksize=chunksize, usecols=columns) as reader:
+            yield from reader
+
+
+def empty_chunk(source: Union[str, os.PathLike, pd.DataFrame, Iterable[pd.DataFrame]],
+                columns: List[str] = None) -> pd.DataFrame:
+    """ chunk of zero rows with columns of the source, which has no rows. Iterables of dataframes have no columns then """
+    if isinstance(source, pd.DataFrame):
+        return source.iloc[:0]
+    if not isinstance(source, (str, os.PathLike)):
+        raise ValidationError(f"`source` {source} has no chunks")
+    if str(source).lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(source)
+        return schema.empty_table().select(schema.names if columns is None else columns).to_pandas()
+    return pd.read_csv(source, nrows=0, usecols=columns)
+
+
+def chunk_hashes(column: pd.Series) -> np.ndarray:
+    """ 64-bit hashes of values, which don't depend on the dtype inferred for the chunk: a csv column may be int64
+        in one chunk and float64 (with missing values) in the next. Bools and integral floats are hashed as int64
+    """
+    dtype = column.dtype
+    if not isinstance(dtype, np.dtype) or dtype.kind not in "biuf":
+        return pd.util.hash_pandas_object(column, index=False).to_numpy()
+    values = column.to_numpy()
+    if dtype.kind != "f":
+        return pd.util.hash_array(values.astype(np.int64, copy=False))
+    hashes = pd.util.hash_array(values)
+    with np.errstate(invalid="ignore"):
+        integral = (values == np.floor(values)) & (np.abs(values) < 2**63)
+    hashes[integral] = pd.util.hash_array(values[integral].astype(np.int64))
+    return hashes
+
+
+def extend_unique(values: list, new_values: Iterable, limit: int) -> None:
+    """ extends `values` with unseen `new_values`, keeps at most `limit` values """
+    if len(values) >= limit:
+        return
+    values.extend(islice((v for v in new_values if v not in values), limit - len(values)))
+
+
+class SortedHashSet:
+    """ set of uint64 hashes stored as a few sorted arrays of growing size, which are merged like
+        a binary counter, so adding n hashes costs O(n log n) in total and memory is 8 bytes per hash
+    """
+    def __init__(self):
+        self.levels: List[np.ndarray] = []
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """ boolean mask of `hashes` which are in the set """
+        mask = np.zeros(len(hashes), dtype=bool)
+        for level in self.levels:
+            positions = np.searchsorted(level, hashes).clip(max=len(level) - 1)
+            mask |= level[positions] == hashes
+        return mask
+
+    def add(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = np.sort(hashes)
+        hashes = hashes[np.append(True, hashes[1:] != hashes[:-1])]
+        hashes = hashes[~self.contains(hashes)]
+        if not len(hashes):
+            return
+        while self.levels and len(self.levels[-1]) <= len(hashes):
+            # levels are sorted and disjoint: the stable sort merges two sorted runs in linear time
+            hashes = np.sort(np.concatenate([self.levels.pop(), hashes]), kind="stable")
+        self.levels.append(hashes)
+
+    def __len__(self):
+        return sum(len(level) for level in self.levels)
+
+
+class ChunkReducer:
+    """ merges results of the assertion ran chunk by chunk. Default reducer is for row-wise assertions:
+        assertion runs on every chunk and fails on the first failed chunk
+    """
+    def __init__(self):
+        self.assertion: BaseAssertion = None
+        self.n_chunks = 0
+        # reducer doesn't need more chunks, its result is known
+        self.done = False
+
+    def update(self, assertion: BaseAssertion) -> None:
+        self.assertion = assertion
+        self.n_chunks += 1
+        self.reduce(assertion)
+
+    def reduce(self, assertion: BaseAssertion) -> None:
+        if not assertion.run():
+            if assertion.failure is not None:
+                assertion.failure.message = f"chunk {self.n_chunks}: {assertion.failure.message}"
+            self.done = True
+
+    def finalize(self) -> bool:
+        """ sets final status on the last assertion """
+        if self.assertion.status == "failed":
+            return False
+        return self.assertion.set_passed()
+
+    def dump(self) -> Any:
+        """ summary of the last reduced chunk, which is persisted by incremental pipe.
+            `None` means the chunk is cheap to reduce again and isn't persisted
+        """
+        return self.assertion.status, self.assertion.failure
+
+    def load(self, assertion: BaseAssertion, summary: Any) -> bool:
+        """ reduces the chunk from its persisted summary without touching the data,
+            returns `False` if the chunk has to be reduced from the data
+        """
+        status, failure = summary
+        if status == "failed":
+            assertion.status = status
+            assertion.failure = failure
+            self.done = True
+        return True
+
+    def restore(self, assertion: BaseAssertion, summary: Any) -> bool:
+        if summary is None or not self.load(assertion, summary):
+            return False
+        self.assertion = assertion
+        self.n_chunks += 1
+        return True
+
+
+class FirstChunkReducer(ChunkReducer):
+    """ assertions on the metadata (e.g. columns), which is the same for all chunks """
+    def reduce(self, assertion: BaseAssertion) -> None:
+        assertion.run()
+        self.done = True
+
+    def dump(self) -> Any:
+        return None
+
+
+class LenIsReducer(ChunkReducer):
+    def __init__(self):
+        super().__init__()
+        self.length = 0
+
+    def reduce(self, assertion: LenIsAssertion) -> None:
+        assertion.validate()
+        self.length += len(assertion.column)
+
+    def dump(self) -> Any:
+        return len(self.assertion.column)
+
+    def load(self, assertion: BaseAssertion, summary: Any) -> bool:
+        self.length += summary
+        return True
+
+    def finalize(self) -> bool:
+        if self.length == self.assertion.length:
+            return self.assertion.set_passed()
+        return self.assertion.set_failed(f"Column: {self.length} has different length: {self.assertion.length}")
+
+
+class ShapeIsReducer(ChunkReducer):
+    def __init__(self):
+        super().__init__()
+        self.n_rows = 0
+
+    def reduce(self, assertion: ShapeIs) -> None:
+        assertion.validate()
+        self.n_rows += len(assertion.df)
+
+    def dump(self) -> Any:
+        return len(self.assertion.df)
+
+    def load(self, assertion: BaseAssertion, summary: Any) -> bool:
+        self.n_rows += summary
+        return True
+
+    def finalize(self) -> bool:
+        shape = (self.n_rows, self.assertion.df.shape[1])
+        expected = self.assertion.shape
+        if len(shape) == len(expected) and all(ax == exp_ax or exp_ax == -1 for ax, exp_ax in zip(shape, expected)):
+            return self.assertion.set_passed()
+        return self.assertion.set_failed(f"df: {shape} has different shape: {expected}")
+
+
+class InColumnReducer(ChunkReducer):
+    """ ORs hits of the chunks, done at the first hit """
+    max_values = 20
+
+    def __init__(self):
+        super().__init__()
+        self.values_not_in = []
+        self.chunk_values_not_in = []
+
+    def reduce(self, assertion: InColumnAssertion) -> None:
+        assertion.validate()
+        isin = assertion.cache.isin(assertion.column, assertion.values)
+        self.chunk_values_not_in = []
+        if isin.any():
+            self.done = True
+        else:
+            extend_unique(self.chunk_values_not_in, assertion.column.unique().tolist(), self.max_values + 1)
+            extend_unique(self.values_not_in, self.chunk_values_not_in, self.max_values + 1)
+
+    def dump(self) -> Any:
+        return self.done, self.chunk_values_not_in
+
+    def load(self, assertion: InColumnAssertion, summary: Any) -> bool:
+        found, values_not_in = summary
+        self.done = self.done or found
+        extend_unique(self.values_not_in, values_not_in, self.max_values + 1)
+        return True
+
+    def finalize(self) -> bool:
+        if self.done:
+            return self.assertion.set_passed()
+        values_not_in = ", ".join(map(str, self.values_not_in[:self.max_values]))
+        if len(self.values_not_in) > self.max_values:
+            values_not_in += ", ..."
+        return self.assertion.set_failed(f"Column does not contain values in list: '{values_not_in}'")
+
+
+class HasNoDuplicatesReducer(ChunkReducer):
+    """ keeps 64-bit hashes of seen values across chunks. Memory is 8 bytes per distinct value.
+        Repeated occurrences are failed rows, their positions are rows of the whole source
+    """
+    max_values = 20
+
+    def __init__(self):
+        super().__init__()
+        self.seen = SortedHashSet()
+        self.n_rows = 0
+        self.n_failed = 0
+        self.positions = []
+        self.values = []
+        # summary of the last chunk: hashes, rows, failed rows, their first positions in the chunk and values
+        self.chunk = None
+
+    def _merge(self, n_rows: int, n_failed: int, positions: List[int], values: list) -> None:
+        free = self.max_values - len(self.positions)
+        self.positions.extend(self.n_rows + position for position in positions[:free])
+        self.values.extend(values[:free])
+        self.n_rows += n_rows
+        self.n_failed += n_failed
+
+    def reduce(self, assertion: HasNoDuplicatesAssertion) -> None:
+        assertion.validate()
+        column = assertion.column
+        hashes = assertion.cache.get("chunk_hashes", lambda: chunk_hashes(column), column)
+        is_duplicated = self.seen.contains(hashes) | assertion.cache.duplicated(column).to_numpy()
+        positions = first_positions(is_duplicated, self.max_values).tolist()
+        self.chunk = (np.unique(hashes), len(column), int(is_duplicated.sum()), positions, column.iloc[positions].tolist())
+        self.seen.add(self.chunk[0])
+        self._merge(*self.chunk[1:])
+
+    def dump(self) -> Any:
+        return self.chunk
+
+    def load(self, assertion: HasNoDuplicatesAssertion, summary: Any) -> bool:
+        hashes, n_rows, n_failed, positions, values = summary
+        if self.seen.contains(hashes).any():
+            # positions of repeated occurrences are needed for the failure
+            return False
+        self.seen.add(hashes)
+        self._merge(n_rows, n_failed, positions, values)
+        return True
+
+    def finalize(self) -> bool:
+        if not self.n_failed:
+            return self.assertion.set_passed()
+        return self.assertion.set_failed(FailureDetail("Column contains duplicates", n_failed=self.n_failed,
+                                                       n_total=self.n_rows, positions=self.positions, values=self.values))
+
+
+class ApproxHasNoDuplicatesReducer(ChunkReducer):
+    """ merges HyperLogLog sketches of the chunks, memory doesn't grow with the number of distinct values.
+        Duplicates across chunks are only estimated, rows are not re-checked
+    """
+    def __init__(self):
+        super().__init__()
+        self.hll = None
+        self.chunk_hll = None
+        self.n_rows = 0
+
+    def _merge(self, hll: HyperLogLog, n_rows: int) -> None:
+        if self.hll is None:
+            self.hll = HyperLogLog(p=hll.p)
+        self.hll.merge(hll)
+        self.n_rows += n_rows
+
+    def reduce(self, assertion: ApproxHasNoDuplicatesAssertion) -> None:
+        assertion.validate()
+        self.chunk_hll = HyperLogLog(assertion.error)
+        column = assertion.column
+        for start in range(0, len(column), assertion.block_rows):
+            self.chunk_hll.add(chunk_hashes(column.iloc[start:start + assertion.block_rows]))
+        self._merge(self.chunk_hll, len(assertion.column))
+
+    def dump(self) -> Any:
+        return self.chunk_hll.to_bytes(), len(self.assertion.column)
+
+    def load(self, assertion: ApproxHasNoDuplicatesAssertion, summary: Any) -> bool:
+        sketch, n_rows = summary
+        self._merge(HyperLogLog.from_bytes(sketch), n_rows)
+        return True
+
+    def finalize(self) -> bool:
+        if self.hll is None:
+            return self.assertion.set_passed()
+        n_distinct = self.hll.estimate()
+        if n_distinct >= self.n_rows * (1 - 3 * self.hll.error):
+            return self.assertion.set_passed()
+        return self.assertion.set_failed(f"Column contains about {self.n_rows - n_distinct:.0f} duplicates (estimated)")
+
+
+REDUCERS: Dict[type, type] = {
+    LenIsAssertion: LenIsReducer,
+    ShapeIs: ShapeIsReducer,
+    HasColumnsAssertion: FirstChunkReducer,
+    InColumnAssertion: InColumnReducer,
+    HasNoDuplicatesAssertion: HasNoDuplicatesReducer,
+    ApproxHasNoDuplicatesAssertion: ApproxHasNoDuplicatesReducer,
+}
+
+
+def get_reducer(assertion: BaseAssertion) -> ChunkReducer:
+    """ reducer registered for the class of assertion or for its nearest base, defaults to row-wise `ChunkReducer` """
+    for cls in type(assertion).__mro__:
+        if cls in REDUCERS:
+            return REDUCERS[cls]()
+    return ChunkReducer()
+
+
+class ChunkedTestPipe(TestPipe):
+    """ Pipe of assertions, which are ran chunk by chunk on the file and merged.
+        Peak memory is bounded by the chunk size, except cross chunk state like seen values of duplicates check.
+    """
+    def __init__(self,
+                 name: str,
+                 source: Union[str, os.PathLike, pd.DataFrame, Iterable[pd.DataFrame]],
+                 assertions: List[AssertionFactory],
+                 chunksize: int = 100_000,
+                 columns: List[str] = None,
+                 cache_bytes: int = 256 * 2**20,
+                 reporters: List[Reporter] = None):
+        """
+        Parameters
+            :param name: name of the pipe
+            :param source: path to csv or parquet file, dataframe or iterable of dataframes
+            :param assertions: factories of assertions, which build assertion on the chunk: `lambda df: LenIsAssertion(df["id"], 100)`
+            :param chunksize: number of rows in chunk
+            :param columns: read only these columns, defaults to all columns
+            :param cache_bytes: memory budget of computations shared by assertions of the chunk
+            :param reporters: receive results after all chunks, defaults to `ConsoleReporter`
+        """
+        self.name = name
+        self.source = source
+        self.assertions = assertions
+        self.chunksize = chunksize
+        self.columns = columns
+        self.cache_bytes = cache_bytes
+        self.reporters = [ConsoleReporter()] if reporters is None else reporters
+        # assertions are built on chunks by every run, so chunks are released once reported
+        self.release_inputs = True
+        self.__validate()
+
+    def __validate(self):
+        for factory in self.assertions:
+            if not callable(factory):
+                raise ValidationError(f"Assertion must be callable, which builds assertion on the chunk, but got: `{type(factory)}`")
+        if not isinstance(self.chunksize, int) or self.chunksize < 1: raise ValidationError("`chunksize` must be positive int")
+        for reporter in self.reporters:
+            if not isinstance(reporter, Reporter):
+                raise ValidationError(f"Reporter must be instance of subclass `Reporter`, but got: `{type(reporter)}`")
+
+    def run(self) -> PipeResult:
+        """ reduces assertions chunk by chunk, results of merged assertions are passed to reporters
+            :returns: results of assertions, truthy if all of them passed
+        """
+        start = time.perf_counter()
+        reducers = [None] * len(self.assertions)
+        cache = ComputationCache(max_bytes=self.cache_bytes)
+        for position, chunk in self._chunks():
+            for i, factory in enumerate(self.assertions):
+                if reducers[i] is not None and reducers[i].done:
+                    continue
+                assertion = self._assertion(factory, chunk)
+                if reducers[i] is None:
+                    reducers[i] = get_reducer(assertion)
+                assertion.cache = cache
+                self._reduce(i, reducers[i], assertion)
+                assertion.cache = NO_CACHE
+            cache.clear()
+            if all(reducer.done for reducer in reducers):
+                break
+
+        if any(reducer is None for reducer in reducers):
+            # the source has no rows: assertions are reduced on zero rows with its columns
+            chunk = empty_chunk(self.source, self.columns)
+            for i, factory in enumerate(self.assertions):
+                assertion = self._assertion(factory, chunk)
+                reducers[i] = get_reducer(assertion)
+                assertion.cache = cache
+                reducers[i].update(assertion)
+                assertion.cache = NO_CACHE
+
+        self._end_run()
+        self._start_report([reducer.assertion for reducer in reducers])
+        for reducer in reducers:
+            reducer.finalize()
+            self._report(reducer.assertion)
+        return self._finish_report(time.perf_counter() - start)
+
+    @staticmethod
+    def _assertion(factory: AssertionFactory, chunk: pd.DataFrame) -> BaseAssertion:
+        assertion = factory(chunk)
+        if not isinstance(assertion, BaseAssertion):
+            raise ValidationError(f"Assertion must be instance of subclass `BaseAssertion`, but got: `{type(assertion)}`")
+        return assertion
+
+    def _chunks(self) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """ (position, chunk) of the source, assertions are reduced on every chunk """
+        return enumerate(iter_chunks(self.source, chunksize=self.chunksize, columns=self.columns))
+
+    def _reduce(self, i: int, reducer: ChunkReducer, assertion: BaseAssertion) -> None:
+        """ reduces assertion of the i-th factory on the current chunk """
+        reducer.update(assertion)
+
+    def _end_run(self) -> None:
+        """ called after all chunks are reduced """
+        pass
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}: {self.source}>"
+
+    def __str__(self):
+        return f"{self.__class__.__name__} {self.name}: {self.source}"
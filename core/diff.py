@@ -0,0 +1,240 @@
+""" keyed diff of two frames: rows are aligned on key columns, not by position. Keys are factorized into dense integer
+    codes by hash tables, rows are matched by lookup of the codes (hash join, no sorts) and changed columns are compared
+    in native dtypes. Large frames are diffed in partitions by key hash, so memory of codes, matches and compared
+    columns of pyarrow and polars frames, which are converted partition by partition, is bounded by a partition.
+    Key columns are converted and hashed whole
+"""
+
+from typing import Any, Dict, Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backends import get_backend
+from .equality import _differs, _values
+from .exceptions import ValidationError
+from .failure import FailureDetail, MAX_VALUES
+
+
+class KeyedDifference:
+    """ added, removed and changed rows of two frames aligned on keys """
+    __slots__ = ("keys", "n_rows1", "n_rows2", "n_added", "n_removed", "n_changed", "changed_columns",
+                 "columns1", "columns2", "duplicates1", "duplicates2", "samples", "rows1")
+
+    def __init__(self, keys: List[Hashable], n_rows1: int, n_rows2: int):
+        self.keys = keys
+        self.n_rows1 = n_rows1
+        self.n_rows2 = n_rows2
+        self.n_added = 0
+        self.n_removed = 0
+        self.n_changed = 0
+        # compared column -> number of changed rows
+        self.changed_columns: Dict[Hashable, int] = {}
+        # columns, which are only in df1/df2
+        self.columns1: List[Hashable] = []
+        self.columns2: List[Hashable] = []
+        # number of rows with repeated keys, which make rows ambiguous
+        self.duplicates1 = 0
+        self.duplicates2 = 0
+        # first keys of added, removed and changed rows
+        self.samples: Dict[str, List[Any]] = {"added": [], "removed": [], "changed": []}
+        # mask of df1 rows, which are removed or changed, if asked
+        self.rows1: np.ndarray = None
+
+    @property
+    def equal(self) -> bool:
+        return not (self.n_added or self.n_removed or self.n_changed or self.columns1 or self.columns2
+                    or self.duplicates1 or self.duplicates2)
+
+    def _sample(self, kind: str, keys: pd.DataFrame, positions: np.ndarray) -> None:
+        free = MAX_VALUES - len(self.samples[kind])
+        if free > 0 and len(positions):
+            rows = keys.iloc[positions[:free]]
+            values = rows.iloc[:, 0].tolist() if rows.shape[1] == 1 else list(rows.itertuples(index=False, name=None))
+            self.samples[kind].extend(values)
+
+    def to_failure(self, message: str) -> FailureDetail:
+        if self.duplicates1 or self.duplicates2:
+            return FailureDetail(f"{message}: keys {self.keys} aren't unique, {self.duplicates1} repeated in df1 "
+                                 f"and {self.duplicates2} in df2")
+        sample = {}
+        if self.columns1 or self.columns2:
+            sample["columns only in df1"] = self.columns1[:MAX_VALUES]
+            sample["columns only in df2"] = self.columns2[:MAX_VALUES]
+        sample.update({"added": self.n_added, "removed": self.n_removed, "changed": self.n_changed})
+        changed = sorted(self.changed_columns.items(), key=lambda item: -item[1])
+        sample["changed columns"] = dict(changed[:MAX_VALUES])
+        sample.update({f"{kind} keys": values for kind, values in self.samples.items() if values})
+        return FailureDetail(f"{message} by keys {self.keys}", n_failed=self.n_added + self.n_removed + self.n_changed,
+                             n_total=max(self.n_rows1, self.n_rows2), sample=sample)
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__} equal={self.equal} added={self.n_added} removed={self.n_removed} "
+                f"changed={self.n_changed}>")
+
+
+def _pandas(frame: Any, columns: List[Hashable], positions: np.ndarray = None) -> Dict[Hashable, pd.Series]:
+    """ pandas columns of the frame, pyarrow and polars frames convert only the needed columns of rows at `positions`
+        (all rows by default). Columns of pandas frames are never taken, they are returned whole
+    """
+    if isinstance(frame, pd.DataFrame):
+        return {column: frame[column] for column in columns}
+    frame = frame.select(columns)
+    if positions is not None:
+        frame = frame.take(positions) if hasattr(frame, "take") else frame[positions]
+    converted = frame.to_pandas()
+    return {column: converted[column] for column in columns}
+
+
+def _frame(names: List[Hashable], columns: List[pd.Series]) -> pd.DataFrame:
+    """ frame of the columns without alignment of their index """
+    return pd.DataFrame({name: _values(column) for name, column in zip(names, columns)}, copy=False)
+
+
+def key_codes(keys1: List[pd.Series], keys2: List[pd.Series]) -> Tuple[np.ndarray, np.ndarray, int]:
+    """ exact codes of the key tuples of both frames, equal keys have equal codes. Missing keys are equal too
+        :returns: int64 codes of both frames and number of distinct keys, codes are in `[0, n_keys)`
+    """
+    n1 = len(keys1[0])
+    codes, size = None, 1
+    for column1, column2 in zip(keys1, keys2):
+        # empty columns (e.g. of object dtype) don't take part in dtype of the concatenation
+        both = [column for column in (column1, column2) if len(column)] or [column1]
+        column, uniques = pd.factorize(pd.concat(both, ignore_index=True), use_na_sentinel=False)
+        column = column.astype(np.int64, copy=False)
+        if codes is None:
+            codes, size = column, len(uniques)
+            continue
+        if size * len(uniques) >= 2**62:
+            # combined codes would overflow: compress the previous columns to dense codes first
+            codes, compressed = pd.factorize(codes)
+            codes, size = codes.astype(np.int64, copy=False), len(compressed)
+        codes = codes * len(uniques) + column
+        size *= len(uniques)
+    if size > len(codes):
+        # combined codes of several columns are sparse, lookup tables need dense ones
+        codes, uniques = pd.factorize(codes)
+        codes, size = codes.astype(np.int64, copy=False), len(uniques)
+    return codes[:n1], codes[n1:], size
+
+
+def _lookup(codes: np.ndarray, n_keys: int) -> Tuple[np.ndarray, int]:
+    """ position of every key in the codes (-1 if absent) and number of rows, which repeat a key of another row """
+    lookup = np.full(n_keys, -1, dtype=np.int64)
+    lookup[codes] = np.arange(len(codes))
+    return lookup, len(codes) - int(np.count_nonzero(lookup >= 0))
+
+
+def _common_dtype(column1: pd.Series, column2: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """ key columns of both frames cast to a common dtype, so equal keys of different dtypes have equal hashes """
+    if column1.dtype == column2.dtype:
+        return column1, column2
+    # categories are hashed as values of their categories dtype
+    column1, column2 = (pd.Series(np.asarray(column.array)) if isinstance(column.dtype, pd.CategoricalDtype) else column
+                        for column in (column1, column2))
+    if column1.dtype == column2.dtype:
+        return column1, column2
+    if pd.api.types.is_numeric_dtype(column1.dtype) and pd.api.types.is_numeric_dtype(column2.dtype):
+        if isinstance(column1.dtype, np.dtype) and isinstance(column2.dtype, np.dtype):
+            dtype = np.result_type(column1.dtype, column2.dtype)
+        else:
+            # nullable dtypes, missing values become NaN
+            dtype = np.float64
+    else:
+        dtype = object
+    return column1.astype(dtype), column2.astype(dtype)
+
+
+def _partitions(keys1: List[pd.Series], keys2: List[pd.Series], n: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """ positions of rows of both frames by key hash, rows with equal keys are in the same partition """
+    if n == 1:
+        return [(np.arange(len(keys1[0])), np.arange(len(keys2[0])))]
+    keys1, keys2 = zip(*(_common_dtype(column1, column2) for column1, column2 in zip(keys1, keys2)))
+    parts = []
+    for keys in (keys1, keys2):
+        hashes = pd.util.hash_pandas_object(_frame(range(len(keys)), keys), index=False).to_numpy()
+        part = (hashes % np.uint64(n)).astype(np.intp)
+        # stable sort groups positions by partition in row order
+        order = np.argsort(part, kind="stable")
+        bounds = np.searchsorted(part[order], np.arange(n + 1))
+        parts.append([order[bounds[i]:bounds[i + 1]] for i in range(n)])
+    return list(zip(*parts))
+
+
+def diff_frames(df1: Any,
+                df2: Any,
+                keys: List[Hashable],
+                columns: List[Hashable] = None,
+                nan_equal: bool = True,
+                partitions: int = 1,
+                with_rows: bool = False) -> KeyedDifference:
+    """ compares rows of two frames (pandas, polars or pyarrow) with the same keys, whatever their order
+        :param keys: key columns, which must be unique in both frames
+        :param columns: compared columns, defaults to all columns besides keys, which must be the same in both frames
+        :param nan_equal: missing values of the same key are equal
+        :param partitions: number of key hash partitions diffed one by one, bounds memory of codes, matches and
+                           converted compared columns of pyarrow and polars frames
+        :param with_rows: set `rows1` - mask of df1 rows, which are removed or changed
+    """
+    if not keys: raise ValidationError("`keys` must be non-empty list of columns")
+    if not isinstance(partitions, int) or partitions < 1: raise ValidationError("`partitions` must be positive int")
+    backend1, backend2 = get_backend(df1), get_backend(df2)
+    names1, names2 = list(backend1.columns(df1)), list(backend2.columns(df2))
+    missing = [key for key in keys if key not in names1 or key not in names2]
+    if missing: raise ValidationError(f"key columns {missing} must be in both frames")
+
+    difference = KeyedDifference(list(keys), backend1.shape(df1)[0], backend2.shape(df2)[0])
+    if columns is None:
+        difference.columns1 = [column for column in names1 if column not in names2]
+        difference.columns2 = [column for column in names2 if column not in names1]
+        columns = [column for column in names1 if column in names2 and column not in keys]
+    else:
+        missing = [column for column in columns if column not in names1 or column not in names2]
+        if missing: raise ValidationError(f"compared columns {missing} must be in both frames")
+        columns = [column for column in columns if column not in keys]
+    keys1, keys2 = list(_pandas(df1, keys).values()), list(_pandas(df2, keys).values())
+    key_frame1, key_frame2 = _frame(keys, keys1), _frame(keys, keys2)
+    if with_rows:
+        difference.rows1 = np.zeros(difference.n_rows1, dtype=bool)
+
+    for positions1, positions2 in _partitions(keys1, keys2, partitions):
+        if partitions == 1:
+            codes1, codes2, n_keys = key_codes(keys1, keys2)
+        else:
+            codes1, codes2, n_keys = key_codes([key.iloc[positions1] for key in keys1], [key.iloc[positions2] for key in keys2])
+        lookup1, duplicates1 = _lookup(codes1, n_keys)
+        lookup2, duplicates2 = _lookup(codes2, n_keys)
+        difference.duplicates1 += duplicates1
+        difference.duplicates2 += duplicates2
+        if difference.duplicates1 or difference.duplicates2:
+            continue
+        # rows of df2 matching rows of df1, in row order of df1
+        found2 = lookup2[codes1]
+        matched = found2 >= 0
+        removed, added = positions1[~matched], positions2[lookup1[codes2] < 0]
+        del lookup1, lookup2
+        difference.n_removed += len(removed)
+        difference.n_added += len(added)
+        difference._sample("removed", key_frame1, removed)
+        difference._sample("added", key_frame2, added)
+
+        rows1, rows2 = positions1[matched], positions2[found2[matched]]
+        changed = np.zeros(len(rows1), dtype=bool)
+        # pandas columns are indexed by positions in the frame, converted ones by positions in the partition
+        data1 = _pandas(df1, columns, None if partitions == 1 else positions1)
+        data2 = _pandas(df2, columns, None if partitions == 1 else positions2)
+        at1 = rows1 if partitions == 1 or isinstance(df1, pd.DataFrame) else np.flatnonzero(matched)
+        at2 = rows2 if partitions == 1 or isinstance(df2, pd.DataFrame) else found2[matched]
+        for column in columns:
+            differs = _differs(_values(data1[column])[at1], _values(data2[column])[at2], nan_equal)
+            n_differs = int(differs.sum())
+            if n_differs:
+                difference.changed_columns[column] = difference.changed_columns.get(column, 0) + n_differs
+                changed |= differs
+        changed = rows1[changed]
+        difference.n_changed += len(changed)
+        difference._sample("changed", key_frame1, changed)
+        if with_rows:
+            difference.rows1[removed] = True
+            difference.rows1[changed] = True
+    return difference
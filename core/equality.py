@@ -0,0 +1,239 @@
+""" equality engine for Series and DataFrames: compares column by column in native dtypes, block by block """
+
+import hashlib
+from typing import Dict, Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .backends import get_backend
+from .cache import ComputationCache, NO_CACHE
+from .failure import FailureDetail, MAX_VALUES
+
+
+# 64K rows: both blocks and their mask stay in L2 cache
+BLOCK_ROWS = 2**16
+
+
+class Difference:
+    """ where two Series/DataFrames differ """
+    def __init__(self, reason: str = None):
+        # mismatch of shapes, columns or index, which makes values incomparable
+        self.reason = reason
+        # differing column -> (dtype1, dtype2)
+        self.dtypes: Dict[Hashable, Tuple] = {}
+        # differing column -> first differing row ranges [start, end)
+        self.columns: Dict[Hashable, List[Tuple[int, int]]] = {}
+
+    @property
+    def equal(self) -> bool:
+        return self.reason is None and not self.dtypes and not self.columns
+
+    def to_failure(self, message: str) -> FailureDetail:
+        if self.reason is not None:
+            return FailureDetail(f"{message}: {self.reason}")
+        differing = list(self.dtypes) + [column for column in self.columns if column not in self.dtypes]
+        sample = {column: f"dtypes: {dtypes}" for column, dtypes in self.dtypes.items()}
+        sample.update({column: f"rows: {ranges}" for column, ranges in self.columns.items()})
+        return FailureDetail(f"{message} in columns", n_failed=len(differing), values=differing[:MAX_VALUES],
+                             sample=dict(list(sample.items())[:MAX_VALUES]))
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} equal={self.equal}>"
+
+
+def hash_column(column: pd.Series, cache: ComputationCache = NO_CACHE) -> int:
+    """ order sensitive 64-bit hash of the column values (index is not hashed) """
+    def digest():
+        row_hashes = cache.hash(column).to_numpy()
+        return int.from_bytes(hashlib.blake2b(row_hashes.tobytes(), digest_size=8).digest(), "little")
+    return cache.get("digest", digest, column)
+
+
+def _values(column: pd.Series):
+    """ numpy view for numpy dtypes, extension array otherwise - no conversion to object """
+    return column.to_numpy() if isinstance(column.dtype, np.dtype) else column.array
+
+
+def _differs(values1, values2, nan_equal: bool) -> np.ndarray:
+    """ boolean mask of differing positions of two blocks """
+    if isinstance(values1, pd.Categorical) and isinstance(values2, pd.Categorical) and \
+            values1.categories.equals(values2.categories):
+        # same categories in the same order: compare codes, missing values have code -1
+        differs = values1.codes != values2.codes
+        return differs | (values1.codes == -1) if not nan_equal else differs
+    try:
+        differs = values1 != values2
+    except TypeError:
+        # e.g. categoricals with different categories
+        differs = np.asarray(values1, dtype=object) != np.asarray(values2, dtype=object)
+    if isinstance(differs, pd.api.extensions.ExtensionArray):
+        # missing values compare to NA
+        differs = differs.to_numpy(dtype=bool, na_value=True)
+    differs = np.asarray(differs, dtype=bool)
+    if nan_equal and differs.any():
+        # missing values are rare, check them only at differing positions
+        positions = np.flatnonzero(differs)
+        differs[positions] = ~(pd.isna(values1[positions]) & pd.isna(values2[positions]))
+    return differs
+
+
+def _ranges(mask: np.ndarray, offset: int) -> List[Tuple[int, int]]:
+    """ [start, end) ranges of True runs in the mask """
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    return [(int(start) + offset, int(end) + offset) for start, end in zip(edges[::2], edges[1::2])][:MAX_VALUES]
+
+
+def _compare_values(column1: pd.Series,
+                    column2: pd.Series,
+                    nan_equal: bool,
+                    use_hash: bool,
+                    block_rows: int,
+                    cache: ComputationCache) -> List[Tuple[int, int]]:
+    """ compares values of the same length columns, stops at the first differing block
+        :returns: differing row ranges of that block, empty list if columns are equal
+    """
+    if not isinstance(column1, pd.Series):
+        # pyarrow/polars kernels compare whole columns
+        differs = get_backend(column1).differs(column1, column2, nan_equal)
+        return _ranges(differs, 0) if differs.any() else []
+    if use_hash and nan_equal and column1.dtype == column2.dtype:
+        if hash_column(column1, cache) == hash_column(column2, cache):
+            return []
+    values1, values2 = _values(column1), _values(column2)
+    for start in range(0, len(values1), block_rows):
+        differs = _differs(values1[start:start + block_rows], values2[start:start + block_rows], nan_equal)
+        if differs.any():
+            return _ranges(differs, start)
+    return []
+
+
+def _series_pairs(column1: pd.Series,
+                  column2: pd.Series,
+                  check_dtype: bool,
+                  check_index: bool) -> Tuple[Difference, List[Tuple[Hashable, pd.Series, pd.Series]]]:
+    """ metadata checks of two Series (or columns of other backends)
+        :returns: difference of metadata and (name, column1, column2) pairs, which values have to be compared
+    """
+    backend = get_backend(column1)
+    if get_backend(column2) is not backend:
+        return Difference(f"different backends: {backend.name} and {get_backend(column2).name}"), []
+    if len(column1) != len(column2):
+        return Difference(f"different lengths: {len(column1)} and {len(column2)}"), []
+    # only pandas has index
+    if check_index and isinstance(column1, pd.Series) and not column1.index.equals(column2.index):
+        return Difference("different index"), []
+
+    difference = Difference()
+    name = getattr(column1, "name", None)
+    dtype1, dtype2 = backend.dtype(column1), backend.dtype(column2)
+    if check_dtype and dtype1 != dtype2:
+        difference.dtypes[name] = (dtype1, dtype2)
+        return difference, []
+    return difference, [(name, column1, column2)]
+
+
+def _frame_pairs(df1: pd.DataFrame,
+                 df2: pd.DataFrame,
+                 check_dtype: bool,
+                 check_index: bool,
+                 align_columns: bool) -> Tuple[Difference, List[Tuple[Hashable, pd.Series, pd.Series]]]:
+    """ metadata checks of two DataFrames (or frames of other backends)
+        :returns: difference of metadata and (name, column1, column2) pairs, which values have to be compared
+    """
+    backend = get_backend(df1)
+    if get_backend(df2) is not backend:
+        return Difference(f"different backends: {backend.name} and {get_backend(df2).name}"), []
+    shape1, shape2 = backend.shape(df1), backend.shape(df2)
+    if shape1 != shape2:
+        return Difference(f"different shapes: {shape1} and {shape2}"), []
+    columns1, columns2 = backend.columns(df1), backend.columns(df2)
+    unique = len(set(columns1)) == len(columns1) and len(set(columns2)) == len(columns2)
+    if align_columns and unique:
+        if set(columns1) != set(columns2):
+            return Difference("different columns"), []
+        positions2 = [columns2.index(column) for column in columns1]
+    elif list(columns1) == list(columns2):
+        positions2 = range(len(columns1))
+    else:
+        return Difference("different columns"), []
+    # only pandas has index
+    if check_index and isinstance(df1, pd.DataFrame) and not df1.index.equals(df2.index):
+        return Difference("different index"), []
+
+    difference = Difference()
+    pairs = []
+    for i, (column, j) in enumerate(zip(columns1, positions2)):
+        column1, column2 = backend.column(df1, i), backend.column(df2, j)
+        dtype1, dtype2 = backend.dtype(column1), backend.dtype(column2)
+        if check_dtype and dtype1 != dtype2:
+            difference.dtypes[column] = (dtype1, dtype2)
+        else:
+            pairs.append((column, column1, column2))
+    return difference, pairs
+
+
+def column_pairs(obj1, obj2, check_dtype: bool = True, check_index: bool = False, align_columns: bool = False):
+    """ metadata checks of two Series or DataFrames, see `_series_pairs` and `_frame_pairs` """
+    if get_backend(obj1).is_column(obj1):
+        return _series_pairs(obj1, obj2, check_dtype, check_index)
+    return _frame_pairs(obj1, obj2, check_dtype, check_index, align_columns)
+
+
+def differing_rows(pairs: List[Tuple[Hashable, pd.Series, pd.Series]], positions: np.ndarray, nan_equal: bool) -> np.ndarray:
+    """ boolean mask of rows at `positions`, which differ in any of the column pairs """
+    differs = np.zeros(len(positions), dtype=bool)
+    for _, column1, column2 in pairs:
+        if isinstance(column1, pd.Series):
+            differs |= _differs(_values(column1)[positions], _values(column2)[positions], nan_equal)
+        else:
+            backend = get_backend(column1)
+            differs |= backend.differs(backend.take(column1, positions), backend.take(column2, positions), nan_equal)
+    return differs
+
+
+def compare_series(column1: pd.Series,
+                   column2: pd.Series,
+                   check_dtype: bool = True,
+                   nan_equal: bool = True,
+                   check_index: bool = False,
+                   use_hash: bool = False,
+                   block_rows: int = BLOCK_ROWS,
+                   cache: ComputationCache = NO_CACHE) -> Difference:
+    """ compares values of two Series by position
+        :param check_dtype: different dtypes make columns different
+        :param nan_equal: missing values at the same position are equal
+        :param check_index: index must be equal too
+        :param use_hash: compare 64-bit hashes of columns first and scan values only if they differ.
+            Hashes are cached by the pipe, so it pays off when the same columns are compared repeatedly
+        :param block_rows: number of rows compared at once, comparison stops at the first differing block
+        :param cache: cache of row hashes
+    """
+    difference, pairs = _series_pairs(column1, column2, check_dtype, check_index)
+    for name, column1, column2 in pairs:
+        ranges = _compare_values(column1, column2, nan_equal, use_hash, block_rows, cache)
+        if ranges:
+            difference.columns[name] = ranges
+    return difference
+
+
+def compare_frames(df1: pd.DataFrame,
+                   df2: pd.DataFrame,
+                   check_dtype: bool = True,
+                   nan_equal: bool = True,
+                   check_index: bool = False,
+                   align_columns: bool = False,
+                   use_hash: bool = False,
+                   block_rows: int = BLOCK_ROWS,
+                   cache: ComputationCache = NO_CACHE) -> Difference:
+    """ compares two DataFrames column by column in native dtypes, without 2D copies of the frames.
+        Shape and columns are checked first. Every column is scanned until its first differing block,
+        so all differing columns are reported. See `compare_series` for the rest of parameters
+        :param align_columns: columns may be in different order, they are compared by name
+    """
+    difference, pairs = _frame_pairs(df1, df2, check_dtype, check_index, align_columns)
+    for column, column1, column2 in pairs:
+        ranges = _compare_values(column1, column2, nan_equal, use_hash, block_rows, cache)
+        if ranges:
+            difference.columns[column] = ranges
+    return difference
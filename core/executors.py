@@ -0,0 +1,130 @@
+""" executors for running assertions of a pipe sequentially or in a worker pool """
+
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, ProcessPoolExecutor, wait
+from typing import Callable, List, Dict, Literal
+
+from assertions.base import BaseAssertion
+from .exceptions import ValidationError
+
+
+BACKENDS = ("thread", "process")
+
+# called with every assertion as soon as it finished
+OnDone = Callable[[BaseAssertion], None]
+
+# assertions of the pipe in a worker process of the process backend, set once by the pool initializer
+_WORKER_ASSERTIONS: List[BaseAssertion] = None
+
+
+def get_outcome(assertion: BaseAssertion) -> Dict:
+    """ result state of the ran assertion, which has to be shipped back from a worker process """
+    outcome = {"status": assertion.status, "failure": assertion.failure, "metrics": assertion.metrics}
+    if hasattr(assertion, "estimate"):
+        # violation rate of sampled row-wise assertions
+        outcome["estimate"] = assertion.estimate
+    return outcome
+
+
+def set_outcome(assertion: BaseAssertion, outcome: Dict) -> None:
+    """ apply result state, received from a worker process, to the parent's assertion """
+    for attr, value in outcome.items():
+        setattr(assertion, attr, value)
+
+
+def _init_worker(assertions: List[BaseAssertion]) -> None:
+    global _WORKER_ASSERTIONS
+    _WORKER_ASSERTIONS = assertions
+
+
+def _run_in_worker(i: int) -> Dict:
+    assertion = _WORKER_ASSERTIONS[i]
+    assertion.run()
+    return get_outcome(assertion)
+
+
+def _done(assertion: BaseAssertion) -> None:
+    pass
+
+
+def run_sequential(assertions: List[BaseAssertion], fail_fast: bool = False, on_done: OnDone = _done) -> None:
+    for assertion in assertions:
+        passed = assertion.run()
+        on_done(assertion)
+        if not passed and fail_fast:
+            return
+
+
+def _submit_and_wait(submit: Callable[[int, BaseAssertion], Future],
+                     assertions: List[BaseAssertion],
+                     workers: int,
+                     fail_fast: bool,
+                     on_done: OnDone = _done) -> None:
+    """ submits assertions in declared order and waits for them as they complete. With `fail_fast` at most `workers`
+        assertions are submitted at once, so nothing new starts after the first failure: process pools can't cancel
+        submitted futures. Running assertions finish and are reported
+    """
+    window = workers if fail_fast else len(assertions)
+    pending = iter(enumerate(assertions))
+    running: Dict[Future, BaseAssertion] = {}
+    stopped = False
+    while True:
+        while not stopped and len(running) < window:
+            item = next(pending, None)
+            if item is None:
+                break
+            running[submit(*item)] = item[1]
+        if not running:
+            return
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            assertion = running.pop(future)
+            outcome = future.result()
+            if isinstance(outcome, dict):
+                set_outcome(assertion, outcome)
+            on_done(assertion)
+            stopped = stopped or (fail_fast and assertion.status == "failed")
+
+
+def run_threaded(assertions: List[BaseAssertion], workers: int, fail_fast: bool = False, on_done: OnDone = _done) -> None:
+    """ pandas/numpy kernels (isin, duplicated, equals...) release the GIL, so threads give real parallelism """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        _submit_and_wait(lambda i, assertion: executor.submit(assertion.run), assertions, workers, fail_fast, on_done)
+
+
+def run_processes(assertions: List[BaseAssertion], workers: int, fail_fast: bool = False, on_done: OnDone = _done) -> None:
+    """ runs assertions in worker processes, which get the assertions once by the pool initializer and only send
+        back outcomes. With `fork` start method workers inherit the assertions (and their frames) without copies,
+        otherwise (`spawn` on macOS/Windows) the assertions are pickled once per worker.
+    """
+    forked = "fork" in mp.get_all_start_methods()
+    if not forked and any(assertion.weak for assertion in assertions):
+        raise ValidationError("weakly held inputs can't be pickled to worker processes without `fork` start method, "
+                              "use `backend=\"thread\"`")
+    context = mp.get_context("fork") if forked else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(assertions,)) as executor:
+        _submit_and_wait(lambda i, assertion: executor.submit(_run_in_worker, i), assertions, workers, fail_fast, on_done)
+
+
+def run_assertions(assertions: List[BaseAssertion],
+                   workers: int = None,
+                   backend: Literal["thread", "process"] = "thread",
+                   fail_fast: bool = False,
+                   on_done: OnDone = _done) -> None:
+    """ run assertions with the given backend. Assertions keep their order, whatever the backend is
+        :param assertions: assertions to run
+        :param workers: number of workers, `None` or `1` means sequential run
+        :param backend: `thread` or `process` pool, defaults to `thread`
+        :param fail_fast: don't start the rest of assertions after the first failure, they are left without status
+        :param on_done: called with every assertion as soon as it finished, in the calling thread
+    """
+    if backend not in BACKENDS: raise ValidationError(f"`backend` must be one of: {BACKENDS}")
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValidationError("`workers` must be positive int")
+
+    if workers is None or workers == 1 or len(assertions) < 2:
+        run_sequential(assertions, fail_fast, on_done)
+    elif backend == "thread":
+        run_threaded(assertions, workers, fail_fast, on_done)
+    else:
+        run_processes(assertions, workers, fail_fast, on_done)
@@ -0,0 +1,86 @@
+""" structured details of failed assertions """
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# number of offending positions/values kept by failure details
+MAX_VALUES = 20
+
+
+def first_positions(mask: np.ndarray, k: int = MAX_VALUES, block_rows: int = 2**16) -> np.ndarray:
+    """ positions of the first `k` True values of the mask, scans the mask block by block to stay bounded """
+    mask = np.asarray(mask, dtype=bool)
+    positions = []
+    n_found = 0
+    for start in range(0, len(mask), block_rows):
+        block_positions = np.flatnonzero(mask[start:start + block_rows])[:k - n_found]
+        if len(block_positions):
+            positions.append(block_positions + start)
+            n_found += len(block_positions)
+        if n_found >= k:
+            break
+    return np.concatenate(positions) if positions else np.array([], dtype=np.intp)
+
+
+class FailureDetail:
+    """ bounded description of the failure: counts, first offending positions and values and a capped sample.
+        It is rendered to text only when asked, e.g. by the pipe output.
+    """
+    __slots__ = ("message", "n_failed", "n_total", "positions", "values", "sample")
+
+    def __init__(self,
+                 message: str,
+                 n_failed: int = None,
+                 n_total: int = None,
+                 positions: Sequence[int] = None,
+                 values: List[Any] = None,
+                 sample: Dict[Any, Any] = None):
+        """
+        Parameters
+            :param message: short description of the failure, without data
+            :param n_failed: number of offending rows/values
+            :param n_total: number of checked rows/values
+            :param positions: first offending positions
+            :param values: first offending values
+            :param sample: capped sample of extra details, e.g. counts of duplicated values
+        """
+        self.message = message
+        self.n_failed = n_failed
+        self.n_total = n_total
+        self.positions = positions
+        self.values = values
+        self.sample = sample
+
+    @classmethod
+    def from_mask(cls, message: str, mask, data: pd.Series = None, k: int = MAX_VALUES) -> "FailureDetail":
+        """ failure of rows, where `mask` is True. First `k` offending values are taken from `data` """
+        mask = np.asarray(mask, dtype=bool)
+        positions = first_positions(mask, k)
+        if data is None:
+            values = None
+        elif isinstance(data, pd.Series):
+            values = data.iloc[positions].tolist()
+        else:
+            from .backends import take_list
+            values = take_list(data, positions)
+        return cls(message, n_failed=int(mask.sum()), n_total=len(mask), positions=positions.tolist(), values=values)
+
+    def __str__(self):
+        text = self.message
+        if self.n_failed is not None:
+            text += f": {self.n_failed}" + (f"/{self.n_total}" if self.n_total is not None else "") + " failed"
+        truncated = self.n_failed is not None and self.positions is not None and self.n_failed > len(self.positions)
+        more = ", ..." if truncated else ""
+        if self.values is not None:
+            text += f", values: {self.values}{more}"
+        if self.positions is not None:
+            text += f", positions: {list(self.positions)}{more}"
+        if self.sample:
+            text += f"\n\t{self.sample}"
+        return text
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.message!r}, n_failed={self.n_failed}>"
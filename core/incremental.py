@@ -0,0 +1,392 @@
+""" incremental validation: only changed or new row blocks of the table are validated again """
+
+import base64
+import hashlib
+import io
+import json
+import os
+import sqlite3
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from assertions.base import BaseAssertion, is_data
+from .cache import NO_CACHE
+from .chunked import PARQUET_EXTENSIONS, AssertionFactory, ChunkReducer, ChunkedTestPipe, iter_chunks
+from .failure import FailureDetail
+from .reporters import ConsoleReporter, Reporter
+from .results import PipeResult
+from .valueset import ValueSet
+
+# attributes of assertions set by runs, they aren't parameters
+RUN_STATE = frozenset({"status", "failure", "error_message", "metrics", "memory_metrics", "estimate", "cache",
+                       "released", "weak", "hll", "cms"})
+
+
+def fingerprint(chunk: pd.DataFrame) -> str:
+    """ 128-bit fingerprint of columns, dtypes and values of the row block """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(chunk.columns), list(map(str, chunk.dtypes)))).encode())
+    digest.update(pd.util.hash_pandas_object(chunk, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def csv_blocks(file: BinaryIO, chunksize: int, digest: "hashlib._Hash") -> Iterator[list]:
+    """ [fingerprint, start, end, n_rows] of blocks of `chunksize` rows of the csv file from its current position.
+        Fingerprints are digests of bytes of the blocks, which continue `digest`. Quoted values may span lines,
+        empty lines aren't rows as in `pd.read_csv`
+    """
+    start = end = file.tell()
+    block, n_rows, quotes, empty = digest.copy(), 0, 0, True
+    for line in file:
+        end += len(line)
+        block.update(line)
+        quotes += line.count(b'"')
+        empty = empty and not line.strip(b"\r\n")
+        if quotes % 2:
+            continue
+        n_rows += not empty
+        quotes, empty = 0, True
+        if n_rows == chunksize:
+            yield [block.hexdigest(), start, end, n_rows]
+            start, block, n_rows = end, digest.copy(), 0
+    if n_rows:
+        yield [block.hexdigest(), start, end, n_rows]
+
+
+def _digest_value(digest: "hashlib._Hash", value: Any) -> None:
+    """ feeds the digest with type and content of the parameter """
+    digest.update(type(value).__qualname__.encode())
+    if isinstance(value, ValueSet):
+        digest.update(value.fingerprint().encode())
+    elif isinstance(value, (pd.Series, pd.Index, pd.DataFrame)):
+        digest.update(repr(getattr(value, "dtypes", getattr(value, "dtype", None))).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(value.dtype.str.encode())
+        digest.update(pd.util.hash_array(value.ravel()).tobytes())
+    elif is_data(value):
+        # pyarrow and polars data
+        _digest_value(digest, value.to_pandas())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        items = sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value
+        digest.update(str(len(items)).encode())
+        for item in items:
+            _digest_value(digest, item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _digest_value(digest, key)
+            _digest_value(digest, item)
+    elif callable(value) and hasattr(value, "__code__"):
+        digest.update(f"{value.__module__}.{value.__qualname__}".encode())
+        digest.update(value.__code__.co_code)
+        digest.update(repr(value.__code__.co_consts).encode())
+    else:
+        digest.update(repr(value).encode())
+
+
+def parameters_fingerprint(assertion: BaseAssertion, chunk: pd.DataFrame) -> str:
+    """ 128-bit fingerprint of the class and parameters of the assertion (values, length, options).
+        Columns and frames of the block are skipped, they are covered by the block fingerprint
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{type(assertion).__module__}.{type(assertion).__qualname__}".encode())
+    for name, value in sorted(vars(assertion).items()):
+        if name.startswith("_") or name in RUN_STATE:
+            continue
+        if isinstance(value, pd.DataFrame) and len(value) == len(chunk):
+            continue
+        if isinstance(value, pd.Series) and len(value) == len(chunk) and value.name in chunk.columns:
+            continue
+        digest.update(name.encode())
+        _digest_value(digest, value)
+    return digest.hexdigest()
+
+
+def _encode(value: Any) -> Any:
+    """ JSON-able form of the summary, tagged objects keep types of arrays, bytes, tuples and failures """
+    if isinstance(value, FailureDetail):
+        return {"__failure__": {slot: _encode(getattr(value, slot)) for slot in FailureDetail.__slots__}}
+    if isinstance(value, np.ndarray) and value.dtype.kind in "biuf":
+        return {"__array__": base64.b64encode(np.ascontiguousarray(value).tobytes()).decode(), "dtype": value.dtype.str}
+    if isinstance(value, np.ndarray):
+        return [_encode(item) for item in value.tolist()]
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode()}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(item) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, dict):
+        return {"__dict__": [[_encode(key), _encode(item)] for key, item in value.items()]}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if "__failure__" in value:
+        failure = FailureDetail.__new__(FailureDetail)
+        for slot, item in value["__failure__"].items():
+            setattr(failure, slot, _decode(item))
+        return failure
+    if "__array__" in value:
+        return np.frombuffer(base64.b64decode(value["__array__"]), dtype=np.dtype(value["dtype"])).copy()
+    if "__bytes__" in value:
+        return base64.b64decode(value["__bytes__"])
+    if "__tuple__" in value:
+        return tuple(_decode(item) for item in value["__tuple__"])
+    return {_decode(key): _decode(item) for key, item in value["__dict__"]}
+
+
+def dumps_summary(summary: Any) -> str:
+    return json.dumps(_encode(summary))
+
+
+def loads_summary(text: str) -> Any:
+    return _decode(json.loads(text))
+
+
+class StateStore:
+    """ sqlite file with fingerprints of row blocks and summaries of the assertions reduced on them.
+        Summaries are stored as JSON, so a state file can't run code when it is loaded
+    """
+    def __init__(self, path: Union[str, os.PathLike]):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS outcomes ("
+                                "pipe TEXT, assertion TEXT, position INTEGER, fingerprint TEXT, summary TEXT, "
+                                "PRIMARY KEY (pipe, assertion, position))")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS files ("
+                                "pipe TEXT PRIMARY KEY, stat TEXT, fingerprints TEXT)")
+
+    def load(self, pipe: str) -> Dict[Tuple[str, int], Tuple[str, Any]]:
+        """ {(assertion, position): (fingerprint, summary)} of the pipe, summaries which aren't JSON are skipped """
+        rows = self.connection.execute("SELECT assertion, position, fingerprint, summary FROM outcomes WHERE pipe = ?", (pipe,))
+        outcomes = {}
+        for assertion, position, block_fingerprint, summary in rows:
+            try:
+                outcomes[(assertion, position)] = (block_fingerprint, loads_summary(summary))
+            except (TypeError, ValueError, KeyError):
+                # e.g. pickled summaries of older versions, their blocks are reduced again
+                continue
+        return outcomes
+
+    def save(self, pipe: str, outcomes: Iterable[Tuple[str, int, str, Any]]) -> None:
+        """ saves (assertion, position, fingerprint, summary) outcomes. Summaries depend only on the block
+            content, so outcomes of removed blocks never match a wrong block and are just replaced later
+        """
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?)",
+                                        ((pipe, assertion, position, block_fingerprint, dumps_summary(summary))
+                                         for assertion, position, block_fingerprint, summary in outcomes))
+
+    def load_file(self, pipe: str) -> Tuple[Optional[list], Optional[List[list]]]:
+        """ stat of the source file and [fingerprint, start, end, n_rows] of its blocks by the last complete run """
+        row = self.connection.execute("SELECT stat, fingerprints FROM files WHERE pipe = ?", (pipe,)).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), json.loads(row[1])
+
+    def save_file(self, pipe: str, stat: list, blocks: List[list]) -> None:
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                                    (pipe, json.dumps(stat), json.dumps(blocks)))
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class IncrementalTestPipe(ChunkedTestPipe):
+    """ Pipe for append-mostly tables: the table is split into row blocks, and fingerprints of blocks with
+        summaries of assertions on them are persisted in a sqlite state file. Next runs restore results of
+        unchanged blocks from their summaries and run assertions only on changed or new blocks.
+        Cross-block checks keep compact summaries, e.g. `HasNoDuplicatesAssertion` keeps 64-bit hashes of block values.
+        Blocks of parquet files are fingerprinted by row group metadata and blocks of csv files by their bytes,
+        they are read only if some assertion has to run on them. Stored fingerprints and byte offsets of csv blocks
+        are reused for unchanged files (same size and mtime), files with appended rows are hashed from the end
+        of their last complete block. Blocks of dataframes are hashed.
+    """
+    def __init__(self,
+                 name: str,
+                 source: Union[str, os.PathLike, pd.DataFrame, Iterable[pd.DataFrame]],
+                 assertions: List[AssertionFactory],
+                 state: Union[str, os.PathLike],
+                 chunksize: int = 100_000,
+                 columns: List[str] = None,
+                 version: str = "",
+                 cache_bytes: int = 256 * 2**20,
+                 reporters: List[Reporter] = None):
+        """
+        Parameters
+            :param name: name of the pipe, state of the pipe is stored by its name
+            :param source: table as dataframe, path to csv or parquet file, or iterable of dataframes
+            :param assertions: factories of assertions, which build assertion on the block: `lambda df: LenIsAssertion(df["id"], 100)`
+            :param state: path to sqlite state file
+            :param chunksize: number of rows in block, changing it invalidates the state. Blocks of parquet files
+                              don't cross row groups
+            :param columns: read only these columns, defaults to all columns
+            :param version: version of assertions, change it to invalidate the state when code of assertions changes.
+                            Changed parameters of assertions (values, length, options) invalidate their results anyway
+            :param cache_bytes: memory budget of computations shared by assertions of the block
+            :param reporters: receive results after all blocks, defaults to `ConsoleReporter`
+        """
+        super().__init__(name, source, assertions, chunksize=chunksize, columns=columns, cache_bytes=cache_bytes,
+                         reporters=reporters)
+        self.state = state
+        self.version = version
+        self.n_restored = 0
+        self.n_reduced = 0
+        self.n_read = 0
+
+    def _key(self, i: int, assertion: BaseAssertion, chunk: pd.DataFrame) -> str:
+        return f"{self.version}|{i}|{assertion.name}|{parameters_fingerprint(assertion, chunk)}"
+
+    def run(self) -> PipeResult:
+        self.n_restored = self.n_reduced = self.n_read = 0
+        self._store = StateStore(self.state)
+        try:
+            self._stored = self._store.load(self.name)
+            self._outcomes = []
+            result = super().run()
+        finally:
+            self._store.close()
+        if any(isinstance(reporter, ConsoleReporter) for reporter in self.reporters):
+            print(f"Restored {self.n_restored}/{self.n_restored + self.n_reduced} block results from {self.state}, "
+                  f"read {self.n_read} blocks")
+        return result
+
+    def _chunks(self) -> Iterator[Tuple[int, pd.DataFrame]]:
+        """ yields blocks or empty placeholders of blocks with known fingerprints, which are read by `_block` """
+        self._file = None
+        if not isinstance(self.source, (str, os.PathLike)):
+            blocks = ((fingerprint(chunk), chunk, None) for chunk in iter_chunks(self.source, self.chunksize, self.columns))
+        elif str(self.source).lower().endswith(PARQUET_EXTENSIONS):
+            blocks = self._parquet_blocks()
+        else:
+            blocks = self._csv_blocks()
+        for position, (self._fingerprint, chunk, self._read) in enumerate(blocks):
+            # assertions are built on the yielded chunk, `_block` replaces placeholders with the data
+            self._position, self._chunk, self._yielded = position, chunk, chunk
+            yield position, chunk
+
+    def _parquet_blocks(self) -> Iterator[Tuple[str, pd.DataFrame, Callable[[], pd.DataFrame]]]:
+        """ fingerprints of parquet blocks by row group metadata: row count, offsets, sizes and statistics of columns """
+        import pyarrow.parquet as pq
+
+        file = pq.ParquetFile(self.source)
+        schema = file.schema_arrow
+        columns = schema.names if self.columns is None else self.columns
+        placeholder = schema.empty_table().select(columns).to_pandas()
+        # pandas metadata of the schema holds e.g. the range index, which changes with appended rows
+        types = repr([(name, str(schema.field(name).type)) for name in columns])
+        for group_index in range(file.metadata.num_row_groups):
+            group = file.metadata.row_group(group_index)
+            digest = hashlib.blake2b(digest_size=16)
+            digest.update(repr((types, group.num_rows, group.total_byte_size)).encode())
+            for column_index in range(group.num_columns):
+                column = group.column(column_index)
+                if column.path_in_schema.split(".")[0] not in columns:
+                    continue
+                statistics = column.statistics
+                digest.update(repr((column.path_in_schema, column.file_offset, column.data_page_offset,
+                                    column.total_compressed_size, column.total_uncompressed_size, column.num_values,
+                                    statistics.to_dict() if statistics is not None else None)).encode())
+            group_fingerprint = digest.hexdigest()
+            table = {}
+
+            def read(group_index=group_index, table=table, offset=0):
+                if "table" not in table:
+                    table["table"] = file.read_row_group(group_index, columns=columns)
+                return table["table"].slice(offset, self.chunksize).to_pandas()
+
+            for offset in range(0, group.num_rows, self.chunksize):
+                block_fingerprint = hashlib.blake2b(f"{group_fingerprint}|{offset}|{self.chunksize}".encode(),
+                                                    digest_size=16).hexdigest()
+                yield block_fingerprint, placeholder, lambda read=read, offset=offset: read(offset=offset)
+
+    def _csv_blocks(self) -> Iterator[Tuple[str, pd.DataFrame, Callable[[], pd.DataFrame]]]:
+        """ fingerprints of csv blocks by their bytes. Blocks of the stored state are reused, if the file didn't
+            change (same size and mtime) or rows were appended to it: the last complete stored block must be the same
+            then, and blocks after it are hashed. Blocks are read from their byte offsets
+        """
+        path = os.path.abspath(self.source)
+        status = os.stat(path)
+        stat = [path, status.st_size, status.st_mtime_ns, self.chunksize, self.columns]
+        stored_stat, blocks = self._store.load_file(self.name)
+        names = pd.read_csv(path, nrows=0).columns.tolist()
+        placeholder = pd.read_csv(path, nrows=0, usecols=self.columns)
+
+        def read(start: int, end: int) -> pd.DataFrame:
+            with open(path, "rb") as file:
+                file.seek(start)
+                data = file.read(end - start)
+            return pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=self.columns)
+
+        with open(path, "rb") as file:
+            header = file.readline()
+            while header.count(b'"') % 2 and header.endswith(b"\n"):
+                header += file.readline()
+            digest = hashlib.blake2b(repr((header, self.chunksize, self.columns)).encode(), digest_size=16)
+            if stored_stat != stat:
+                appended = (stored_stat is not None and stored_stat[0] == path and stored_stat[3:] == stat[3:]
+                            and status.st_size > stored_stat[1])
+                # rows appended to the file keep the stored blocks up to the last complete one, if it didn't change
+                if not appended:
+                    blocks = []
+                elif blocks and blocks[-1][3] < self.chunksize:
+                    blocks = blocks[:-1]
+                if blocks and not self._csv_block_unchanged(file, digest, blocks[-1]):
+                    blocks = []
+                file.seek(blocks[-1][2] if blocks else len(header))
+                blocks = blocks + list(csv_blocks(file, self.chunksize, digest))
+        for block_fingerprint, start, end, _ in blocks:
+            yield block_fingerprint, placeholder, lambda start=start, end=end: read(start, end)
+        # blocks are saved with the outcomes, runs stopped early hash the file again
+        self._file = stat, blocks
+
+    @staticmethod
+    def _csv_block_unchanged(file: BinaryIO, digest: "hashlib._Hash", block: list) -> bool:
+        """ the block has the stored fingerprint and ends with a complete line """
+        block_fingerprint, start, end, _ = block
+        file.seek(start)
+        data = file.read(end - start)
+        digest = digest.copy()
+        digest.update(data)
+        return data.endswith(b"\n") and digest.hexdigest() == block_fingerprint
+
+    def _block(self) -> pd.DataFrame:
+        """ data of the current block, placeholders are read once for all assertions """
+        if self._read is not None:
+            self._chunk, self._read = self._read(), None
+            self.n_read += 1
+        return self._chunk
+
+    def _reduce(self, i: int, reducer: ChunkReducer, assertion: BaseAssertion) -> None:
+        key = self._key(i, assertion, self._yielded)
+        stored_fingerprint, summary = self._stored.get((key, self._position), (None, None))
+        if stored_fingerprint == self._fingerprint and reducer.restore(assertion, summary):
+            self.n_restored += 1
+            return
+        if self._yielded is not self._block():
+            # assertion was built on the placeholder, it runs on the data of the block
+            cache, assertion = assertion.cache, self.assertions[i](self._chunk)
+            assertion.cache = cache
+        reducer.update(assertion)
+        assertion.cache = NO_CACHE
+        self.n_reduced += 1
+        summary = reducer.dump()
+        if summary is not None:
+            self._outcomes.append((key, self._position, self._fingerprint, summary))
+
+    def _end_run(self) -> None:
+        self._store.save(self.name, self._outcomes)
+        if self._file is not None:
+            self._store.save_file(self.name, *self._file)
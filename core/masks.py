@@ -0,0 +1,111 @@
+""" row-level violation masks packed into bitmaps: 1 bit per row. Masks of assertions are combined bytewise and
+    split frames into valid and invalid rows (quarantine)
+"""
+
+from typing import Any, Iterable, Literal, Tuple
+
+import numpy as np
+
+from .exceptions import ValidationError
+
+
+COMBINE = ("any", "all")
+
+
+def _popcount(bits: np.ndarray) -> int:
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+    return int(np.unpackbits(bits).sum(dtype=np.int64))
+
+
+class RowMask:
+    """ packed boolean mask of rows, bit `i` is set if row `i` violates the assertion """
+    __slots__ = ("bits", "n_rows")
+
+    def __init__(self, bits: np.ndarray, n_rows: int):
+        """
+        Parameters
+            :param bits: `uint8` array of `ceil(n_rows / 8)` bytes, little bit order, padding bits are zeros
+            :param n_rows: number of rows
+        """
+        self.bits = bits
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_bool(cls, mask: Any) -> "RowMask":
+        mask = np.asarray(mask, dtype=bool)
+        return cls(np.packbits(mask, bitorder="little"), len(mask))
+
+    @classmethod
+    def empty(cls, n_rows: int) -> "RowMask":
+        """ mask without violations """
+        return cls(np.zeros((n_rows + 7) // 8, dtype=np.uint8), n_rows)
+
+    def to_bool(self) -> np.ndarray:
+        return np.unpackbits(self.bits, count=self.n_rows, bitorder="little").view(bool)
+
+    def positions(self) -> np.ndarray:
+        """ positions of violating rows """
+        return np.flatnonzero(self.to_bool())
+
+    def count(self) -> int:
+        """ number of violating rows """
+        return _popcount(self.bits)
+
+    def any(self) -> bool:
+        return bool(self.bits.any())
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def _check(self, other: "RowMask") -> None:
+        if not isinstance(other, RowMask): raise ValidationError(f"can't combine RowMask with `{type(other)}`")
+        if self.n_rows != other.n_rows: raise ValidationError(f"masks have different numbers of rows: {self.n_rows} and {other.n_rows}")
+
+    def __or__(self, other: "RowMask") -> "RowMask":
+        self._check(other)
+        return RowMask(self.bits | other.bits, self.n_rows)
+
+    def __and__(self, other: "RowMask") -> "RowMask":
+        self._check(other)
+        return RowMask(self.bits & other.bits, self.n_rows)
+
+    def __invert__(self) -> "RowMask":
+        bits = ~self.bits
+        if self.n_rows % 8:
+            # keep padding bits zero
+            bits[-1] &= (1 << (self.n_rows % 8)) - 1
+        return RowMask(bits, self.n_rows)
+
+    def __len__(self):
+        return self.n_rows
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.count()}/{self.n_rows} rows>"
+
+
+def combine(masks: Iterable[RowMask], how: Literal["any", "all"] = "any") -> RowMask:
+    """ rows violating any (OR) or all (AND) of the masks, combined in place on a copy of the first mask """
+    if how not in COMBINE: raise ValidationError(f"`how` must be one of: {COMBINE}")
+    masks = iter(masks)
+    first = next(masks, None)
+    if first is None: raise ValidationError("no masks to combine")
+    bits = first.bits.copy()
+    for mask in masks:
+        first._check(mask)
+        if how == "any":
+            np.bitwise_or(bits, mask.bits, out=bits)
+        else:
+            np.bitwise_and(bits, mask.bits, out=bits)
+    return RowMask(bits, first.n_rows)
+
+
+def split(frame: Any, mask: RowMask) -> Tuple[Any, Any]:
+    """ valid and invalid rows of the frame (pandas, polars or pyarrow), every part is built by a single `take` """
+    from .backends import get_backend
+
+    if len(frame) != mask.n_rows: raise ValidationError(f"frame has {len(frame)} rows, but the mask has {mask.n_rows}")
+    invalid = mask.to_bool()
+    backend = get_backend(frame)
+    return backend.take(frame, np.flatnonzero(~invalid)), backend.take(frame, np.flatnonzero(invalid))
@@ -0,0 +1,223 @@
+""" instrumentation of assertions: wall time, CPU time and memory of every phase of the run, rows processed,
+    a slowest-first summary of the pipe and hooks, which push the numbers to other systems
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Literal, Optional, Union
+
+from .exceptions import ValidationError
+
+
+MEMORY_MODES = (None, "tracemalloc", "rss")
+PHASES = ("validate", "prepare_args", "assertion")
+# columns of the pipe table, fused scans are measured outside of assertions
+TABLE_PHASES = PHASES + ("fused_scan",)
+
+
+def _rss() -> int:
+    """ resident set size of the process in bytes """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        # not linux: max RSS so far, in kilobytes on linux and in bytes on macOS
+        import resource
+        import sys
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class PhaseMetrics:
+    """ measurement of a single phase """
+    __slots__ = ("wall", "cpu", "memory_bytes")
+
+    def __init__(self, wall: float = 0.0, cpu: float = 0.0, memory_bytes: int = None):
+        """
+        Parameters
+            :param wall: wall time in seconds
+            :param cpu: CPU time of the running thread in seconds
+            :param memory_bytes: peak allocation above the start of the phase (tracemalloc) or RSS growth (rss),
+                `None` if memory isn't measured
+        """
+        self.wall = wall
+        self.cpu = cpu
+        self.memory_bytes = memory_bytes
+
+    def add(self, other: "PhaseMetrics") -> None:
+        """ accumulates repeated phase """
+        self.wall += other.wall
+        self.cpu += other.cpu
+        if other.memory_bytes is not None:
+            self.memory_bytes = max(self.memory_bytes or 0, other.memory_bytes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"wall": self.wall, "cpu": self.cpu, "memory_bytes": self.memory_bytes}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} wall={self.wall * 1000:.3f}ms cpu={self.cpu * 1000:.3f}ms memory={self.memory_bytes}>"
+
+
+@contextmanager
+def measure(memory: Literal[None, "tracemalloc", "rss"] = None) -> Iterator[PhaseMetrics]:
+    """ measures the body of `with` block into the yielded `PhaseMetrics`
+        :param memory: `tracemalloc` - peak of Python/numpy allocations (slows allocations down, shared by
+            all threads), `rss` - growth of resident memory of the process, `None` - memory isn't measured
+    """
+    if memory not in MEMORY_MODES: raise ValidationError(f"`memory` must be one of: {MEMORY_MODES}")
+    metrics = PhaseMetrics()
+    started_tracing = memory == "tracemalloc" and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if memory == "tracemalloc":
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+    elif memory == "rss":
+        start_bytes = _rss()
+    start_wall, start_cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield metrics
+    finally:
+        metrics.wall = time.perf_counter() - start_wall
+        metrics.cpu = time.thread_time() - start_cpu
+        if memory == "tracemalloc":
+            metrics.memory_bytes = max(0, tracemalloc.get_traced_memory()[1] - start_bytes)
+            if started_tracing:
+                tracemalloc.stop()
+        elif memory == "rss":
+            metrics.memory_bytes = _rss() - start_bytes
+
+
+class AssertionMetrics:
+    """ metrics of the last run of an assertion, by phases: `validate`, `prepare_args`, `assertion`
+        (and `fused_scan` for assertions evaluated by a shared column scan)
+    """
+    __slots__ = ("name", "memory", "phases", "rows")
+
+    def __init__(self, name: str, memory: Literal[None, "tracemalloc", "rss"] = None):
+        """
+        Parameters
+            :param name: name of the assertion
+            :param memory: memory measurement mode, see `measure`
+        """
+        self.name = name
+        self.memory = memory
+        self.phases: Dict[str, PhaseMetrics] = {}
+        # rows checked by the assertion, `None` for metadata assertions
+        self.rows: int = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseMetrics]:
+        with measure(self.memory) as metrics:
+            yield metrics
+        self.add(name, metrics)
+
+    def add(self, name: str, metrics: PhaseMetrics) -> None:
+        if name in self.phases:
+            self.phases[name].add(metrics)
+        else:
+            self.phases[name] = PhaseMetrics(metrics.wall, metrics.cpu, metrics.memory_bytes)
+
+    @property
+    def wall(self) -> float:
+        return sum(phase.wall for phase in self.phases.values())
+
+    @property
+    def cpu(self) -> float:
+        return sum(phase.cpu for phase in self.phases.values())
+
+    @property
+    def memory_bytes(self) -> Optional[int]:
+        """ max of phases """
+        measured = [phase.memory_bytes for phase in self.phases.values() if phase.memory_bytes is not None]
+        return max(measured) if measured else None
+
+    @property
+    def rows_per_s(self) -> Optional[float]:
+        if self.rows is None or not self.wall:
+            return None
+        return self.rows / self.wall
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "wall": self.wall, "cpu": self.cpu, "memory_bytes": self.memory_bytes,
+                "rows": self.rows, "rows_per_s": self.rows_per_s,
+                "phases": {name: phase.to_dict() for name, phase in self.phases.items()}}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} wall={self.wall * 1000:.3f}ms rows={self.rows}>"
+
+
+class PipeMetrics:
+    """ metrics of all assertions of a pipe run """
+    def __init__(self, name: str, wall: float, assertions: List[Dict[str, Any]]):
+        """
+        Parameters
+            :param name: name of the pipe
+            :param wall: wall time of the whole run in seconds
+            :param assertions: `{"index", "name", "status", "metrics"}` of every assertion, in declared order
+        """
+        self.name = name
+        self.wall = wall
+        self.assertions = assertions
+
+    def slowest(self, k: int = None) -> List[Dict[str, Any]]:
+        """ measured assertions, the slowest first """
+        measured = [entry for entry in self.assertions if entry["metrics"] is not None]
+        return sorted(measured, key=lambda entry: -entry["metrics"].wall)[:k]
+
+    def table(self, k: int = None) -> str:
+        """ slowest-first table of `k` assertions, all by default """
+        header = (f"{'#':>4} {'assertion':<28} {'status':<7} {'wall ms':>10} {'cpu ms':>10} "
+                  + " ".join(f"{phase + ' ms':>15}" for phase in TABLE_PHASES)
+                  + f" {'memory MiB':>10} {'rows':>12} {'rows/s':>14}")
+        lines = [header]
+        for entry in self.slowest(k):
+            metrics: AssertionMetrics = entry["metrics"]
+            phases = " ".join(f"{metrics.phases[phase].wall * 1000 if phase in metrics.phases else 0:>15.3f}" for phase in TABLE_PHASES)
+            memory = f"{metrics.memory_bytes / 2**20:>10.2f}" if metrics.memory_bytes is not None else f"{'-':>10}"
+            rows = f"{metrics.rows:>12,}" if metrics.rows is not None else f"{'-':>12}"
+            rate = f"{metrics.rows_per_s:>14,.0f}" if metrics.rows_per_s is not None else f"{'-':>14}"
+            lines.append(f"{entry['index']:>4} {entry['name'][:28]:<28} {str(entry['status']):<7} "
+                         f"{metrics.wall * 1000:>10.3f} {metrics.cpu * 1000:>10.3f} {phases} {memory} {rows} {rate}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"pipe": self.name, "wall": self.wall,
+                "assertions": [{"index": entry["index"], "name": entry["name"], "status": entry["status"],
+                                **(entry["metrics"].to_dict() if entry["metrics"] is not None else {})}
+                               for entry in self.assertions]}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name} wall={self.wall * 1000:.3f}ms, {len(self.assertions)} assertions>"
+
+
+class MetricsHook:
+    """ receives metrics after the pipe run, e.g. to push them to a metrics system.
+        Override the methods you need, both do nothing by default
+    """
+    def on_assertion(self, index: int, assertion: Any, metrics: AssertionMetrics) -> None:
+        """ called for every measured assertion in declared order """
+        pass
+
+    def on_pipe(self, metrics: PipeMetrics) -> None:
+        """ called once after all assertions """
+        pass
+
+
+class JsonMetricsExporter(MetricsHook):
+    """ writes pipe metrics to a JSON file with stable key order, so files of different runs can be diffed """
+    def __init__(self, path: Union[str, os.PathLike], indent: int = 1):
+        """
+        Parameters
+            :param path: path of JSON file, it is overwritten by every run
+            :param indent: indent of JSON
+        """
+        self.path = path
+        self.indent = indent
+
+    def on_pipe(self, metrics: PipeMetrics) -> None:
+        with open(self.path, "w") as file:
+            json.dump(metrics.to_dict(), file, indent=self.indent, sort_keys=True)
@@ -0,0 +1,152 @@
+""" planner, which fuses column assertions of a pipe into a single blocked scan per column """
+
+from contextlib import ExitStack
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from assertions.base import BaseAssertion
+from assertions.columns import InColumnAssertion, NotInColumnAssertion
+from .metrics import AssertionMetrics, measure
+from .valueset import ValueSet
+
+
+# assertions, which are decided by the first row of the column found in `values`
+FUSABLE = (InColumnAssertion, NotInColumnAssertion)
+
+# 64K rows: a block of 8-byte values and its mask stay in L2 cache while all assertions scan it
+BLOCK_ROWS = 2**16
+MAX_VALUE_SETS = 64
+
+
+class ColumnScan:
+    """ evaluates isin based assertions on the same column in one pass over blocks of the column.
+        `values` of all assertions are merged into a single lookup table, where every entry keeps bit flags
+        of the value sets it belongs to. So each block is probed once for all assertions into a single reused
+        buffer. Scan stops as soon as verdicts of all assertions are known.
+    """
+    def __init__(self,
+                 column: pd.Series,
+                 assertions: List[BaseAssertion],
+                 block_rows: int = BLOCK_ROWS,
+                 lookups: Dict[Tuple[int, ...], Tuple] = None):
+        """
+        Parameters
+            :param column: scanned column
+            :param assertions: assertions on the column
+            :param block_rows: number of rows probed at once
+            :param lookups: lookups shared by scans of the same value sets on other columns
+        """
+        self.column = column
+        self.assertions = assertions
+        self.block_rows = block_rows
+        self.lookups = lookups if lookups is not None else {}
+
+    def build_lookup(self) -> Tuple[pd.Index, np.ndarray, List[int]]:
+        """ returns union of all value sets, bit flags of its entries and ids of the value sets by bit """
+        value_sets = list({id(a.values): a.values for a in self.assertions}.items())
+        keys = [key for key, _ in value_sets]
+        if tuple(keys) in self.lookups:
+            return self.lookups[tuple(keys)]
+        # hash table of a `ValueSet` is reused as is
+        uniques = [values.to_index() if isinstance(values, ValueSet) else pd.Index(values).unique() for _, values in value_sets]
+        lookup = uniques[0].append(uniques[1:]).unique() if len(uniques) > 1 else uniques[0]
+        # last flag is for rows, which aren't in lookup: get_indexer returns -1 for them
+        flags = np.zeros(len(lookup) + 1, dtype=np.uint64)
+        if len(uniques) == 1:
+            flags[:-1] = 1
+        else:
+            for bit, values in enumerate(uniques):
+                flags[lookup.get_indexer(values)] |= np.uint64(1 << bit)
+        self.lookups[tuple(keys)] = lookup, flags, keys
+        return lookup, flags, keys
+
+    def scan(self) -> Dict[int, bool]:
+        """ returns {id(values): values found in the column} """
+        lookup, flags, keys = self.build_lookup()
+        all_found = np.uint64((1 << len(keys)) - 1)
+        found = np.uint64(0)
+        data = self.column.to_numpy()  # view for numpy dtypes
+        buffer = np.empty(min(self.block_rows, len(data)), dtype=np.uint64)
+        for start in range(0, len(data), self.block_rows):
+            block = data[start:start + self.block_rows]
+            block_flags = buffer[:len(block)]
+            np.take(flags, lookup.get_indexer(block), out=block_flags)
+            found |= np.bitwise_or.reduce(block_flags)
+            if found == all_found:
+                break
+        return {key: bool(found & np.uint64(1 << bit)) for bit, key in enumerate(keys)}
+
+    def run(self) -> None:
+        memory = self.assertions[0].memory_metrics
+        with ExitStack() as stack:
+            # weakly held inputs are resolved for the scan and failure messages of its assertions
+            for assertion in self.assertions:
+                stack.enter_context(assertion._strong_inputs())
+            with measure(memory) as scan_metrics:
+                found = self.scan()
+            for assertion in self.assertions:
+                # the scan is shared, every assertion of the scan reports all of it
+                assertion.metrics = AssertionMetrics(assertion.name, memory)
+                assertion.metrics.add("fused_scan", scan_metrics)
+                assertion.metrics.rows = len(self.column)
+                passed = found[id(assertion.values)] == isinstance(assertion, InColumnAssertion)
+                if passed:
+                    assertion.set_passed()
+                else:
+                    # failures are rare, let assertion build its own message
+                    with assertion.metrics.phase("assertion"):
+                        assertion.assertion()
+
+
+def _same_lookup_dtype(column: pd.Series, values: pd.Index) -> bool:
+    """ `get_indexer` of the values finds the same rows as `column.isin(values)`: dtypes are equal or both are
+        int/uint/float. `isin` coerces other pairs, e.g. bool column and int values or dates and strings
+    """
+    return values.dtype == column.dtype or (values.dtype.kind in "iuf" and column.dtype.kind in "iuf")
+
+
+def is_fusable(assertion: BaseAssertion) -> bool:
+    """ only exact classes are fused, subclasses may override `assertion`. Sampled assertions don't scan the column,
+        memory-mapped value sets are probed by themselves to not load them into memory.
+        Only pandas columns are fused, pyarrow/polars columns use their own kernels
+    """
+    if type(assertion) not in FUSABLE or not isinstance(assertion.column, pd.Series):
+        return False
+    if not isinstance(assertion.column.dtype, np.dtype) or getattr(assertion, "sample", None) is not None:
+        return False
+    values = assertion.values
+    if isinstance(values, ValueSet):
+        return values.index is not None and _same_lookup_dtype(assertion.column, values.index)
+    return _same_lookup_dtype(assertion.column, pd.Index(values))
+
+
+def plan_column_scans(assertions: List[BaseAssertion],
+                      block_rows: int = BLOCK_ROWS) -> Tuple[List[ColumnScan], List[BaseAssertion]]:
+    """ groups fusable assertions by their target column
+        :returns: column scans and the rest of assertions, which have to be ran one by one
+    """
+    groups: Dict[int, Tuple[pd.Series, List[BaseAssertion]]] = {}
+    rest = []
+    for assertion in assertions:
+        if type(assertion) not in FUSABLE:
+            rest.append(assertion)
+            continue
+        with assertion._strong_inputs():
+            assertion.validate()
+            assertion.prepare_args()
+            if is_fusable(assertion):
+                # the scan keeps the column of weakly held assertions only while the stage runs
+                groups.setdefault(id(assertion.column), (assertion.column, []))[1].append(assertion)
+            else:
+                rest.append(assertion)
+
+    scans = []
+    # columns checked against the same value sets share their lookup
+    lookups = {}
+    for column, group in groups.values():
+        # bit flags of a lookup entry fit up to 64 distinct value sets
+        for start in range(0, len(group), MAX_VALUE_SETS):
+            scans.append(ColumnScan(column, group[start:start + MAX_VALUE_SETS], block_rows=block_rows, lookups=lookups))
+    return scans, rest
@@ -0,0 +1,156 @@
+""" reporters of pipe runs: colored console output, JSON Lines and JUnit XML files, or nothing at all.
+    Results are reported as soon as assertions finish, so output size and memory don't depend on the data
+"""
+
+import html
+import json
+import os
+import shutil
+from typing import Union
+
+from .results import AssertionResult, PipeResult
+
+
+class Reporter:
+    """ receives results of the pipe run. Override the methods you need, all of them do nothing by default """
+    def start(self, pipe: str, n_assertions: int) -> None:
+        """ called before assertions run """
+        pass
+
+    def on_result(self, pipe: str, result: AssertionResult) -> None:
+        """ called as soon as the assertion finished, assertions of parallel runs are reported in declared order,
+            as soon as the assertions before them are reported. Skipped assertions are reported after the run
+        """
+        pass
+
+    def finish(self, result: PipeResult) -> None:
+        """ called once after all assertions """
+        pass
+
+
+class QuietReporter(Reporter):
+    """ reports nothing, the pipe only returns `PipeResult` """
+    pass
+
+
+class ConsoleReporter(Reporter):
+    """ colored text to stdout, colorama is imported by the first output """
+    def start(self, pipe: str, n_assertions: int) -> None:
+        print(f"[{pipe}]: Running assertions")
+
+    def on_result(self, pipe: str, result: AssertionResult) -> None:
+        import colorama
+
+        if result.status == "passed":
+            print(colorama.Fore.GREEN + f"\t{result.index}|{result.name}|: [{result.status}]" + (f" ({result.estimate})" if result.estimate else ""))
+        elif result.status == "skipped":
+            print(colorama.Fore.YELLOW + f"\t{result.index}|{result.name}|: [{result.status}] -> {result.message}")
+        else:
+            print(colorama.Fore.RED + f"\t{result.index}|{result.name}|: [{result.status}] -> {result.message}")
+
+    def finish(self, result: PipeResult) -> None:
+        import colorama
+
+        n_passed, n_all = result.n_passed, len(result)
+        if n_passed == n_all:
+            color = colorama.Fore.GREEN
+        elif n_passed > n_all - n_passed:
+            color = colorama.Fore.YELLOW
+        else:
+            color = colorama.Fore.RED
+        print(color + f"Successfully ran [{n_passed}/{n_all}] assertions")
+        print(colorama.Style.RESET_ALL + "Done")
+
+
+class JsonLinesReporter(Reporter):
+    """ one JSON object per line: `{"type": "assertion", "pipe", "index", "name", "status", "message", "estimate", "wall"}`
+        for every assertion and `{"type": "pipe", "pipe", "wall", "passed", "failed", "skipped", "total"}` after the run.
+        Lines are flushed as they are written, so the file can be tailed by a scheduler
+    """
+    def __init__(self, path: Union[str, os.PathLike], append: bool = False):
+        """
+        Parameters
+            :param path: path of the file
+            :param append: keep lines of the existing file, otherwise the file is truncated by the first run of the reporter.
+                Next runs of the same reporter (e.g. pipes of `AsyncTestPipe`) always append
+        """
+        self.path = path
+        self.append = append
+        self._file = None
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, default=str) + "\n")
+        self._file.flush()
+
+    def start(self, pipe: str, n_assertions: int) -> None:
+        self._file = open(self.path, "a" if self.append else "w")
+        self.append = True
+
+    def on_result(self, pipe: str, result: AssertionResult) -> None:
+        self._write({"type": "assertion", "pipe": pipe, **result.to_dict()})
+
+    def finish(self, result: PipeResult) -> None:
+        try:
+            self._write({"type": "pipe", **result.to_dict()})
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _attr(value: str) -> str:
+    """ quoted XML attribute, `xml.sax.saxutils` isn't used as it imports `urllib.request` """
+    return '"' + html.escape(value, quote=True).replace("\n", "&#10;").replace("\t", "&#9;") + '"'
+
+
+class JUnitReporter(Reporter):
+    """ JUnit XML file, understood by CI systems: every pipe is a `testsuite`, every assertion is a `testcase`.
+        Test cases are streamed to `<path>.part` during the run, the suite is appended to the file after the run,
+        so the file is a valid document between runs
+    """
+    _CLOSING = "</testsuites>\n"
+
+    def __init__(self, path: Union[str, os.PathLike], append: bool = False):
+        """
+        Parameters
+            :param path: path of the file
+            :param append: add suites to the existing file written by this reporter, otherwise the file is
+                overwritten by the first run of the reporter. Next runs of the same reporter always append
+        """
+        self.path = path
+        self.append = append
+        self._part = None
+
+    def start(self, pipe: str, n_assertions: int) -> None:
+        self._part = open(f"{self.path}.part", "w+")
+
+    def on_result(self, pipe: str, result: AssertionResult) -> None:
+        wall = f' time="{result.wall:.6f}"' if result.wall is not None else ""
+        case = f'  <testcase classname={_attr(pipe)} name={_attr(f"{result.index}|{result.name}")}{wall}'
+        if result.status == "passed":
+            case += "/>\n"
+        elif result.status == "skipped":
+            case += f">\n   <skipped message={_attr(result.message or '')}/>\n  </testcase>\n"
+        else:
+            case += f">\n   <failure message={_attr(result.message or '')}/>\n  </testcase>\n"
+        self._part.write(case)
+
+    def finish(self, result: PipeResult) -> None:
+        try:
+            if self.append and os.path.exists(self.path):
+                file = open(self.path, "r+")
+                file.seek(max(0, os.path.getsize(self.path) - len(self._CLOSING)))
+                file.truncate()
+            else:
+                file = open(self.path, "w")
+                file.write('<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+            with file:
+                file.write(f' <testsuite name={_attr(result.name)} tests="{len(result)}" failures="{result.n_failed}" '
+                           f'errors="0" skipped="{result.n_skipped}" time="{result.wall:.6f}">\n')
+                self._part.seek(0)
+                shutil.copyfileobj(self._part, file)
+                file.write(" </testsuite>\n" + self._CLOSING)
+        finally:
+            self._part.close()
+            self._part = None
+            os.remove(f"{self.path}.part")
+            self.append = True
@@ -0,0 +1,176 @@
+""" compact results of pipe runs: statuses and rendered failures only, no references to assertions or their data """
+
+from typing import Any, Dict, List, Literal, Tuple
+
+from .exceptions import ValidationError
+from .failure import FailureDetail
+from .masks import RowMask, combine, split
+from .metrics import AssertionMetrics, PipeMetrics
+
+
+class AssertionResult:
+    """ result of a single assertion of the pipe, kept apart from the assertion and its data """
+    __slots__ = ("index", "name", "status", "failure", "estimate", "metrics", "mask")
+
+    def __init__(self,
+                 index: int,
+                 name: str,
+                 status: Literal["passed", "failed", "skipped"],
+                 failure: FailureDetail = None,
+                 estimate: str = None,
+                 metrics: AssertionMetrics = None,
+                 mask: RowMask = None):
+        """
+        Parameters
+            :param index: 1-based position of the assertion in the pipe
+            :param name: name of the assertion
+            :param status: `passed`, `failed` or `skipped`
+            :param failure: bounded detail of the failure or reason of skip
+            :param estimate: violation rate estimate of sampled assertions
+            :param metrics: metrics of the run, `None` if the assertion didn't run
+            :param mask: packed mask of violating rows, if the pipe collected row masks and the assertion is row-level
+        """
+        self.index = index
+        self.name = name
+        self.status = status
+        self.failure = failure
+        self.estimate = estimate
+        self.metrics = metrics
+        self.mask = mask
+
+    @classmethod
+    def from_assertion(cls, index: int, assertion: Any, mask: RowMask = None) -> "AssertionResult":
+        estimate = getattr(assertion, "estimate", None)
+        return cls(index, assertion.name, assertion.status, assertion.failure,
+                   str(estimate) if estimate is not None else None, assertion.metrics, mask)
+
+    @property
+    def message(self) -> str:
+        """ text of the failure """
+        return None if self.failure is None else str(self.failure)
+
+    @property
+    def wall(self) -> float:
+        """ wall time of the assertion in seconds, `None` if it didn't run """
+        return None if self.metrics is None else self.metrics.wall
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"index": self.index, "name": self.name, "status": self.status, "message": self.message,
+                "estimate": self.estimate, "wall": self.wall}
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.index}|{self.name}|: {self.status}>"
+
+
+class PipeResult:
+    """ result of the pipe run, returned by `run`. It is truthy if all assertions passed """
+    __slots__ = ("name", "results", "wall", "metrics")
+
+    def __init__(self, name: str, results: List[AssertionResult], wall: float, metrics: PipeMetrics = None):
+        """
+        Parameters
+            :param name: name of the pipe
+            :param results: results of assertions in declared order
+            :param wall: wall time of the run in seconds
+            :param metrics: metrics of the run, if the pipe measures them
+        """
+        self.name = name
+        self.results = results
+        self.wall = wall
+        self.metrics = metrics
+
+    def count(self, status: Literal["passed", "failed", "skipped"]) -> int:
+        return sum(result.status == status for result in self.results)
+
+    @property
+    def n_passed(self) -> int:
+        return self.count("passed")
+
+    @property
+    def n_failed(self) -> int:
+        return self.count("failed")
+
+    @property
+    def n_skipped(self) -> int:
+        return self.count("skipped")
+
+    @property
+    def passed(self) -> bool:
+        return self.n_passed == len(self.results)
+
+    def failed(self) -> List[AssertionResult]:
+        """ results of failed assertions """
+        return [result for result in self.results if result.status == "failed"]
+
+    def row_mask(self, how: Literal["any", "all"] = "any", indices: List[int] = None) -> RowMask:
+        """ rows violating any (OR) or all (AND) of the row-level assertions
+            :param indices: 1-based indices of assertions to combine, defaults to all with masks
+        """
+        masks = [result.mask for result in self.results
+                 if result.mask is not None and (indices is None or result.index in indices)]
+        if not masks: raise ValidationError("no row masks, run the pipe with `row_masks=True` and row-level assertions")
+        return combine(masks, how)
+
+    def split(self, frame: Any, how: Literal["any", "all"] = "any", indices: List[int] = None) -> Tuple[Any, Any]:
+        """ valid and invalid (quarantined) rows of the frame by `row_mask` """
+        return split(frame, self.row_mask(how, indices))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"pipe": self.name, "wall": self.wall, "passed": self.n_passed, "failed": self.n_failed,
+                "skipped": self.n_skipped, "total": len(self.results)}
+
+    def __bool__(self):
+        return self.passed
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}: [{self.n_passed}/{len(self.results)}] passed>"
+
+
+class BatchResult:
+    """ results of a pipe template mapped over partitions, truthy if all partitions passed """
+    __slots__ = ("name", "results", "wall")
+
+    def __init__(self, name: str, results: Dict[str, PipeResult], wall: float):
+        """
+        Parameters
+            :param name: name of the template
+            :param results: results of partitions by name, in order of partitions
+            :param wall: wall time of the whole map in seconds
+        """
+        self.name = name
+        self.results = results
+        self.wall = wall
+
+    @property
+    def passed(self) -> bool:
+        return all(result.passed for result in self.results.values())
+
+    @property
+    def n_passed(self) -> int:
+        return sum(result.passed for result in self.results.values())
+
+    def failed(self) -> List[Tuple[str, AssertionResult]]:
+        """ `(partition, result)` of failed assertions of all partitions """
+        return [(partition, failed) for partition, result in self.results.items() for failed in result.failed()]
+
+    def summary(self) -> str:
+        """ number of passed partitions and failed assertions of every partition """
+        lines = [f"[{self.name}]: [{self.n_passed}/{len(self.results)}] partitions passed"]
+        lines.extend(f"\t{partition}: {failed.index}|{failed.name}|: [failed] -> {failed.message}" for partition, failed in self.failed())
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"template": self.name, "wall": self.wall, "passed": self.n_passed, "total": len(self.results),
+                "partitions": {partition: result.to_dict() for partition, result in self.results.items()}}
+
+    def __bool__(self):
+        return self.passed
+
+    def __len__(self):
+        return len(self.results)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.name}: [{self.n_passed}/{len(self.results)}] partitions passed>"
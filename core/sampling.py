@@ -0,0 +1,89 @@
+""" sampling mode of row-wise assertions: violation rate is estimated on a random sample of rows """
+
+import math
+from statistics import NormalDist
+from typing import Any, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .exceptions import ValidationError
+from .failure import FailureDetail, MAX_VALUES
+
+
+def sample_size(n_rows: int, sample: Union[int, float]) -> int:
+    """ number of sampled rows: `sample` is a fraction of rows if float, number of rows if int """
+    if isinstance(sample, float):
+        if not 0 < sample <= 1: raise ValidationError("`sample` fraction must be in range (0, 1]")
+        return min(n_rows, max(1, math.ceil(sample * n_rows)))
+    if not isinstance(sample, int) or sample < 1: raise ValidationError("`sample` must be positive int or float fraction")
+    return min(n_rows, sample)
+
+
+def sample_positions(n_rows: int, sample: Union[int, float], seed: int = None) -> np.ndarray:
+    """ sorted positions of rows sampled without replacement, sorted positions keep reads sequential """
+    size = sample_size(n_rows, sample)
+    if size == n_rows:
+        return np.arange(n_rows)
+    positions = np.random.default_rng(seed).choice(n_rows, size=size, replace=False)
+    positions.sort()
+    return positions
+
+
+def wilson_interval(n_violations: int, n_sampled: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """ Wilson score interval of the violation rate, it stays sane for zero violations and small samples """
+    if n_sampled == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+    rate = n_violations / n_sampled
+    denominator = 1 + z ** 2 / n_sampled
+    center = (rate + z ** 2 / (2 * n_sampled)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / n_sampled + z ** 2 / (4 * n_sampled ** 2)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+class SampleEstimate:
+    """ violation rate of the assertion, estimated on a sample of rows, with its confidence interval """
+    def __init__(self, n_violations: int, n_sampled: int, n_rows: int, tolerance: float = 0.0, confidence: float = 0.95):
+        """
+        Parameters
+            :param n_violations: number of violating rows in the sample
+            :param n_sampled: number of sampled rows
+            :param n_rows: number of rows
+            :param tolerance: max acceptable violation rate
+            :param confidence: confidence level of the interval
+        """
+        self.n_violations = n_violations
+        self.n_sampled = n_sampled
+        self.n_rows = n_rows
+        self.tolerance = tolerance
+        self.confidence = confidence
+        self.low, self.high = wilson_interval(n_violations, n_sampled, confidence)
+
+    @property
+    def rate(self) -> float:
+        return self.n_violations / self.n_sampled if self.n_sampled else 0.0
+
+    @property
+    def passed(self) -> bool:
+        """ with zero tolerance the sample must have no violations, otherwise the upper bound
+            of the violation rate must be within the tolerance
+        """
+        if self.tolerance == 0:
+            return self.n_violations == 0
+        if self.n_sampled == self.n_rows:
+            # all rows were checked, the rate is exact
+            return self.rate <= self.tolerance
+        return self.high <= self.tolerance
+
+    def to_failure(self, message: str, positions: Sequence[int] = None, values: List[Any] = None) -> FailureDetail:
+        """ failure with violating rows of the sample """
+        return FailureDetail(f"{message} ({self})", n_failed=self.n_violations, n_total=self.n_sampled,
+                             positions=None if positions is None else np.asarray(positions)[:MAX_VALUES].tolist(),
+                             values=None if values is None else values[:MAX_VALUES])
+
+    def __str__(self):
+        return (f"sampled {self.n_sampled}/{self.n_rows} rows, violation rate {self.rate:.3%}, "
+                f"{self.confidence:.0%} CI [{self.low:.3%}, {self.high:.3%}], tolerance {self.tolerance:.3%}")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} rate={self.rate:.3%} high={self.high:.3%} passed={self.passed}>"
@@ -0,0 +1,169 @@
+""" prepared pandera schemas of `PanderaSchemaAssertion`: capped failure cases, sub-schemas of column groups
+    and row chunks. Prepared schemas are cached, so pipes over new partitions reuse them.
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Tuple, Union
+
+import pandas as pd
+import pandera as pa
+
+from .exceptions import ValidationError
+
+
+SPLITS = (None, "columns", "rows")
+# prepared schemas kept by the cache
+MAX_PREPARED = 64
+
+
+def _capped_checks(checks: List[pa.Check], n_failure_cases: Union[int, None]) -> List[pa.Check]:
+    """ copies of checks, which collect at most `n_failure_cases` failure cases """
+    if n_failure_cases is None:
+        return list(checks)
+    capped = []
+    for check in checks:
+        if check.n_failure_cases is None:
+            check = copy.copy(check)
+            check.n_failure_cases = n_failure_cases
+        capped.append(check)
+    return capped
+
+
+def _coerces(schema: pa.DataFrameSchema) -> bool:
+    return bool(schema.coerce) or any(column.coerce for column in schema.columns.values())
+
+
+class PreparedSchema:
+    """ schema with capped failure cases and its sub-schemas for split validation, built once """
+    def __init__(self, schema: pa.DataFrameSchema, n_failure_cases: int = None):
+        """
+        Parameters
+            :param schema: pandera schema
+            :param n_failure_cases: max failure cases collected by every check, `None` - all
+        """
+        self.source = schema
+        self.n_failure_cases = n_failure_cases
+        self.schema = schema.update_columns({name: {"checks": _capped_checks(column.checks, n_failure_cases)}
+                                             for name, column in schema.columns.items()})
+        self.schema.checks = _capped_checks(schema.checks, n_failure_cases)
+        self._column_parts: Dict[int, List[pa.DataFrameSchema]] = {}
+        self._row_parts: Tuple[pa.DataFrameSchema, Union[pa.DataFrameSchema, None]] = None
+        self._lock = threading.Lock()
+
+    def column_parts(self, n_groups: int) -> List[pa.DataFrameSchema]:
+        """ frame-level part (dataframe checks, index, strictness and presence of columns) and parts of column groups.
+            Every column is validated by exactly one part, so failure cases aren't repeated
+        """
+        with self._lock:
+            if n_groups in self._column_parts:
+                return self._column_parts[n_groups]
+            names = list(self.schema.columns)
+            # frame part keeps everything, but columns are only required there
+            frame = self.schema.update_columns({name: {"dtype": None, "checks": [], "nullable": True, "unique": False}
+                                                for name in names})
+            groups = [names[i::n_groups] for i in range(n_groups) if names[i::n_groups]]
+            parts = [frame] + [pa.DataFrameSchema({name: self.schema.columns[name] for name in group})
+                               .update_columns({name: {"required": False} for name in group}) for group in groups]
+            self._column_parts[n_groups] = parts
+            return parts
+
+    def row_parts(self) -> Tuple[pa.DataFrameSchema, Union[pa.DataFrameSchema, None]]:
+        """ schema of row chunks without uniqueness and schema of uniqueness over all rows, `None` if nothing is unique """
+        with self._lock:
+            if self._row_parts is None:
+                unique = [name for name, column in self.schema.columns.items() if column.unique]
+                chunk = self.schema.update_columns({name: {"unique": False} for name in unique})
+                chunk.unique = None
+                whole = None
+                if unique or self.schema.unique:
+                    whole = pa.DataFrameSchema({name: pa.Column(unique=True, required=False, name=name) for name in unique},
+                                               unique=self.schema.unique, report_duplicates=self.schema.report_duplicates)
+                self._row_parts = chunk, whole
+            return self._row_parts
+
+
+_PREPARED: "OrderedDict[Tuple[int, Any], PreparedSchema]" = OrderedDict()
+_PREPARED_LOCK = threading.Lock()
+
+
+def prepare(schema: pa.DataFrameSchema, n_failure_cases: int = None) -> PreparedSchema:
+    """ cached `PreparedSchema` of the schema. The schema is referenced by the cache, so its id isn't reused """
+    key = (id(schema), n_failure_cases)
+    with _PREPARED_LOCK:
+        prepared = _PREPARED.get(key)
+        if prepared is not None and prepared.source is schema:
+            _PREPARED.move_to_end(key)
+            return prepared
+    prepared = PreparedSchema(schema, n_failure_cases)
+    with _PREPARED_LOCK:
+        _PREPARED[key] = prepared
+        while len(_PREPARED) > MAX_PREPARED:
+            _PREPARED.popitem(last=False)
+    return prepared
+
+
+def _validate(schema: pa.DataFrameSchema, df: pd.DataFrame, lazy: bool) -> Union[pd.DataFrame, str, None]:
+    """ failure cases (lazy), message of the first error or `None` if valid """
+    try:
+        schema.validate(df, lazy=lazy)
+    except pa.errors.SchemaErrors as errors:
+        return errors.failure_cases
+    except pa.errors.SchemaError as error:
+        return str(error)
+    return None
+
+
+def validate(schema: pa.DataFrameSchema,
+             df: pd.DataFrame,
+             lazy: bool = True,
+             split: Literal[None, "columns", "rows"] = None,
+             workers: int = None,
+             chunk_rows: int = 1_000_000,
+             n_failure_cases: int = None) -> Union[pd.DataFrame, str, None]:
+    """ validates the frame by the prepared schema, whole or split into parts, which run in a thread pool
+        :param lazy: collect all failure cases instead of stopping at the first error
+        :param split: `columns` - validate groups of columns in parallel, `rows` - validate chunks of rows in parallel
+            (aggregate checks see one chunk, uniqueness is validated over all rows)
+        :param workers: number of threads, also number of column groups
+        :param chunk_rows: number of rows in chunk
+        :param n_failure_cases: max failure cases collected by every check
+        :returns: failure cases of all parts (lazy), message of the first error or `None` if the frame is valid
+    """
+    if split not in SPLITS: raise ValidationError(f"`split` must be one of: {SPLITS}")
+    prepared = prepare(schema, n_failure_cases)
+    if split is None:
+        return _validate(prepared.schema, df, lazy)
+    if _coerces(schema): raise ValidationError("split validation doesn't support schemas, which coerce dtypes")
+
+    if split == "columns":
+        tasks = [(part, df) for part in prepared.column_parts(workers or 1)]
+    else:
+        chunk, whole = prepared.row_parts()
+        tasks = [(chunk, df.iloc[start:start + chunk_rows]) for start in range(0, max(len(df), 1), chunk_rows)]
+        if whole is not None:
+            tasks.append((whole, df))
+
+    if workers is None or workers == 1 or len(tasks) < 2:
+        results = [_validate(part, data, lazy) for part, data in tasks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda task: _validate(task[0], task[1], lazy), tasks))
+
+    messages = [result for result in results if isinstance(result, str)]
+    if messages:
+        return messages[0]
+    failure_cases = [result for result in results if result is not None]
+    if not failure_cases:
+        return None
+    failure_cases = pd.concat(failure_cases, ignore_index=True)
+    if split == "rows":
+        # failures of the schema (dtypes, missing columns) have no index, every chunk reports them
+        repeated = failure_cases.astype({"failure_case": str}).duplicated(["schema_context", "column", "check", "failure_case"])
+        failure_cases = failure_cases[~(failure_cases["index"].isna() & repeated)]
+    if split == "rows" and n_failure_cases is not None:
+        # every chunk is capped separately, keep the cap for the whole frame
+        failure_cases = failure_cases.groupby(["column", "check"], dropna=False, sort=False).head(n_failure_cases)
+    return failure_cases.reset_index(drop=True)
@@ -0,0 +1,199 @@
+""" probabilistic sketches over 64-bit value hashes: HyperLogLog, Bloom filter and Count-Min sketch.
+    Sketches of the same configuration can be merged across partitions and serialized to bytes.
+"""
+
+import math
+from typing import Iterator, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .exceptions import ValidationError
+
+
+def hash_values(values: Union[pd.Series, pd.Index, np.ndarray, Sequence]) -> np.ndarray:
+    """ 64-bit hashes of the values. Hashes depend on dtype: int 1 and float 1.0 have different hashes,
+        so sketches have to be built from values of the same dtype as the checked column
+    """
+    if isinstance(values, (pd.Series, pd.Index)):
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return pd.util.hash_array(np.asarray(values))
+
+
+def iter_hashes(column: pd.Series, block_rows: int = 2**16) -> Iterator[np.ndarray]:
+    """ hashes of the column block by block, so memory doesn't grow with the column """
+    for start in range(0, len(column), block_rows):
+        yield hash_values(column.iloc[start:start + block_rows])
+
+
+def _mix(hashes: np.ndarray, seed: int) -> np.ndarray:
+    """ splitmix64 finalizer: derives independent hashes from the value hashes """
+    with np.errstate(over="ignore"):
+        x = hashes + np.uint64((0x9E3779B97F4A7C15 * (seed + 1)) % 2**64)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+class HyperLogLog:
+    """ distinct count estimation with relative standard error `1.04 / sqrt(2 ** p)` in `2 ** p` bytes """
+    def __init__(self, error: float = 0.01, p: int = None):
+        """
+        Parameters
+            :param error: relative standard error of the estimation, defines `p`
+            :param p: number of index bits (11..18), overrides `error`
+        """
+        self.p = p if p is not None else min(max(math.ceil(math.log2((1.04 / error) ** 2)), 11), 18)
+        if not 11 <= self.p <= 18: raise ValidationError("`p` must be in range 11..18")
+        self.m = 2 ** self.p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def error(self) -> float:
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, hashes: np.ndarray) -> None:
+        n_bits = 64 - self.p
+        index = (hashes >> np.uint64(n_bits)).astype(np.intp)
+        rest = hashes & np.uint64(2 ** n_bits - 1)
+        # rank = position of the leftmost 1-bit in `rest`. rest < 2 ** 53 is exact in float64, so frexp is exact
+        _, exponent = np.frexp(rest.astype(np.float64))
+        rank = (n_bits - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> float:
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        n_zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * self.m and n_zeros:
+            # small range correction: linear counting
+            return self.m * math.log(self.m / n_zeros)
+        return float(raw)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p: raise ValidationError("HyperLogLog sketches must have the same `p` to be merged")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.p]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        sketch = cls(p=data[0])
+        sketch.registers = np.frombuffer(data[1:], dtype=np.uint8).copy()
+        return sketch
+
+
+class BloomFilter:
+    """ set membership without false negatives and with `error_rate` false positives """
+    def __init__(self, capacity: int, error_rate: float = 0.01, n_bits: int = None, n_hashes: int = None):
+        """
+        Parameters
+            :param capacity: expected number of distinct values
+            :param error_rate: false positive rate at `capacity` values
+            :param n_bits: size of the filter in bits, overrides `capacity` and `error_rate`
+            :param n_hashes: number of hash functions, overrides `capacity` and `error_rate`
+        """
+        capacity = max(capacity, 1)
+        self.n_bits = n_bits or max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = n_hashes or max(1, round(self.n_bits / capacity * math.log(2)))
+        self.words = np.zeros(math.ceil(self.n_bits / 64), dtype=np.uint64)
+
+    @classmethod
+    def from_values(cls, values, error_rate: float = 0.01, dtype=None, block_rows: int = 2**16) -> "BloomFilter":
+        """ builds the filter from the values, e.g. a blocklist
+            :param dtype: dtype of the checked column, values are cast to it if possible to get the same hashes
+        """
+        values = values if isinstance(values, pd.Series) else pd.Series(values)
+        if dtype is not None and values.dtype != dtype:
+            try:
+                values = values.astype(dtype)
+            except (TypeError, ValueError):
+                pass
+        bloom = cls(capacity=len(values), error_rate=error_rate)
+        for hashes in iter_hashes(values, block_rows):
+            bloom.add(hashes)
+        return bloom
+
+    def _positions(self, hashes: np.ndarray) -> Iterator[np.ndarray]:
+        # double hashing: position_i = h1 + i * h2
+        h1, h2 = hashes, _mix(hashes, 0) | np.uint64(1)
+        with np.errstate(over="ignore"):
+            for i in range(self.n_hashes):
+                yield (h1 + np.uint64(i) * h2) % np.uint64(self.n_bits)
+
+    def add(self, hashes: np.ndarray) -> None:
+        for positions in self._positions(hashes):
+            np.bitwise_or.at(self.words, positions >> np.uint64(6), np.uint64(1) << (positions & np.uint64(63)))
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """ boolean mask of hashes, which are probably in the set """
+        mask = np.ones(len(hashes), dtype=bool)
+        for positions in self._positions(hashes):
+            words = self.words[(positions >> np.uint64(6)).astype(np.intp)]
+            mask &= (words >> (positions & np.uint64(63))) & np.uint64(1) == 1
+        return mask
+
+    def merge(self, other: "BloomFilter") -> "BloomFilter":
+        if (other.n_bits, other.n_hashes) != (self.n_bits, self.n_hashes):
+            raise ValidationError("Bloom filters must have the same `n_bits` and `n_hashes` to be merged")
+        np.bitwise_or(self.words, other.words, out=self.words)
+        return self
+
+    def to_bytes(self) -> bytes:
+        header = np.array([self.n_bits, self.n_hashes], dtype=np.uint64).tobytes()
+        return header + self.words.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        n_bits, n_hashes = np.frombuffer(data[:16], dtype=np.uint64)
+        bloom = cls(capacity=1, n_bits=int(n_bits), n_hashes=int(n_hashes))
+        bloom.words = np.frombuffer(data[16:], dtype=np.uint64).copy()
+        return bloom
+
+
+class CountMinSketch:
+    """ frequency estimation, which never underestimates and overestimates by at most `epsilon * N`
+        with probability `1 - delta`, where N is the number of added values
+    """
+    def __init__(self, epsilon: float = 1e-4, delta: float = 1e-3, width: int = None, depth: int = None):
+        """
+        Parameters
+            :param epsilon: relative overestimation error
+            :param delta: probability to exceed the error
+            :param width: number of counters in row, overrides `epsilon`
+            :param depth: number of rows, overrides `delta`
+        """
+        self.width = width or math.ceil(math.e / epsilon)
+        self.depth = depth or math.ceil(math.log(1 / delta))
+        self.table = np.zeros((self.depth, self.width), dtype=np.int64)
+
+    def _columns(self, hashes: np.ndarray, row: int) -> np.ndarray:
+        return (_mix(hashes, row + 1) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, hashes: np.ndarray) -> None:
+        for row in range(self.depth):
+            self.table[row] += np.bincount(self._columns(hashes, row), minlength=self.width)
+
+    def estimate(self, hashes: np.ndarray) -> np.ndarray:
+        """ estimated counts of the hashed values """
+        counts = self.table[0][self._columns(hashes, 0)]
+        for row in range(1, self.depth):
+            np.minimum(counts, self.table[row][self._columns(hashes, row)], out=counts)
+        return counts
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if other.table.shape != self.table.shape: raise ValidationError("Count-Min sketches must have the same shape to be merged")
+        self.table += other.table
+        return self
+
+    def to_bytes(self) -> bytes:
+        return np.array([self.depth, self.width], dtype=np.int64).tobytes() + self.table.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CountMinSketch":
+        depth, width = np.frombuffer(data[:16], dtype=np.int64)
+        sketch = cls(width=int(width), depth=int(depth))
+        sketch.table = np.frombuffer(data[16:], dtype=np.int64).reshape(sketch.depth, sketch.width).copy()
+        return sketch
@@ -0,0 +1,162 @@
+""" lazy references to columns and frames of files. Pipe reads the union of referenced columns of every file once,
+    right before the run, and shares the data by all assertions
+"""
+
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Hashable, Iterator, List, Sequence, Tuple, Union
+
+import pandas as pd
+
+from .exceptions import ValidationError
+
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+# pyarrow filters: [("country", "=", "US"), ("year", ">=", 2020)] or list of such lists (OR of ANDs)
+Filters = List[Union[Tuple[str, str, Any], List[Tuple[str, str, Any]]]]
+
+
+def read_frame(path: Union[str, os.PathLike], columns: List[str] = None, filters: Filters = None) -> pd.DataFrame:
+    """ reads csv or parquet file. Parquet files are read by pyarrow: only `columns` are read, and with `filters`
+        row groups, which can't match by their statistics, are skipped
+    """
+    if str(path).lower().endswith(PARQUET_EXTENSIONS):
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, columns=columns, filters=filters).to_pandas()
+    if filters is not None: raise ValidationError("`filters` are supported for parquet files only")
+    return pd.read_csv(path, usecols=columns)
+
+
+def _freeze(filters: Filters) -> Hashable:
+    return None if filters is None else repr(filters)
+
+
+class LazySource(ABC):
+    """ reference to data of the file, which is read by the pipe """
+    def __init__(self, path: Union[str, os.PathLike], filters: Filters = None):
+        """
+        Parameters
+            :param path: path to parquet or csv file
+            :param filters: pyarrow filters of rows, parquet files only
+        """
+        self.path = path
+        self.filters = filters
+
+    @property
+    def key(self) -> Tuple[str, Hashable]:
+        """ sources of the same key are read together """
+        return os.path.abspath(self.path), _freeze(self.filters)
+
+    @abstractmethod
+    def columns(self) -> Union[List[str], None]:
+        """ referenced columns, `None` - all columns """
+        ...
+
+    @abstractmethod
+    def resolve(self, frame: pd.DataFrame) -> Any:
+        """ data of the source from the frame read for its key """
+        ...
+
+
+class Col(LazySource):
+    """ lazy column of the file: `Col("users.parquet", "country")` """
+    def __init__(self, path: Union[str, os.PathLike], column: str, filters: Filters = None):
+        super().__init__(path, filters)
+        self.column = column
+
+    def columns(self) -> List[str]:
+        return [self.column]
+
+    def resolve(self, frame: pd.DataFrame) -> pd.Series:
+        return frame[self.column]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}[{self.column!r}]>"
+
+
+class Frame(LazySource):
+    """ lazy frame of the file: `Frame("users.parquet")` or only some of its columns """
+    def __init__(self, path: Union[str, os.PathLike], columns: Sequence[str] = None, filters: Filters = None):
+        super().__init__(path, filters)
+        self._columns = list(columns) if columns is not None else None
+
+    def columns(self) -> Union[List[str], None]:
+        return self._columns
+
+    def resolve(self, frame: pd.DataFrame) -> pd.DataFrame:
+        return frame if self._columns is None else frame[self._columns]
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.path}" + (f" {self._columns}>" if self._columns is not None else ">")
+
+
+def _references(value: Any) -> Iterator[LazySource]:
+    """ lazy sources in the attribute value, containers are searched one level deep (e.g. args of `FnAssertion`) """
+    if isinstance(value, LazySource):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        yield from (item for item in value if isinstance(item, LazySource))
+    elif isinstance(value, dict):
+        yield from (item for item in value.values() if isinstance(item, LazySource))
+
+
+def _substitute(value: Any, data: Dict[int, Any]) -> Any:
+    if isinstance(value, LazySource):
+        return data[id(value)]
+    if isinstance(value, (list, tuple)):
+        return type(value)(data[id(item)] if isinstance(item, LazySource) else item for item in value)
+    return {key: data[id(item)] if isinstance(item, LazySource) else item for key, item in value.items()}
+
+
+def read_sources(sources: List[LazySource]) -> Dict[int, Any]:
+    """ reads every file (per filters) once with the union of columns of its sources
+        :returns: {id(source): data}
+    """
+    groups: Dict[Tuple, List[LazySource]] = {}
+    for source in sources:
+        groups.setdefault(source.key, []).append(source)
+    data = {}
+    for group in groups.values():
+        columns = []
+        for source in group:
+            if source.columns() is None:
+                columns = None
+                break
+            columns.extend(column for column in source.columns() if column not in columns)
+        try:
+            frame = read_frame(group[0].path, columns=columns, filters=group[0].filters)
+        except (OSError, ValueError, KeyError) as error:
+            raise ValidationError(f"can't read {group[0].path}: {str(error).splitlines()[0]}") from error
+        for source in group:
+            data[id(source)] = source.resolve(frame)
+    return data
+
+
+@contextmanager
+def bind_sources(objects: Sequence[Any]) -> Iterator[None]:
+    """ replaces lazy sources in attributes of objects (assertions) by their data while in the block,
+        the sources are put back afterwards, so the data is released and read again by the next run
+    """
+    bound: List[Tuple[Any, str, Any]] = []
+    sources = []
+    for obj in objects:
+        for attr, value in vars(obj).items():
+            references = list(_references(value))
+            if references:
+                bound.append((obj, attr, value))
+                sources.extend(references)
+    if not sources:
+        yield
+        return
+    data = read_sources(sources)
+    try:
+        for obj, attr, value in bound:
+            setattr(obj, attr, _substitute(value, data))
+        del data
+        yield
+    finally:
+        for obj, attr, value in bound:
+            setattr(obj, attr, value)
@@ -1,36 +1,80 @@
-from typing import List, Dict
+import time
+from typing import Callable, List, Dict, Literal
 
 from assertions.base import BaseAssertion
+from .cache import ComputationCache, NO_CACHE
 from .exceptions import ValidationError
-import colorama
+from .executors import run_assertions
+from .metrics import MEMORY_MODES, MetricsHook, PipeMetrics
+from .planner import ColumnScan, plan_column_scans
+from .reporters import ConsoleReporter, Reporter
+from .results import AssertionResult, PipeResult
+from .sources import bind_sources
+
+
+ORDERS = ("declared", "cost")
+
+
+class _InOrder:
+    """ reports finished assertions of a parallel stage in their declared order: an assertion, which finished
+        early, waits until the assertions before it are reported
+    """
+    def __init__(self, stage: List[BaseAssertion], report: Callable[[BaseAssertion], None]):
+        self.stage = stage
+        self.report = report
+        self.finished = set()
+        self.position = 0
+
+    def __call__(self, assertion: BaseAssertion) -> None:
+        self.finished.add(id(assertion))
+        while self.position < len(self.stage) and id(self.stage[self.position]) in self.finished:
+            self.report(self.stage[self.position])
+            self.position += 1
+
+    def flush(self) -> None:
+        """ reports the rest of finished assertions, after a fail fast stop some assertions never finish """
+        for assertion in self.stage[self.position:]:
+            if id(assertion) in self.finished:
+                self.report(assertion)
+        self.position = len(self.stage)
 
 
 class TestPipe:
     """ Pipe of Sequence assertions """
-    def __init__(self, name: str, assertions: List[BaseAssertion]):
+    def __init__(self,
+                 name: str,
+                 assertions: List[BaseAssertion],
+                 cache_bytes: int = 256 * 2**20,
+                 hooks: List[MetricsHook] = None,
+                 reporters: List[Reporter] = None,
+                 release_inputs: bool = False,
+                 weak_inputs: bool = False):
+        """
+        Parameters
+            :param name: name of the pipe
+            :param assertions: assertions to run
+            :param cache_bytes: memory budget of computations (isin/duplicated masks, value counts...) shared
+                by assertions during the run, `0` disables the cache. Defaults to 256MiB
+            :param hooks: receive metrics of every run, e.g. `JsonMetricsExporter`
+            :param reporters: receive results in declared order as assertions finish, defaults to `ConsoleReporter`.
+                `[QuietReporter()]` or `[]` - no output
+            :param release_inputs: assertions drop their input data as soon as they are reported, so a finished pipe
+                doesn't keep frames alive. The pipe can't run again
+            :param weak_inputs: assertions hold input data by weak references, the data must be referenced elsewhere
+                until the run. Process backend needs `fork` then
+        """
         self.assertions = assertions
         self.name = name
+        self.cache_bytes = cache_bytes
+        self.hooks = hooks or []
+        self.reporters = [ConsoleReporter()] if reporters is None else reporters
+        self.release_inputs = release_inputs
+        # metrics of the last run
+        self.metrics: PipeMetrics = None
         self.__validate()
-
-    
-    def _echo(self, run_result: Dict[int, BaseAssertion]) -> None:
-        print(f"[{self.name}]: Running assertions")
-        for i, assertion in run_result.items():
-            if assertion.status == "passed":
-                print(colorama.Fore.GREEN + f"\t{i}|{assertion.name}|: [{assertion.status}]")
-            else:
-                print(colorama.Fore.RED + f"\t{i}|{assertion.name}|: [{assertion.status}] -> {assertion.error_message}")
-        n_passed = len([a for a in run_result.values() if a.status == 'passed'])
-        n_all = len(run_result)
-        n_failed = n_all - n_passed
-        if n_failed == 0:
-            print(colorama.Fore.GREEN + f"Successfully ran [{n_passed}/{n_all}] assertions")
-        
-        elif n_passed > n_failed:
-            print(colorama.Fore.YELLOW + f"Successfully ran [{n_passed}/{n_all}] assertions")
-        
-        else:
-            print(colorama.Fore.RED + f"Successfully ran [{n_passed}/{n_all}] assertions")
+        if weak_inputs:
+            for assertion in self.assertions:
+                assertion.hold_weakly()
 
 
     def __validate(self):
@@ -38,15 +82,159 @@ class TestPipe:
         for assertion in self.assertions:
             if not isinstance(assertion, BaseAssertion):
                 raise ValidationError(f"Assertion must be instance of subclass `BaseAssertion`, but got: `{type(assertion)}`")
+        for hook in self.hooks:
+            if not isinstance(hook, MetricsHook):
+                raise ValidationError(f"Hook must be instance of subclass `MetricsHook`, but got: `{type(hook)}`")
+        for reporter in self.reporters:
+            if not isinstance(reporter, Reporter):
+                raise ValidationError(f"Reporter must be instance of subclass `Reporter`, but got: `{type(reporter)}`")
     
-    def run(self):
-        run_result = {}
-        for i, assertion in enumerate(self.assertions, start=1):
-            assertion.run()
-            run_result[i] = assertion
-
-        self._echo(run_result)
-        print(f"Done")
+    def schedule(self, order: Literal["declared", "cost"] = "declared") -> List[List[BaseAssertion]]:
+        """ stages of assertions: all assertions in declared order or grouped by their `cost`, the cheapest first """
+        if order not in ORDERS: raise ValidationError(f"`order` must be one of: {ORDERS}")
+        if order == "declared":
+            return [list(self.assertions)]
+        stages = {}
+        for assertion in self.assertions:
+            stages.setdefault(assertion.cost, []).append(assertion)
+        return [stages[cost] for cost in sorted(stages)]
+
+    def _run_stage(self, stage: List[BaseAssertion], workers: int, backend: str, fuse: bool, fail_fast: bool) -> bool:
+        """ runs assertions of the stage, returns `False` if the pipe has to stop """
+        parallel = workers is not None and workers > 1
+        # scans of a parallel run go first, fail fast parallel runs aren't fused to stop in submission order
+        scans, rest = plan_column_scans(stage) if fuse and not (parallel and fail_fast) else ([], stage)
+        if not parallel:
+            return self._run_declared(stage, scans, fail_fast)
+        report = _InOrder(stage, self._report)
+        try:
+            for scan in scans:
+                scan.run()
+                for assertion in scan.assertions:
+                    report(assertion)
+                if fail_fast and any(a.status == "failed" for a in scan.assertions):
+                    return False
+            run_assertions(rest, workers=workers, backend=backend, fail_fast=fail_fast, on_done=report)
+        finally:
+            report.flush()
+        return not (fail_fast and any(a.status == "failed" for a in rest))
+
+    def _run_declared(self, stage: List[BaseAssertion], scans: List[ColumnScan], fail_fast: bool) -> bool:
+        """ runs and reports assertions of the stage one by one in declared order. A fused scan runs at its first
+            assertion, the rest of its assertions are reported at their own positions
+        """
+        first = {id(scan.assertions[0]): scan for scan in scans}
+        fused = {id(assertion) for scan in scans for assertion in scan.assertions}
+        for i, assertion in enumerate(stage):
+            if id(assertion) in first:
+                first[id(assertion)].run()
+            elif id(assertion) not in fused:
+                assertion.run()
+            self._report(assertion)
+            if fail_fast and assertion.status == "failed":
+                # results of later fused assertions are dropped, they are skipped like the rest
+                for later in stage[i + 1:]:
+                    if id(later) in fused:
+                        later.reset()
+                return False
+        return True
+
+    def run(self,
+            workers: int = None,
+            backend: Literal["thread", "process"] = "thread",
+            fuse: bool = True,
+            fail_fast: bool = False,
+            order: Literal["declared", "cost"] = "declared",
+            memory: Literal[None, "tracemalloc", "rss"] = None,
+            show_metrics: bool = False,
+            row_masks: bool = False) -> PipeResult:
+        """ run assertions of the pipe, results are passed to reporters as assertions finish. Results of parallel
+            runs are passed in declared order too (by stages with `order="cost"`), an early result waits for the ones before it
+            :param workers: number of parallel workers, defaults to `None` - sequential run
+            :param backend: `thread` or `process` pool for parallel run, defaults to `thread`
+            :param fuse: evaluate `InColumnAssertion`/`NotInColumnAssertion` on the same column in a single
+                blocked scan of the column, which stops as soon as their results are known. Defaults to `True`.
+                Parallel runs with `fail_fast` aren't fused
+            :param fail_fast: stop at the first failed assertion, the rest of assertions are marked as `skipped`
+            :param order: `declared` order or by `cost` - cheap metadata checks first, then scans, hashing and
+                custom assertions. Defaults to `declared`
+            :param memory: memory measured for every phase of assertions: `tracemalloc` - peak allocation
+                (slows allocations down, threads of a parallel run share it), `rss` - growth of resident memory,
+                `None` - only time is measured. Defaults to `None`
+            :param show_metrics: print slowest-first table of assertions after results
+            :param row_masks: keep packed masks of violating rows of row-level assertions in results,
+                to combine them and split frames into valid and invalid rows with `PipeResult.split`
+            :returns: results of assertions, truthy if all of them passed
+        """
+        if memory not in MEMORY_MODES: raise ValidationError(f"`memory` must be one of: {MEMORY_MODES}")
+        if any(assertion.released for assertion in self.assertions):
+            raise ValidationError("input data of assertions was released by the previous run, build the pipe again")
+        stages = self.schedule(order)
+        cache = ComputationCache(max_bytes=self.cache_bytes)
+        for assertion in self.assertions:
+            assertion.reset()
+            assertion.cache = cache
+            assertion.memory_metrics = memory
+        start = time.perf_counter()
+        self._start_report(self.assertions, row_masks)
+        try:
+            # lazy `Col`/`Frame` sources are read once per file, with the union of referenced columns
+            with bind_sources(self.assertions):
+                for stage in stages:
+                    if not self._run_stage(stage, workers, backend, fuse, fail_fast):
+                        break
+        finally:
+            cache.clear()
+            for assertion in self.assertions:
+                assertion.cache = NO_CACHE
+        for assertion in self.assertions:
+            if assertion.status is None:
+                assertion.set_skipped("skipped after a failed assertion")
+                self._report(assertion)
+        wall = time.perf_counter() - start
+        self.metrics = self._collect_metrics(wall)
+
+        result = self._finish_report(wall, self.metrics)
+        if show_metrics:
+            print(self.metrics.table())
+        return result
+
+    def _start_report(self, assertions: List[BaseAssertion], row_masks: bool = False) -> None:
+        self._indices = {id(assertion): i for i, assertion in enumerate(assertions, start=1)}
+        self._results: Dict[int, AssertionResult] = {}
+        self._row_masks = row_masks
+        for reporter in self.reporters:
+            reporter.start(self.name, len(assertions))
+
+    def _report(self, assertion: BaseAssertion) -> None:
+        """ passes result of the finished assertion to reporters, only the compact result is kept """
+        index = self._indices[id(assertion)]
+        # masks are taken while the cache of the run still has masks computed by assertions
+        mask = assertion.row_mask() if self._row_masks and assertion.status != "skipped" else None
+        result = AssertionResult.from_assertion(index, assertion, mask)
+        self._results[index] = result
+        for reporter in self.reporters:
+            reporter.on_result(self.name, result)
+        if self.release_inputs:
+            assertion.release()
+
+    def _finish_report(self, wall: float, metrics: PipeMetrics = None) -> PipeResult:
+        result = PipeResult(self.name, [self._results[i] for i in sorted(self._results)], wall, metrics)
+        self._indices = self._results = None
+        for reporter in self.reporters:
+            reporter.finish(result)
+        return result
+
+    def _collect_metrics(self, wall: float) -> PipeMetrics:
+        """ metrics of the run, passed to hooks """
+        metrics = PipeMetrics(self.name, wall, [{"index": i, "name": assertion.name, "status": assertion.status,
+                                                 "metrics": assertion.metrics} for i, assertion in enumerate(self.assertions, start=1)])
+        for hook in self.hooks:
+            for i, assertion in enumerate(self.assertions, start=1):
+                if assertion.metrics is not None:
+                    hook.on_assertion(i, assertion, assertion.metrics)
+            hook.on_pipe(metrics)
+        return metrics
 
     
     def __repr__(self):
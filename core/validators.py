@@ -1,23 +1,162 @@
+""" vectorized validators of string values """
+
 import re
-from typing import Union, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Union
 
+import numpy as np
 import pandas as pd
 
 
+# urls match the whole pattern, see `RegexValidator(fullmatch=True)`
+URL_PATTERN = r"(ftp|http(s)?)://?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(\/\S*)?|([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})"
+URL_WITH_PROTOCOL_PATTERN = r'(ftp|http|https)://?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(\/\S*)?'
+
+# rows validated by one task of the parallel run
+CHUNK_ROWS = 2**20
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str, ignore_case: bool = False) -> re.Pattern:
+    """ compiled patterns are cached, so validators don't compile them again """
+    return re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+
+def _arrow_strings(values: pd.Series):
+    """ values as pyarrow string array, `None` if pyarrow is not installed or values are not strings """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    if type(values).__module__.split(".")[0] == "polars":
+        values = values.to_arrow()
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    try:
+        # arrow backed strings are taken without copy, object strings are converted in C
+        array = values if isinstance(values, pa.Array) else pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type) or pa.types.is_null(array.type)):
+        return None
+    return array
+
+
+class RegexValidator:
+    """ validates strings by a regex. Series are matched by pyarrow (RE2) when it is installed, so the matching
+        runs in C without the GIL, and large Series are matched in parallel chunks. Otherwise, and for patterns
+        RE2 doesn't support, the compiled Python pattern is used.
+    """
+    def __init__(self, pattern: str, ignore_case: bool = False, na: bool = False, use_arrow: bool = True,
+                 fullmatch: bool = False):
+        """
+        Parameters
+            :param pattern: regex, which valid values match (`re.search` semantics)
+            :param ignore_case: case insensitive matching
+            :param na: validity of missing and non-string values
+            :param use_arrow: match Series with pyarrow if it is installed
+            :param fullmatch: valid values match the whole pattern (`re.fullmatch` semantics). Unlike `$` of Python
+                patterns, which matches before a trailing newline too, RE2 and Python matching agree then
+        """
+        self.pattern = pattern
+        self.ignore_case = ignore_case
+        self.na = na
+        self.use_arrow = use_arrow
+        self.fullmatch = fullmatch
+        self.compiled = compile_pattern(pattern, ignore_case)
+
+    def _search(self):
+        return self.compiled.fullmatch if self.fullmatch else self.compiled.search
+
+    def match(self, value: str) -> bool:
+        """ validity of a single value """
+        if not isinstance(value, str):
+            return self.na
+        return self._search()(value) is not None
+
+    def _python_mask(self, values: pd.Series) -> np.ndarray:
+        search, na = self._search(), self.na
+        return np.fromiter((search(value) is not None if isinstance(value, str) else na for value in values),
+                           dtype=bool, count=len(values))
+
+    def _arrow_mask(self, values: pd.Series, workers: int, chunk_rows: int) -> Union[np.ndarray, None]:
+        """ `None` if values can't be matched by pyarrow """
+        array = _arrow_strings(values) if self.use_arrow else None
+        if array is None:
+            return None
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if pa.types.is_null(array.type):
+            return np.full(len(values), self.na)
+
+        # `$` of RE2 matches only at the end of the value
+        pattern = f"^(?:{self.pattern})$" if self.fullmatch else self.pattern
+
+        def match(chunk) -> np.ndarray:
+            matches = pc.match_substring_regex(chunk, pattern, ignore_case=self.ignore_case)
+            return matches.fill_null(self.na).to_numpy(zero_copy_only=False)
+
+        try:
+            if workers is None or workers == 1 or len(array) <= chunk_rows:
+                return match(array)
+            # slices are zero-copy, RE2 matching releases the GIL
+            chunks = [array.slice(start, chunk_rows) for start in range(0, len(array), chunk_rows)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return np.concatenate(list(executor.map(match, chunks)))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # syntax, which RE2 doesn't support
+            return None
+
+    def mask(self, values: Union[pd.Series, pd.Index], workers: int = None, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+        """ boolean mask of valid values
+            :param workers: number of threads, which match chunks of `chunk_rows` rows in parallel.
+                Only pyarrow matching runs in parallel, Python matching holds the GIL
+            :param chunk_rows: number of rows in chunk
+        """
+        if isinstance(values, pd.Index):
+            values = pd.Series(values)
+        mask = self._arrow_mask(values, workers, chunk_rows)
+        if mask is not None:
+            return mask
+        if not isinstance(values, (pd.Series, np.ndarray, list, tuple)):
+            # pyarrow/polars columns
+            values = values.to_pylist() if hasattr(values, "to_pylist") else values.to_list()
+        return self._python_mask(values)
+
+    def invalid_positions(self, values: Union[pd.Series, pd.Index], workers: int = None) -> np.ndarray:
+        """ positions of invalid values """
+        return np.flatnonzero(~self.mask(values, workers))
+
+    def __call__(self, values: Union[pd.Series, pd.Index, str], workers: int = None) -> Union[np.ndarray, bool]:
+        if isinstance(values, str):
+            return self.match(values)
+        return self.mask(values, workers)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.pattern!r}>"
+
+
+@lru_cache(maxsize=None)
+def url_validator(include_protocol: bool = False, na: bool = False, ignore_case: bool = True) -> RegexValidator:
+    """ shared url validator
+        :param include_protocol: urls must start with `http://`, `https://` or `ftp://`
+        :param na: validity of missing values
+        :param ignore_case: case insensitive protocols, e.g. `HTTP://`
+    """
+    return RegexValidator(URL_WITH_PROTOCOL_PATTERN if include_protocol else URL_PATTERN, ignore_case=ignore_case,
+                          na=na, fullmatch=True)
+
+
 def validate_url(urls: Union[pd.Series, str], include_protocol: bool = False) -> Union[pd.Series, bool]:
-    """  """
-    regex_no_http = r"^(ftp|http(s)?)://?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(\/\S*)?$|^([a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$)"
-    regex_with_http = r'^(ftp|http|https)://?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(\/\S*)?$'
-    regex = regex_with_http if include_protocol else regex_no_http
+    """ `True` if the url or all urls of the Series are valid. Use `url_validator().mask` for the mask of valid urls.
+        As before, urls of Series are matched case insensitive and a single url is case sensitive
+    """
     if isinstance(urls, (pd.Series, pd.Index)):
-        is_url = urls.str.contains(regex, regex=True, case=False)
-        if (~is_url).sum() > 0:
-            return False
-        else:
-            return True
+        return bool(url_validator(include_protocol).mask(urls).all())
     elif isinstance(urls, str):
-        return bool(re.compile(regex).match(urls))
-    
+        return url_validator(include_protocol, ignore_case=False).match(urls)
+
     else:
         raise ValueError("urls must be type of: pd.Series, pd.Index, str")
-    
@@ -0,0 +1,121 @@
+""" reusable set of values for `InColumnAssertion`/`NotInColumnAssertion`, hashed once and shared by assertions and pipes """
+
+import hashlib
+import os
+from typing import Iterator, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .exceptions import ValidationError
+
+
+class ValueSet:
+    """ set of values, which is built once: its hash table is shared by all lookups, while `column.isin(values)`
+        hashes the values on every call. Keys saved to a sorted `.npy` file can be memory-mapped
+        and probed with `searchsorted` without loading them into memory.
+    """
+    def __init__(self, values: Union[Sequence, np.ndarray, pd.Series, pd.Index]):
+        """
+        Parameters
+            :param values: values of the set, duplicates are dropped
+        """
+        self.path = None
+        self.keys: np.ndarray = None
+        self.index = pd.Index(values).unique()
+        # build the hash table now, lookups only probe it
+        self.index.get_indexer(self.index[:1])
+
+    @classmethod
+    def from_file(cls, path: Union[str, os.PathLike], in_memory: bool = True) -> "ValueSet":
+        """ loads keys saved by `save`
+            :param in_memory: build the hash table of the keys. Otherwise numeric keys are memory-mapped and probed
+                with `searchsorted`, which is several times slower than the hash table, but keeps memory flat
+        """
+        keys = np.load(path, mmap_mode="r")
+        if in_memory:
+            return cls(keys)
+        if keys.dtype.kind not in "iuf": raise ValidationError("only numeric keys can be probed without loading them into memory")
+        value_set = cls.__new__(cls)
+        value_set.path = path
+        value_set.keys = keys
+        value_set.index = None
+        return value_set
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """ saves sorted keys to `.npy` file. Strings are saved as fixed-width unicode """
+        keys = self.to_numpy()
+        if keys.dtype == object:
+            if self.index.inferred_type != "string": raise ValidationError("only numeric or string values can be saved")
+            keys = keys.astype(str)
+        np.save(path, np.sort(keys))
+
+    def to_numpy(self) -> np.ndarray:
+        return np.asarray(self.keys) if self.index is None else self.index.to_numpy()
+
+    def fingerprint(self) -> str:
+        """ 128-bit fingerprint of the values, computed once: the set doesn't change after it is built """
+        if getattr(self, "_fingerprint", None) is None:
+            digest = hashlib.blake2b(digest_size=16)
+            keys = self.to_numpy()
+            for start in range(0, len(keys), 2**20):
+                digest.update(pd.util.hash_array(np.asarray(keys[start:start + 2**20])).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def to_index(self) -> pd.Index:
+        """ values as unique `pd.Index`, memory-mapped keys are loaded into it on the first call """
+        if self.index is None:
+            self.index = pd.Index(self.keys)
+        return self.index
+
+    @property
+    def hasnans(self) -> bool:
+        if self.index is None:
+            # sorting puts NaN last
+            return self.keys.dtype.kind == "f" and len(self.keys) > 0 and bool(np.isnan(self.keys[-1]))
+        return self.index.hasnans
+
+    def _sorted_contains(self, values: np.ndarray) -> np.ndarray:
+        if len(self.keys) == 0:
+            return np.zeros(len(values), dtype=bool)
+        positions = np.searchsorted(self.keys, values)
+        positions[positions == len(self.keys)] = 0
+        isin = self.keys[positions] == values
+        if self.hasnans:
+            # NaN != NaN
+            isin |= np.isnan(values)
+        return isin
+
+    def contains(self, column: Union[pd.Series, np.ndarray]) -> np.ndarray:
+        """ boolean mask of column values, which are in the set, same as `column.isin(values)` """
+        if isinstance(column, pd.Series) and isinstance(column.dtype, pd.CategoricalDtype):
+            # probe categories only, missing values have code -1 - the last item
+            isin = np.append(self.contains(column.cat.categories.to_numpy()), self.hasnans)
+            return isin[column.cat.codes.to_numpy()]
+        if self.index is None and isinstance(column.dtype, np.dtype) and column.dtype.kind in "iuf":
+            return self._sorted_contains(np.asarray(column))
+        return self.to_index().get_indexer(column) != -1
+
+    def __len__(self):
+        return len(self.keys) if self.index is None else len(self.index)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.to_numpy())
+
+    def __getstate__(self):
+        # memory-mapped keys are mapped again by the worker instead of being pickled
+        state = self.__dict__.copy()
+        if self.path is not None:
+            state["keys"] = None
+            state["index"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.path is not None:
+            self.keys = np.load(self.path, mmap_mode="r")
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} of {len(self)} values" + (f" from {self.path}>" if self.path else ">")
+
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.approx import ApproxHasNoDuplicatesAssertion, ApproxNotInColumnAssertion
+
+N_ROWS = 1_000_000
+
+
+@pytest.fixture(scope="module")
+def unique() -> pd.Series:
+    return pd.Series(np.random.default_rng(0).permutation(3 * N_ROWS)[:N_ROWS])
+
+
+def test_unique_column_passes(unique):
+    assertion = ApproxHasNoDuplicatesAssertion(unique)
+    assert assertion.run()
+
+
+def test_skewed_duplicates_fail(unique):
+    # one value repeated 1000 times
+    column = unique.where(np.arange(N_ROWS) % 1000 != 0, unique.iloc[0])
+    assertion = ApproxHasNoDuplicatesAssertion(column)
+    assert not assertion.run()
+    assert assertion.failure.n_failed == column.duplicated().sum()
+
+
+def test_spread_duplicates_fail(unique):
+    # 2% of rows repeat another row once, far below the HyperLogLog error bound
+    column = unique.copy()
+    column.iloc[:N_ROWS // 50] = unique.iloc[N_ROWS // 2:N_ROWS // 2 + N_ROWS // 50].to_numpy()
+    assertion = ApproxHasNoDuplicatesAssertion(column)
+    assert not assertion.run()
+    assert assertion.failure.n_failed == N_ROWS // 50
+
+
+def test_single_duplicate_fails():
+    column = pd.Series(np.arange(100_000))
+    column.iloc[-1] = 7
+    assertion = ApproxHasNoDuplicatesAssertion(column)
+    assert not assertion.run()
+    assert assertion.failure.positions == [99_999]
+
+
+def test_too_many_candidates_fail_as_estimate(unique):
+    column = pd.Series(np.arange(N_ROWS) % 1000)
+    assertion = ApproxHasNoDuplicatesAssertion(column, max_candidates=10_000)
+    assert not assertion.run()
+
+
+def test_large_unique_column_passes(unique):
+    # false positives of the filter alone flag more than `max_candidates` rows
+    strings = unique.astype(str)
+    assert ApproxHasNoDuplicatesAssertion(strings, max_candidates=500, bloom_bytes=2**16, max_passes=100).run()
+    assertion = ApproxHasNoDuplicatesAssertion(strings, max_candidates=500, bloom_bytes=2**16)
+    assert assertion.run()
+    assert assertion.estimate.startswith("estimated")
+
+
+def test_flagged_rows_are_rechecked_in_batches(unique):
+    column = unique.copy()
+    column.iloc[-1] = column.iloc[5]
+    assertion = ApproxHasNoDuplicatesAssertion(column, max_candidates=50_000, bloom_bytes=2**17, max_passes=100)
+    assert not assertion.run()
+    assert assertion.failure.positions == [N_ROWS - 1]
+    assert assertion.estimate is None
+
+
+def test_not_in_column_rechecks_flagged_rows():
+    column = pd.Series(np.arange(10_000))
+    assert ApproxNotInColumnAssertion(column, values=list(range(20_000, 30_000))).run()
+    assertion = ApproxNotInColumnAssertion(column, values=[5, 50_000])
+    assert not assertion.run()
+    assert assertion.failure.values == [5]
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pandas as pd
+import pytest
+
+from assertions.columns import LenIsAssertion
+from core.asyncpipe import AsyncTestPipe, Dataset
+
+
+def _dataset(name, source, length=3) -> Dataset:
+    return Dataset(name, source, [lambda df: LenIsAssertion(df["id"], length)])
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({"id": [1, 2, 3]})
+
+
+def test_failed_loader_keeps_checked_results():
+    def broken():
+        raise OSError("unreachable")
+
+    pipe = AsyncTestPipe("daily", [_dataset("a", _frame), _dataset("b", broken), _dataset("c", _frame)], reporters=[])
+    with pytest.raises(OSError):
+        asyncio.run(pipe.run())
+    assert list(pipe.results) == ["a"] and pipe.results["a"]
+    assert pipe.skipped == ["b", "c"]
+
+
+def test_fail_fast_lists_skipped_datasets():
+    datasets = [_dataset("a", _frame), _dataset("b", _frame, length=4), _dataset("c", _frame)]
+    pipe = AsyncTestPipe("daily", datasets, prefetch=0, reporters=[])
+    results = asyncio.run(pipe.run(fail_fast=True))
+    assert list(results) == ["a", "b"] and pipe.skipped == ["c"]
+
+
+def test_shutdown_doesnt_block_event_loop():
+    def slow():
+        time.sleep(0.5)
+        return _frame()
+
+    async def main():
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        # "a" fails, the prefetched slow load of "b" is still running when the pipe stops
+        pipe = AsyncTestPipe("daily", [_dataset("a", _frame, length=4), _dataset("b", slow)], reporters=[])
+        await pipe.run(fail_fast=True)
+        task.cancel()
+        ticks.append(time.perf_counter())
+        return max(later - earlier for earlier, later in zip(ticks, ticks[1:]))
+
+    assert asyncio.run(main()) < 0.25
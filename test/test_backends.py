@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import (HasNoDuplicatesAssertion, HasSameDataAssertion, InColumnAssertion, NotInColumnAssertion,
+                                UrlColumnAssertion)
+from assertions.df import AreSomeAssertion as FramesAreSome, HasSameDataAssertion as FramesHaveSameData, HasSameShape, ShapeIs
+from core import testpipe
+from core.backends import get_backend, isin
+from core.exceptions import ValidationError
+from core.valueset import ValueSet
+
+pa = pytest.importorskip("pyarrow")
+pl = pytest.importorskip("polars")
+
+COLUMNS = {
+    "int": [1, 2, 3],
+    "float_nan": [1.0, np.nan, 3.0],
+    "string": ["a", "b", None],
+    "duplicated": [1, 2, 1],
+    "empty": [],
+}
+VALUES = [[1], ["x"], ["missing"], ["a", 2], [], [1.0, 2.5]]
+
+
+def _native(values, backend):
+    column = pd.Series(values, dtype=float if values == [] else None)
+    if backend == "pyarrow":
+        return pa.array(column, from_pandas=True)
+    if backend == "polars":
+        return pl.from_pandas(column)
+    return column
+
+
+def _status(assertion) -> str:
+    assertion.run()
+    return assertion.status
+
+
+@pytest.mark.parametrize("backend", ["pyarrow", "polars"])
+@pytest.mark.parametrize("values", VALUES, ids=repr)
+@pytest.mark.parametrize("name", COLUMNS)
+def test_isin_parity(backend, values, name):
+    data = COLUMNS[name]
+    if values == ["missing"]:
+        # pandas matches None only to None and NaN only to NaN, arrow and polars have a single null
+        values = [None if name == "string" else np.nan]
+    expected = isin(_native(data, "pandas"), values).tolist()
+    assert isin(_native(data, backend), values).tolist() == expected
+    for cls in (InColumnAssertion, NotInColumnAssertion):
+        assert _status(cls(_native(data, backend), values)) == _status(cls(_native(data, "pandas"), values))
+
+
+@pytest.mark.parametrize("backend", ["pyarrow", "polars"])
+@pytest.mark.parametrize("name", COLUMNS)
+def test_duplicated_parity(backend, name):
+    data = COLUMNS[name]
+    column = _native(data, backend)
+    assert get_backend(column).duplicated(column).tolist() == pd.Series(data, dtype=object).duplicated().tolist()
+    assert _status(HasNoDuplicatesAssertion(column)) == _status(HasNoDuplicatesAssertion(_native(data, "pandas")))
+
+
+@pytest.mark.parametrize("backend", ["pyarrow", "polars"])
+@pytest.mark.parametrize("first, second", [
+    ([1, 2, 3], [1, 2, 3]),
+    ([1, 2, 3], [1, 5, 3]),
+    ([1.0, np.nan], [1.0, np.nan]),
+    (["1", "2"], [1, 2]),
+    ([], []),
+])
+def test_same_data_parity(backend, first, second):
+    expected = _status(HasSameDataAssertion(_native(first, "pandas"), _native(second, "pandas")))
+    assert _status(HasSameDataAssertion(_native(first, backend), _native(second, backend))) == expected
+
+
+FRAMES = {
+    "equal": ({"a": [1, 2], "b": ["x", "y"]}, {"a": [1, 2], "b": ["x", "y"]}),
+    "changed": ({"a": [1, 2], "b": ["x", "y"]}, {"a": [1, 2], "b": ["x", None]}),
+    "nan": ({"a": [1.0, np.nan]}, {"a": [1.0, np.nan]}),
+    "dtypes": ({"a": [1, 2]}, {"a": [1.0, 2.0]}),
+    "columns": ({"a": [1], "b": [2]}, {"b": [2], "a": [1]}),
+    "shapes": ({"a": [1, 2]}, {"a": [1, 2, 3]}),
+    "empty": ({"a": pd.Series([], dtype=float)}, {"a": pd.Series([], dtype=float)}),
+}
+
+
+def _frame(data, backend):
+    frame = pd.DataFrame(data)
+    if backend == "pyarrow":
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    if backend == "polars":
+        return pl.from_pandas(frame)
+    return frame
+
+
+@pytest.mark.parametrize("backend", ["pyarrow", "polars"])
+@pytest.mark.parametrize("name", FRAMES)
+def test_frame_assertions_parity(backend, name):
+    first, second = FRAMES[name]
+    for cls in (FramesHaveSameData, FramesAreSome, HasSameShape):
+        expected = _status(cls(_frame(first, "pandas"), _frame(second, "pandas")))
+        assert _status(cls(_frame(first, backend), _frame(second, backend))) == expected, cls.name
+    assert _status(ShapeIs(_frame(first, backend), (2, -1))) == _status(ShapeIs(_frame(first, "pandas"), (2, -1)))
+
+
+@pytest.mark.parametrize("backend", ["pyarrow", "polars"])
+def test_failures_of_other_backends(backend):
+    column = _native([1, 2, 2, 3, 3, 3], backend)
+    assertion = HasNoDuplicatesAssertion(column)
+    assert not assertion.run()
+    assert (assertion.failure.n_failed, assertion.failure.positions, assertion.failure.values) == (3, [2, 4, 5], [2, 3, 3])
+    assert list(assertion.failure.sample.items()) == [(3, 3), (2, 2)]
+    assertion = NotInColumnAssertion(column, ValueSet([3]))
+    assert not assertion.run() and assertion.failure.values == [3, 3, 3]
+    urls = _native(["http://a.com", "bad url", None], backend)
+    assertion = UrlColumnAssertion(urls)
+    assert not assertion.run() and assertion.failure.positions == [1, 2]
+
+
+@pytest.mark.parametrize("backend", ["pyarrow", "polars"])
+def test_row_masks_of_other_backends(backend):
+    column = _native([1, 2, 3, 4], backend)
+    assertions = [NotInColumnAssertion(column, [2, 4]), HasSameDataAssertion(column, _native([1, 2, 0, 4], backend))]
+    result = testpipe.TestPipe("masks", assertions, reporters=[]).run(row_masks=True)
+    assert result.row_mask().to_bool().tolist() == [False, True, True, True]
+
+
+def test_unsupported_data_raises():
+    with pytest.raises(ValidationError):
+        get_backend([1, 2, 3])
+    with pytest.raises(ValidationError):
+        NotInColumnAssertion([1, 2, 3], [1]).run()
+    # columns of different backends aren't compared
+    assertion = HasSameDataAssertion(pd.Series([1]), pa.array([1]))
+    assert not assertion.run() and "different backends" in assertion.error_message
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import HasNoDuplicatesAssertion, InColumnAssertion, LenIsAssertion, NotInColumnAssertion
+from core import testpipe
+from core.batch import PipeTemplate
+from core.exceptions import ValidationError
+from core.reporters import JsonLinesReporter
+
+
+FACTORIES = [lambda df: NotInColumnAssertion(df["country"], ["XX"]),
+             lambda df: InColumnAssertion(df["country"], ["AZ", "TR"]),
+             lambda df: HasNoDuplicatesAssertion(df["id"]),
+             lambda df: LenIsAssertion(df["id"], 50)]
+
+
+@pytest.fixture
+def partitions():
+    df = pd.DataFrame({"id": np.arange(50), "country": np.where(np.arange(50) % 2, "AZ", "TR")})
+    return {"clean": df,
+            "blocked": df.assign(country=df["country"].where(df["id"] != 7, "XX")),
+            "duplicated": df.assign(id=df["id"].where(df["id"] != 3, 4)),
+            "short": df.iloc[:20],
+            "empty": df.iloc[:0]}
+
+
+def _outcomes(result):
+    return [(r.status, r.message) for r in result.results]
+
+
+def _baseline(partitions):
+    return {partition: _outcomes(testpipe.TestPipe(f"daily/{partition}", [factory(df) for factory in FACTORIES], reporters=[]).run())
+            for partition, df in partitions.items()}
+
+
+@pytest.mark.parametrize("workers, transport, as_arrow", [(None, "arrow", False), (2, "arrow", False),
+                                                          (2, "arrow", True), (2, "pickle", False)])
+def test_partitions_as_separate_pipes(partitions, workers, transport, as_arrow):
+    if transport == "arrow":
+        pytest.importorskip("pyarrow")
+    result = PipeTemplate("daily", FACTORIES).map(partitions, workers=workers, transport=transport, as_arrow=as_arrow, reporters=[])
+    assert list(result.results) == list(partitions)
+    assert [result.results[partition].name for partition in partitions] == [f"daily/{partition}" for partition in partitions]
+    baseline = _baseline(partitions)
+    if as_arrow:
+        # arrow arrays render failed values in their own types, statuses are the same
+        assert {partition: [status for status, _ in outcomes] for partition, outcomes in baseline.items()} == \
+               {partition: [r.status for r in pipe.results] for partition, pipe in result.results.items()}
+    else:
+        assert {partition: _outcomes(pipe) for partition, pipe in result.results.items()} == baseline
+    assert not result and (result.n_passed, len(result)) == (1, 5)
+    assert [(partition, failed.index) for partition, failed in result.failed()] == \
+           [("blocked", 1), ("duplicated", 3), ("short", 4), ("empty", 2), ("empty", 4)]
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_paths_are_read_by_workers(partitions, tmp_path, extension):
+    pytest.importorskip("pyarrow")
+    paths = {}
+    for partition in ["clean", "blocked"]:
+        paths[partition] = tmp_path / f"{partition}.{extension}"
+        frame = partitions[partition].assign(extra=1.5)
+        frame.to_csv(paths[partition], index=False) if extension == "csv" else frame.to_parquet(paths[partition])
+    template = PipeTemplate("daily", FACTORIES, columns=["id", "country"])
+    result = template.map(paths.items(), workers=2, reporters=[])
+    assert {partition: _outcomes(pipe) for partition, pipe in result.results.items()} == \
+           {partition: outcomes for partition, outcomes in _baseline(partitions).items() if partition in paths}
+
+
+def test_lazy_partitions_and_reporters(partitions, tmp_path):
+    pytest.importorskip("pyarrow")
+    consumed = []
+
+    def lazy():
+        for partition, df in partitions.items():
+            consumed.append(partition)
+            yield partition, df
+
+    path = tmp_path / "results.jsonl"
+    result = PipeTemplate("daily", FACTORIES).map(lazy(), workers=2, pending=1, reporters=[JsonLinesReporter(path)])
+    assert consumed == list(partitions) and list(result.results) == list(partitions)
+    assert path.read_text().count('"type": "pipe"') == len(partitions)
+    assert result.to_dict()["partitions"]["empty"]["failed"] == 2
+
+
+def test_invalid_templates_and_partitions(partitions):
+    with pytest.raises(ValidationError):
+        PipeTemplate("daily", [NotInColumnAssertion(partitions["clean"]["country"], ["XX"])])
+    with pytest.raises(ValidationError):
+        PipeTemplate("daily", [lambda df: df]).map(partitions, reporters=[])
+    with pytest.raises(ValidationError):
+        PipeTemplate("daily", FACTORIES).map([("a", partitions["clean"]), ("a", partitions["short"])], reporters=[])
+    with pytest.raises(ValidationError):
+        PipeTemplate("daily", FACTORIES).map(partitions, workers=0, reporters=[])
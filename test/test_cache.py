@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import HasNoDuplicatesAssertion, InColumnAssertion, NotInColumnAssertion
+from core import testpipe
+from core.backends import PandasBackend
+from core.cache import ComputationCache
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = {"isin": 0, "duplicated": 0}
+    isin, duplicated = PandasBackend.isin, PandasBackend.duplicated
+
+    def counted_isin(self, column, values):
+        calls["isin"] += 1
+        return isin(self, column, values)
+
+    def counted_duplicated(self, column):
+        calls["duplicated"] += 1
+        return duplicated(self, column)
+
+    monkeypatch.setattr(PandasBackend, "isin", counted_isin)
+    monkeypatch.setattr(PandasBackend, "duplicated", counted_duplicated)
+    return calls
+
+
+def _assertions(column, values):
+    return [NotInColumnAssertion(column, values), InColumnAssertion(column, values), HasNoDuplicatesAssertion(column),
+            HasNoDuplicatesAssertion(column)]
+
+
+def _statuses(assertions):
+    for assertion in assertions:
+        assertion.run()
+    return [assertion.status for assertion in assertions]
+
+
+@pytest.mark.parametrize("data, values", [
+    ([1, 2, 3], [2]),
+    ([1, 2, 2], [5]),
+    ([1.0, np.nan, np.nan], [np.nan]),
+    (["a", None, "b"], ["a", "x"]),
+    ([], [1]),
+])
+def test_pipe_results_match_uncached_runs(calls, data, values):
+    column = pd.Series(data, dtype=float if data == [] else None)
+    expected = _statuses(_assertions(column, values))
+    calls.update(isin=0, duplicated=0)
+    result = testpipe.TestPipe("cache", _assertions(column, values), reporters=[]).run(fuse=False)
+    assert [r.status for r in result.results] == expected
+    # every derived computation runs once per pipe run
+    assert calls == {"isin": 1, "duplicated": 1}
+
+
+def test_values_of_the_same_column_are_cached_apart(calls):
+    column = pd.Series([1, 2, 3])
+    assertions = [NotInColumnAssertion(column, [1]), NotInColumnAssertion(column, [9]), NotInColumnAssertion(column, [1])]
+    result = testpipe.TestPipe("cache", assertions, reporters=[]).run(fuse=False)
+    assert [r.status for r in result.results] == ["failed", "passed", "failed"]
+    assert calls["isin"] == 3
+
+
+def test_cache_keeps_its_budget():
+    cache = ComputationCache(max_bytes=2000)
+    columns = [pd.Series(np.arange(100)) for _ in range(10)]
+    for column in columns:
+        assert cache.duplicated(column).sum() == 0
+    assert 0 < cache.n_bytes <= 2000 and len(cache) < 10
+    # results larger than the budget are computed, but not stored
+    large = pd.Series(np.arange(10_000))
+    assert not cache.isin(large, [5_000_000]).any()
+    assert all(entry[1][0] is not large for entry in cache._entries.values())
+
+
+def test_changed_objects_are_computed_again():
+    cache = ComputationCache()
+    column = pd.Series([1, 1])
+    assert cache.duplicated(column).tolist() == [False, True]
+    # the same object of another length, e.g. after an append in place
+    column.loc[2] = 2
+    assert cache.duplicated(column).tolist() == [False, True, False]
+    assert cache.misses == 2
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ComputationCache(max_bytes=0)
+    column = pd.Series([1, 2])
+    cache.isin(column, [1])
+    cache.isin(column, [1])
+    assert len(cache) == 0 and cache.misses == 2
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.approx import ApproxHasNoDuplicatesAssertion
+from assertions.columns import HasNoDuplicatesAssertion, InColumnAssertion, LenIsAssertion
+from core.chunked import ChunkedTestPipe, SortedHashSet
+from core.exceptions import ValidationError
+
+
+def _pipe(source, **kwargs) -> ChunkedTestPipe:
+    return ChunkedTestPipe("orders", source, chunksize=10, reporters=[], assertions=[
+        lambda df: LenIsAssertion(df["id"], 0),
+        lambda df: HasNoDuplicatesAssertion(df["id"])], **kwargs)
+
+
+@pytest.mark.parametrize("extension", ["frame", "csv", "parquet"])
+def test_empty_source_is_zero_rows(tmp_path, extension):
+    df = pd.DataFrame({"id": pd.Series([], dtype=np.int64)})
+    source = tmp_path / f"orders.{extension}"
+    if extension == "frame":
+        source = df
+    elif extension == "csv":
+        df.to_csv(source, index=False)
+    else:
+        pytest.importorskip("pyarrow")
+        df.to_parquet(source)
+    result = _pipe(source).run()
+    assert result, [result.status for result in result.results]
+
+
+def test_empty_iterable_has_no_columns():
+    with pytest.raises(ValidationError):
+        _pipe(iter([])).run()
+
+
+def test_in_column_of_empty_source_fails():
+    pipe = ChunkedTestPipe("orders", pd.DataFrame({"id": []}), reporters=[],
+                           assertions=[lambda df: InColumnAssertion(df["id"], [1])])
+    assert not pipe.run()
+
+
+def test_duplicates_are_reported_by_rows_of_the_source():
+    ids = np.arange(35)
+    ids[[12, 25, 31]] = [3, 3, 20]
+    result = _pipe(pd.DataFrame({"id": ids})).run()
+    failure = result.results[1].failure
+    assert failure.message == "Column contains duplicates"
+    assert (failure.n_failed, failure.n_total) == (3, 35)
+    assert failure.positions == [12, 25, 31]
+    assert failure.values == [3, 3, 20]
+
+
+@pytest.mark.parametrize("assertion", [HasNoDuplicatesAssertion, ApproxHasNoDuplicatesAssertion])
+def test_duplicates_across_chunks_of_different_dtypes(tmp_path, assertion):
+    # the first chunk is int64, the second one float64 because of the missing value
+    path = tmp_path / "ids.csv"
+    path.write_text("id,x\n1,a\n2,b\n1,c\n,d\n")
+    assert pd.read_csv(path)["id"].duplicated().any()
+    pipe = ChunkedTestPipe("ids", path, chunksize=2, reporters=[], assertions=[lambda df: assertion(df["id"])])
+    assert not pipe.run()
+
+
+def test_sorted_hash_set_matches_set():
+    rng = np.random.default_rng(0)
+    hashes, seen = SortedHashSet(), set()
+    for size in rng.integers(0, 300, 40):
+        chunk = rng.integers(0, 2000, size).astype(np.uint64)
+        assert hashes.contains(chunk).tolist() == [value in seen for value in chunk.tolist()]
+        hashes.add(chunk)
+        seen.update(chunk.tolist())
+    assert len(hashes) == len(seen)
+    assert all(np.all(level[1:] > level[:-1]) for level in hashes.levels)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.diff import diff_frames
+
+
+@pytest.fixture
+def frames():
+    df1 = pd.DataFrame({"key": np.arange(100, dtype=np.int64), "value": np.arange(100)})
+    df2 = df1.sample(frac=1, random_state=0).reset_index(drop=True)
+    df2.loc[df2["key"] == 7, "value"] = -1
+    return df1, df2
+
+
+@pytest.mark.parametrize("partitions", [1, 2, 4])
+@pytest.mark.parametrize("dtype", ["float64", "category", "Int64", "uint64"])
+def test_partitions_of_keys_with_different_dtypes(frames, partitions, dtype):
+    df1, df2 = frames
+    difference = diff_frames(df1, df2.astype({"key": dtype}), ["key"], partitions=partitions)
+    assert (difference.n_added, difference.n_removed, difference.n_changed) == (0, 0, 1)
+    assert difference.samples["changed"] == [7]
+
+
+@pytest.mark.parametrize("partitions", [1, 2, 4])
+def test_partitions_of_object_and_category_keys(frames, partitions):
+    df1, df2 = frames
+    df1, df2 = df1.astype({"key": str}), df2.astype({"key": str}).astype({"key": "category"})
+    difference = diff_frames(df1, df2, ["key"], partitions=partitions)
+    assert (difference.n_added, difference.n_removed, difference.n_changed) == (0, 0, 1)
+
+
+@pytest.mark.parametrize("partitions", [1, 3])
+def test_partitions_of_arrow_and_polars_frames(frames, partitions):
+    pa = pytest.importorskip("pyarrow")
+    pl = pytest.importorskip("polars")
+    df1, df2 = frames
+    difference = diff_frames(pa.Table.from_pandas(df1), pl.from_pandas(df2.astype({"key": "float64"})), ["key"],
+                             partitions=partitions, with_rows=True)
+    assert (difference.n_added, difference.n_removed, difference.n_changed) == (0, 0, 1)
+    assert np.flatnonzero(difference.rows1).tolist() == [7]
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions import columns, df
+from core.equality import compare_frames, compare_series
+
+
+def _status(assertion) -> str:
+    assertion.run()
+    return assertion.status
+
+
+SERIES = {
+    "equal": (pd.Series([1, 2, 3]), pd.Series([1, 2, 3])),
+    "changed": (pd.Series([1, 2, 3]), pd.Series([1, 5, 3])),
+    "nan": (pd.Series([1.0, np.nan]), pd.Series([1.0, np.nan])),
+    "nan and value": (pd.Series([1.0, np.nan]), pd.Series([1.0, 2.0])),
+    "none": (pd.Series(["a", None]), pd.Series(["a", None])),
+    "dtypes": (pd.Series([1, 2]), pd.Series([1.0, 2.0])),
+    "empty": (pd.Series([], dtype=float), pd.Series([], dtype=float)),
+    "categories": (pd.Series(["a", "b"], dtype="category"), pd.Series(["a", "b"], dtype=pd.CategoricalDtype(["b", "a"]))),
+    "nullable": (pd.Series([1, None], dtype="Int64"), pd.Series([1, None], dtype="Int64")),
+    "lengths": (pd.Series([1, 2]), pd.Series([1, 2, 3])),
+}
+
+
+@pytest.mark.parametrize("name", SERIES)
+def test_series_assertions_match_pandas(name):
+    column1, column2 = SERIES[name]
+    same_data = len(column1) == len(column2) and bool((column1.to_numpy() == column2.to_numpy()).all())
+    if isinstance(column1.dtype, pd.Int64Dtype):
+        # comparisons of nullable values are NA
+        same_data = False
+    assert _status(columns.HasSameDataAssertion(column1, column2)) == ("passed" if same_data else "failed")
+    assert _status(columns.AreSomeAssertion(column1, column2)) == ("passed" if column1.equals(column2) else "failed")
+
+
+FRAMES = {
+    "equal": (pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}), pd.DataFrame({"a": [1, 2], "b": ["x", "y"]})),
+    "changed": (pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}), pd.DataFrame({"a": [1, 2], "b": ["x", "z"]})),
+    "nan": (pd.DataFrame({"a": [1.0, np.nan]}), pd.DataFrame({"a": [1.0, np.nan]})),
+    "dtypes": (pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [1.0, 2.0]})),
+    "columns": (pd.DataFrame({"a": [1], "b": [2]}), pd.DataFrame({"a": [1], "c": [2]})),
+    "shapes": (pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [1, 2, 3]})),
+    "index": (pd.DataFrame({"a": [1, 2]}), pd.DataFrame({"a": [1, 2]}, index=[5, 6])),
+    "empty": (pd.DataFrame({"a": []}), pd.DataFrame({"a": []})),
+}
+
+
+@pytest.mark.parametrize("name", FRAMES)
+def test_frame_assertions_match_pandas(name):
+    df1, df2 = FRAMES[name]
+    same_data = set(df1.columns) == set(df2.columns) and df1.shape == df2.shape and bool((df1.values == df2.values).all())
+    assert _status(df.HasSameDataAssertion(df1, df2)) == ("passed" if same_data else "failed")
+    assert _status(df.AreSomeAssertion(df1, df2)) == ("passed" if df1.equals(df2) else "failed")
+
+
+def test_columns_in_other_order_are_compared_by_name():
+    df1 = pd.DataFrame({"a": [1, 2], "b": [3, 4]})
+    assert _status(df.HasSameDataAssertion(df1, df1[["b", "a"]])) == "passed"
+    assert _status(df.AreSomeAssertion(df1, df1[["b", "a"]])) == "failed"
+
+
+@pytest.mark.parametrize("block_rows", [1, 7, 2**16])
+def test_differences_are_found_in_every_block(block_rows):
+    column1 = pd.Series(np.arange(100))
+    column2 = column1.where(~column1.isin([3, 4, 50]), -1)
+    difference = compare_series(column1, column2, block_rows=block_rows)
+    # the scan stops at the first differing block
+    assert difference.columns[None] == ([(3, 4)] if block_rows == 1 else [(3, 5)] if block_rows == 7 else [(3, 5), (50, 51)])
+    assert compare_series(column1, column1.copy(), block_rows=block_rows).equal
+
+
+def test_all_differing_columns_are_reported():
+    df1 = pd.DataFrame({"a": np.arange(10), "b": np.arange(10.0), "c": list("abcdefghij")})
+    df2 = df1.assign(b=df1["b"] + (df1["a"] == 9), c=df1["c"].str.upper())
+    difference = compare_frames(df1, df2)
+    assert difference.columns == {"b": [(9, 10)], "c": [(0, 10)]}
+    assert not compare_frames(df1, df1.astype({"a": "float64"})).equal
+    assert compare_frames(df1, df1.astype({"a": "float64"}), check_dtype=False).equal
+
+
+def test_hashed_comparison_matches_scan():
+    column = pd.Series(np.arange(1000))
+    for other in (column.copy(), column.where(column != 999, 0)):
+        scanned = compare_series(column, other)
+        hashed = compare_series(column, other, use_hash=True)
+        assert scanned.columns == hashed.columns
@@ -0,0 +1,59 @@
+import multiprocessing as mp
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.base import FnAssertion
+from assertions.columns import HasNoDuplicatesAssertion, NotInColumnAssertion
+from core import executors, testpipe
+from core.exceptions import ValidationError
+from core.reporters import Reporter
+
+
+def _assertions():
+    column = pd.Series(np.arange(100))
+    return [NotInColumnAssertion(column, [5]), HasNoDuplicatesAssertion(column), NotInColumnAssertion(column, [500])]
+
+
+def test_process_backend_ships_outcomes():
+    assertions = _assertions()
+    executors.run_assertions(assertions, workers=2, backend="process")
+    assert [a.status for a in assertions] == ["failed", "passed", "passed"]
+    assert executors._WORKER_ASSERTIONS is None
+
+
+def test_process_backend_without_fork(monkeypatch):
+    monkeypatch.setattr(mp, "get_all_start_methods", lambda: ["spawn"])
+    assertions = _assertions()
+    executors.run_assertions(assertions, workers=2, backend="process")
+    assert [a.status for a in assertions] == ["failed", "passed", "passed"]
+
+
+def test_weak_inputs_without_fork_raise(monkeypatch):
+    monkeypatch.setattr(mp, "get_all_start_methods", lambda: ["spawn"])
+    assertions = _assertions()
+    column = assertions[0].column
+    for assertion in assertions:
+        assertion.hold_weakly()
+    with pytest.raises(ValidationError):
+        executors.run_assertions(assertions, workers=2, backend="process")
+    del column
+
+
+class _Indices(Reporter):
+    def __init__(self):
+        self.indices = []
+
+    def on_result(self, pipe, result):
+        self.indices.append(result.index)
+
+
+@pytest.mark.parametrize("fail_fast", [False, True])
+def test_parallel_results_are_reported_in_declared_order(fail_fast):
+    # earlier assertions finish later
+    assertions = [FnAssertion(time.sleep, delay) for delay in (0.3, 0.2, 0.1, 0)]
+    reporter = _Indices()
+    result = testpipe.TestPipe("order", assertions, reporters=[reporter]).run(workers=4, fail_fast=fail_fast)
+    assert result and reporter.indices == [1, 2, 3, 4]
@@ -0,0 +1,36 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.base import FnAssertion
+from assertions.columns import InColumnAssertion, LenIsAssertion
+from assertions.df import ShapeIs
+from core import testpipe
+
+
+def _fail():
+    raise AssertionError("gatekeeper")
+
+
+def _slow():
+    time.sleep(0.2)
+
+
+@pytest.mark.parametrize("fuse", [True, False])
+def test_fail_fast_stops_at_first_declared_failure(fuse):
+    df = pd.DataFrame({"a": np.arange(10)})
+    assertions = [ShapeIs(df, (5, 1)), InColumnAssertion(df["a"], [100]), LenIsAssertion(df["a"], 10)]
+    result = testpipe.TestPipe("gate", assertions, reporters=[]).run(fail_fast=True, fuse=fuse)
+    assert [r.status for r in result.results] == ["failed", "skipped", "skipped"]
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_parallel_fail_fast_doesnt_start_the_rest(backend):
+    assertions = [FnAssertion(_fail)] + [FnAssertion(_slow) for _ in range(8)]
+    result = testpipe.TestPipe("parallel", assertions, reporters=[]).run(workers=2, backend=backend, fail_fast=True)
+    statuses = [r.status for r in result.results]
+    assert statuses[0] == "failed"
+    # only the assertion submitted together with the failed one may still run
+    assert statuses.count("skipped") >= 7
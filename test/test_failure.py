@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import HasNoDuplicatesAssertion, NotInColumnAssertion
+from assertions.df import HasSameDataAssertion
+from core.failure import MAX_VALUES, FailureDetail, first_positions
+
+
+@pytest.mark.parametrize("n_rows, k, block_rows", [(0, 5, 4), (10, 5, 4), (10, 50, 4), (1000, 20, 64)])
+def test_first_positions(n_rows, k, block_rows):
+    mask = np.arange(n_rows) % 3 == 1
+    assert first_positions(mask, k, block_rows).tolist() == np.flatnonzero(mask)[:k].tolist()
+
+
+def test_failures_of_large_columns_are_bounded():
+    column = pd.Series(np.arange(1_000_000) % 10)
+    assertion = NotInColumnAssertion(column, [3, 7])
+    assert not assertion.run()
+    failure = assertion.failure
+    assert failure.n_failed == column.isin([3, 7]).sum() and failure.n_total == len(column)
+    assert failure.positions == np.flatnonzero(column.isin([3, 7]))[:MAX_VALUES].tolist()
+    assert failure.values == column.iloc[failure.positions].tolist()
+    assert str(failure).endswith(", ...") and len(str(failure)) < 1000
+
+
+def test_duplicates_sample_keeps_the_most_duplicated_values():
+    column = pd.Series(np.concatenate([np.arange(1000), np.arange(100), np.zeros(5)]))
+    assertion = HasNoDuplicatesAssertion(column)
+    assert not assertion.run()
+    failure = assertion.failure
+    assert failure.n_failed == column.duplicated().sum()
+    assert len(failure.sample) <= MAX_VALUES and next(iter(failure.sample.items())) == (0.0, 7)
+    assert all(count > 1 for count in failure.sample.values())
+
+
+def test_frame_differences_are_not_rendered_with_data():
+    df1 = pd.DataFrame({"a": np.arange(100_000), "b": np.arange(100_000).astype(str)})
+    df2 = df1.assign(b=df1["b"].where(df1["a"] != 5, "x"))
+    assertion = HasSameDataAssertion(df1, df2)
+    assert not assertion.run()
+    assert len(assertion.error_message) < 1000 and "x" not in assertion.error_message
+
+
+def test_masks_and_values_of_other_backends():
+    pa = pytest.importorskip("pyarrow")
+    failure = FailureDetail.from_mask("bad", [False, True, True], pa.array(["a", None, "c"]), k=1)
+    assert (failure.n_failed, failure.n_total, failure.positions, failure.values) == (2, 3, [1], [None])
+    assert str(failure) == "bad: 2/3 failed, values: [None], ..., positions: [1], ..."
+
+
+def test_messages_without_counts():
+    assert str(FailureDetail("different shapes")) == "different shapes"
+    assert str(FailureDetail("bad", sample={"a": 2})) == "bad\n\t{'a': 2}"
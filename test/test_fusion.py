@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import InColumnAssertion, LenIsAssertion, NotInColumnAssertion
+from assertions.df import ShapeIs
+from core import testpipe
+from core.reporters import Reporter
+
+
+class NamesReporter(Reporter):
+    def __init__(self):
+        self.names = []
+
+    def on_result(self, pipe, result):
+        self.names.append(f"{result.index}|{result.name}")
+
+
+def _assertions(df: pd.DataFrame) -> list:
+    return [ShapeIs(df, (10, 1)), InColumnAssertion(df["a"], [3]), LenIsAssertion(df["a"], 10),
+            NotInColumnAssertion(df["a"], [100])]
+
+
+def test_fused_run_reports_in_declared_order():
+    df = pd.DataFrame({"a": np.arange(10)})
+    reporter = NamesReporter()
+    result = testpipe.TestPipe("order", _assertions(df), reporters=[reporter]).run()
+    assert [name.split("|")[0] for name in reporter.names] == ["1", "2", "3", "4"]
+    assert result.passed
+
+
+def test_fused_and_unfused_runs_agree():
+    df = pd.DataFrame({"a": np.arange(10)})
+    assertions = _assertions(df) + [NotInColumnAssertion(df["a"], [2])]
+    fused = testpipe.TestPipe("fused", assertions, reporters=[]).run(fuse=True)
+    statuses = [r.status for r in fused.results]
+    unfused = testpipe.TestPipe("unfused", assertions, reporters=[]).run(fuse=False)
+    assert statuses == [r.status for r in unfused.results] == ["passed", "passed", "passed", "passed", "failed"]
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+@pytest.mark.parametrize("column, values", [
+    (pd.Series(pd.to_datetime(["2020-01-01"])), ["2020-01-01"]),
+    (pd.Series([True, False]), [1]),
+    (pd.Series([1, 2]), [1.0]),
+    (pd.Series([1.0, 2.5]), np.array([2], dtype=np.uint64)),
+])
+def test_fused_lookups_agree_with_isin(column, values):
+    for fuse in (True, False):
+        pipe = testpipe.TestPipe("isin", [NotInColumnAssertion(column, values), InColumnAssertion(column, values)],
+                                 reporters=[])
+        result = pipe.run(fuse=fuse)
+        expected = bool(column.isin(values).any())
+        assert [r.status for r in result.results] == (["failed", "passed"] if expected else ["passed", "failed"])
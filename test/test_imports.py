@@ -0,0 +1,59 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.imports import LAZY_MODULES, MODULES, compare
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SCRIPT = """
+import json, sys
+import {modules}
+loaded = {{"import": [name for name in {lazy!r} if name in sys.modules]}}
+{use}
+loaded["use"] = [name for name in {lazy!r} if name in sys.modules]
+print(json.dumps(loaded))
+"""
+
+
+def _loaded(use: str = "") -> dict:
+    script = _SCRIPT.format(modules=", ".join(MODULES), lazy=LAZY_MODULES, use=use)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, env=env, cwd=ROOT).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_optional_modules_are_not_imported_eagerly():
+    loaded = _loaded("""
+import pandas as pd
+from assertions.columns import InColumnAssertion, NotInColumnAssertion
+from core.reporters import JUnitReporter, QuietReporter
+from core.testpipe import TestPipe
+column = pd.Series(["a", "b"])
+TestPipe("quiet", [NotInColumnAssertion(column, ["c"]), InColumnAssertion(column, ["a"])], reporters=[QuietReporter()]).run()
+""")
+    assert loaded == {"import": [], "use": []}
+
+
+def test_colorama_is_imported_by_console_output():
+    pytest.importorskip("colorama")
+    loaded = _loaded("""
+import pandas as pd
+from assertions.columns import NotInColumnAssertion
+from core.testpipe import TestPipe
+TestPipe("console", [NotInColumnAssertion(pd.Series([1, 2]), [3])]).run()
+""")
+    assert loaded == {"import": [], "use": ["colorama"]}
+
+
+def test_regressions_against_baseline():
+    baseline = [{"module": "a", "seconds": 0.02}, {"module": "b", "seconds": 0.001}, {"module": "c", "seconds": 0.02}]
+    results = [{"module": "a", "seconds": 0.05}, {"module": "b", "seconds": 0.5}, {"module": "c", "seconds": 0.03},
+               {"module": "d", "seconds": 1.0}]
+    # imports below the noise floor of the baseline aren't compared, new modules have no baseline
+    assert [result["module"] for result in compare(results, baseline, threshold=2.0)] == ["a"]
+    assert [result.get("time_ratio") for result in results] == [2.5, 1.0, 1.5, None]
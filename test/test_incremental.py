@@ -0,0 +1,139 @@
+import hashlib
+import io
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import HasNoDuplicatesAssertion, InColumnAssertion, LenIsAssertion, NotInColumnAssertion
+from core import incremental
+from core.incremental import IncrementalTestPipe, StateStore
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame({"id": np.arange(1000), "status": np.arange(1000) % 7})
+
+
+def _pipe(source, state, values=(1,), not_in=(9,)) -> IncrementalTestPipe:
+    return IncrementalTestPipe("orders", source, state=state, chunksize=100, reporters=[], assertions=[
+        lambda df: InColumnAssertion(df["status"], list(values)),
+        lambda df: NotInColumnAssertion(df["status"], list(not_in)),
+        lambda df: HasNoDuplicatesAssertion(df["id"]),
+        lambda df: LenIsAssertion(df["id"], 1000)])
+
+
+def test_unchanged_blocks_are_restored(df, tmp_path):
+    state = tmp_path / "state.sqlite"
+    assert _pipe(df, state).run()
+    pipe = _pipe(df, state)
+    assert pipe.run()
+    assert pipe.n_reduced == 0 and pipe.n_restored > 0
+
+
+def test_changed_parameters_invalidate_stored_results(df, tmp_path):
+    state = tmp_path / "state.sqlite"
+    assert _pipe(df, state).run()
+    # same version, but values and options changed: stored "passed" of the old parameters must not be restored
+    assert not _pipe(df, state, values=(99,)).run()
+    assert not _pipe(df, state, not_in=(3,)).run()
+    assert _pipe(df, state).run()
+
+
+def test_state_is_json(df, tmp_path):
+    state = tmp_path / "state.sqlite"
+    assert not _pipe(df, state, not_in=(3,)).run()
+    with sqlite3.connect(state) as connection:
+        summaries = [summary for summary, in connection.execute("SELECT summary FROM outcomes")]
+    assert summaries and all(isinstance(summary, str) for summary in summaries)
+    # failures of the blocks are restored with their details
+    pipe = _pipe(df, state, not_in=(3,))
+    result = pipe.run()
+    assert pipe.n_reduced == 0
+    assert not result and "chunk 1" in result.results[1].failure.message
+
+
+def test_pickled_summaries_are_ignored(df, tmp_path):
+    state = tmp_path / "state.sqlite"
+    assert _pipe(df, state).run()
+    with sqlite3.connect(state) as connection:
+        connection.execute("UPDATE outcomes SET summary = ?", (b"\x80\x04\x95 not json",))
+    assert StateStore(state).load("orders") == {}
+    assert _pipe(df, state).run()
+
+
+@pytest.mark.parametrize("extension", ["csv", "parquet"])
+def test_files_are_restored_without_reading(df, tmp_path, extension):
+    pytest.importorskip("pyarrow")
+    path, state = tmp_path / f"orders.{extension}", tmp_path / "state.sqlite"
+    if extension == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_parquet(path, row_group_size=300)
+    assert _pipe(path, state).run()
+    pipe = _pipe(path, state)
+    assert pipe.run()
+    assert pipe.n_read == 0 and pipe.n_reduced == 0
+    # blocks are read when stored results don't fit, e.g. after a parameter change
+    pipe = _pipe(path, state, values=(99,))
+    assert not pipe.run()
+    assert pipe.n_read == 10
+
+
+def test_appended_parquet_rows_are_validated(df, tmp_path):
+    pytest.importorskip("pyarrow")
+    path, state = tmp_path / "orders.parquet", tmp_path / "state.sqlite"
+    df.to_parquet(path, row_group_size=300)
+    assert _pipe(path, state).run()
+    pd.concat([df, df.iloc[:1]], ignore_index=True).to_parquet(path, row_group_size=300)
+    pipe = _pipe(path, state)
+    result = pipe.run()
+    assert not result and result.results[2].status == "failed"
+    assert pipe.n_read < 10
+
+
+def test_appended_csv_rows_are_hashed_from_the_last_block(df, tmp_path, monkeypatch):
+    path, state = tmp_path / "orders.csv", tmp_path / "state.sqlite"
+    df.iloc[:950].to_csv(path, index=False)
+    assert not _pipe(path, state).run()
+    scanned, scan = [], incremental.csv_blocks
+
+    def csv_blocks(file, chunksize, digest):
+        scanned.append(file.tell())
+        return scan(file, chunksize, digest)
+
+    monkeypatch.setattr("core.incremental.csv_blocks", csv_blocks)
+    df.iloc[950:].to_csv(path, index=False, header=False, mode="a")
+    pipe = _pipe(path, state)
+    assert pipe.run()
+    # the partial last block and the appended rows are hashed, only the changed block is read
+    assert scanned == [path.read_bytes().index(b"\n900,") + 1]
+    assert pipe.n_read == 1
+    pd.concat([df, df.iloc[:1]]).to_csv(path, index=False)
+    pipe = _pipe(path, state)
+    result = pipe.run()
+    assert not result and result.results[2].status == "failed" and pipe.n_read == 1
+
+
+def test_rewritten_csv_is_hashed_again(df, tmp_path):
+    path, state = tmp_path / "orders.csv", tmp_path / "state.sqlite"
+    df.to_csv(path, index=False)
+    assert _pipe(path, state).run()
+    # the same size, one row changed
+    df.assign(status=df["status"].where(df["id"] != 10, 9)).to_csv(path, index=False)
+    pipe = _pipe(path, state)
+    assert not pipe.run()
+    assert pipe.n_read == 1
+
+
+def test_csv_blocks_split_rows_as_pandas(tmp_path):
+    path = tmp_path / "notes.csv"
+    path.write_bytes(b'id,note\n1,"a\nb"\n\n2,"say ""hi"""\r\n3,c\n4,"\n"\n5,e')
+    with open(path, "rb") as file:
+        file.readline()
+        blocks = list(incremental.csv_blocks(file, 2, hashlib.blake2b()))
+    assert [n_rows for _, _, _, n_rows in blocks] == [2, 2, 1]
+    data = path.read_bytes()
+    chunks = [pd.read_csv(io.BytesIO(data[start:end]), header=None, names=["id", "note"]) for _, start, end, _ in blocks]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), pd.read_csv(path))
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from assertions.columns import UrlColumnAssertion
+from core import testpipe
+from core.validators import RegexValidator
+
+
+def test_url_violations_reuse_the_mask_of_the_run(monkeypatch):
+    calls = []
+    mask = RegexValidator.mask
+    monkeypatch.setattr(RegexValidator, "mask", lambda self, *args, **kwargs: calls.append(1) or mask(self, *args, **kwargs))
+    column = pd.Series(["https://example.com", "not a url", "http://example.org/path"])
+    pipe = testpipe.TestPipe("urls", [UrlColumnAssertion(column)], reporters=[])
+    result = pipe.run(row_masks=True)
+    assert not result
+    assert result.row_mask().to_bool().tolist() == [False, True, False]
+    assert len(calls) == 1
+
+
+def test_url_violations_depend_on_options():
+    column = pd.Series(["example.com", None])
+    assertion = UrlColumnAssertion(column, include_protocol=True, allow_na=True)
+    assert not assertion.run()
+    assert assertion.violations().tolist() == [True, False]
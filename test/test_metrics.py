@@ -0,0 +1,84 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.base import FnAssertion
+from assertions.columns import HasNoDuplicatesAssertion, InColumnAssertion, LenIsAssertion, NotInColumnAssertion
+from core import testpipe
+from core.exceptions import ValidationError
+from core.metrics import PHASES, AssertionMetrics, JsonMetricsExporter, MetricsHook, PhaseMetrics, measure
+
+
+class _Collect(MetricsHook):
+    def __init__(self):
+        self.indices, self.pipes = [], []
+
+    def on_assertion(self, index, assertion, metrics):
+        self.indices.append(index)
+
+    def on_pipe(self, metrics):
+        self.pipes.append(metrics)
+
+
+def _assertions(column):
+    return [NotInColumnAssertion(column, [5]), InColumnAssertion(column, [1]), HasNoDuplicatesAssertion(column),
+            LenIsAssertion(column, 3), FnAssertion(lambda: None)]
+
+
+@pytest.mark.parametrize("data", [[1, 2, 3], [1.0, np.nan, np.nan], []])
+@pytest.mark.parametrize("memory", [None, "tracemalloc", "rss"])
+def test_metrics_dont_change_results(data, memory):
+    column = pd.Series(data, dtype=float if data == [] else None)
+    plain = testpipe.TestPipe("plain", _assertions(column), reporters=[]).run()
+    hook = _Collect()
+    measured = testpipe.TestPipe("measured", _assertions(column), reporters=[], hooks=[hook]).run(memory=memory)
+    assert [r.status for r in measured.results] == [r.status for r in plain.results]
+    assert hook.indices == [1, 2, 3, 4, 5] and len(hook.pipes) == 1
+    for entry in hook.pipes[0].assertions:
+        metrics = entry["metrics"]
+        assert set(PHASES) <= set(metrics.phases) or "fused_scan" in metrics.phases
+        assert metrics.wall >= 0 and (metrics.memory_bytes is None) == (memory is None)
+    rows = {entry["name"]: entry["metrics"].rows for entry in hook.pipes[0].assertions}
+    assert rows["NotInColumnAssertion"] == len(column) and rows["LenIs"] is None
+
+
+def test_slowest_first_table_and_json(tmp_path):
+    path = tmp_path / "metrics.json"
+    assertions = [FnAssertion(time.sleep, 0), FnAssertion(time.sleep, 0.05), FnAssertion(lambda: 1 / 0)]
+    pipe = testpipe.TestPipe("metrics", assertions, reporters=[], hooks=[JsonMetricsExporter(path)])
+    pipe.run(memory="tracemalloc")
+    assert pipe.metrics.slowest(1)[0]["index"] == 2
+    lines = pipe.metrics.table().splitlines()
+    assert len(lines) == 4 and lines[1].split()[0] == "2"
+    exported = json.loads(path.read_text())
+    assert [entry["status"] for entry in exported["assertions"]] == ["passed", "passed", "failed"]
+    assert set(exported["assertions"][0]["phases"]) == set(PHASES)
+
+
+def test_skipped_assertions_are_not_measured():
+    assertions = [FnAssertion(lambda: 1 / 0), FnAssertion(lambda: None)]
+    hook = _Collect()
+    pipe = testpipe.TestPipe("skipped", assertions, reporters=[], hooks=[hook])
+    pipe.run(fail_fast=True)
+    assert hook.indices == [1]
+    assert pipe.metrics.assertions[1]["metrics"] is None and pipe.metrics.table().count("\n") == 1
+
+
+def test_repeated_phases_accumulate():
+    metrics = AssertionMetrics("a")
+    metrics.add("assertion", PhaseMetrics(1.0, 0.5, 10))
+    metrics.add("assertion", PhaseMetrics(2.0, 0.5, 4))
+    metrics.rows = 300
+    assert (metrics.wall, metrics.cpu, metrics.memory_bytes, metrics.rows_per_s) == (3.0, 1.0, 10, 100.0)
+
+
+def test_measure_tracemalloc_counts_allocations():
+    with measure("tracemalloc") as metrics:
+        data = np.ones(2**20)
+    assert metrics.memory_bytes >= data.nbytes
+    with pytest.raises(ValidationError):
+        with measure("heap"):
+            pass
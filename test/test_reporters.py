@@ -0,0 +1,71 @@
+import json
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.base import FnAssertion
+from assertions.columns import HasNoDuplicatesAssertion, LenIsAssertion, NotInColumnAssertion
+from core import testpipe
+from core.reporters import ConsoleReporter, JsonLinesReporter, JUnitReporter, QuietReporter
+
+
+def _assertions():
+    column = pd.Series([1, 2, 2, np.nan])
+    return [NotInColumnAssertion(column, [9]), HasNoDuplicatesAssertion(column), LenIsAssertion(column, 4),
+            FnAssertion(lambda: 1 / 0), NotInColumnAssertion(column, [np.nan], sample=1.0)]
+
+
+STATUSES = ["passed", "failed", "passed", "failed", "failed"]
+
+
+def test_result_of_the_run():
+    result = testpipe.TestPipe("orders", _assertions(), reporters=[]).run()
+    assert [r.status for r in result.results] == STATUSES and [r.index for r in result.results] == [1, 2, 3, 4, 5]
+    assert not result and (result.n_passed, result.n_failed, result.n_skipped, len(result)) == (2, 3, 0, 5)
+    assert [r.index for r in result.failed()] == [2, 4, 5]
+    assert "sampled 4/4 rows" in result.results[4].estimate
+    assert json.loads(json.dumps(result.to_dict()))["failed"] == 3
+    assert json.loads(json.dumps(result.results[1].to_dict()))["status"] == "failed"
+
+
+def test_json_lines(tmp_path):
+    path = tmp_path / "results.jsonl"
+    reporter = JsonLinesReporter(path)
+    testpipe.TestPipe("orders", _assertions(), reporters=[reporter]).run(fail_fast=True)
+    testpipe.TestPipe("users", [LenIsAssertion(pd.Series([], dtype=float), 0)], reporters=[reporter]).run()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [(r["type"], r["pipe"]) for r in records] == [("assertion", "orders")] * 5 + [("pipe", "orders"), ("assertion", "users"), ("pipe", "users")]
+    assert [r["status"] for r in records[:5]] == ["passed", "failed", "skipped", "skipped", "skipped"]
+    assert (records[5]["failed"], records[5]["skipped"], records[5]["total"]) == (1, 3, 5)
+    # a new reporter truncates the file
+    testpipe.TestPipe("users", [LenIsAssertion(pd.Series([1]), 1)], reporters=[JsonLinesReporter(path)]).run()
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_junit_xml(tmp_path):
+    path = tmp_path / "results.xml"
+    reporter = JUnitReporter(path)
+    testpipe.TestPipe("orders", _assertions(), reporters=[reporter]).run()
+    testpipe.TestPipe("users <&>", [LenIsAssertion(pd.Series([1]), 1)], reporters=[reporter]).run()
+    suites = ET.parse(path).getroot()
+    assert [suite.get("name") for suite in suites] == ["orders", "users <&>"]
+    orders = suites[0]
+    assert (orders.get("tests"), orders.get("failures"), orders.get("skipped")) == ("5", "3", "0")
+    assert [case.find("failure") is not None for case in orders] == [status == "failed" for status in STATUSES]
+    assert not (tmp_path / "results.xml.part").exists()
+
+
+def test_console_output(capsys):
+    pytest.importorskip("colorama")
+    testpipe.TestPipe("orders", _assertions(), reporters=[ConsoleReporter()]).run()
+    out = capsys.readouterr().out
+    assert "[orders]: Running assertions" in out and "Successfully ran [2/5] assertions" in out
+    assert out.count("[failed]") == 3 and "2|HasNoDuplicatesAssertion|: [failed] -> Column contains duplicates" in out
+
+
+def test_quiet_and_default_reporters(capsys):
+    assert not testpipe.TestPipe("orders", _assertions(), reporters=[QuietReporter()]).run()
+    assert capsys.readouterr().out == ""
+    assert isinstance(testpipe.TestPipe("orders", _assertions()).reporters[0], ConsoleReporter)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.columns import AreSomeAssertion, HasSameDataAssertion, NotInColumnAssertion, UrlColumnAssertion
+from assertions.df import HasSameDataAssertion as FramesHaveSameData
+from core.exceptions import ValidationError
+from core.sampling import SampleEstimate, sample_positions, wilson_interval
+
+
+@pytest.mark.parametrize("n_violations, n_sampled, expected", [
+    (0, 100, (0.0, 0.0370)),
+    (10, 100, (0.0552, 0.1744)),
+    (100, 100, (0.9630, 1.0)),
+    (1, 1, (0.2065, 1.0)),
+])
+def test_wilson_interval(n_violations, n_sampled, expected):
+    assert wilson_interval(n_violations, n_sampled) == pytest.approx(expected, abs=1e-4)
+
+
+def test_wilson_interval_without_rows_is_uninformative():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    assert wilson_interval(5, 100, 0.99)[1] > wilson_interval(5, 100, 0.9)[1]
+
+
+@pytest.mark.parametrize("sample, size", [(0.1, 100), (0.0001, 1), (250, 250), (5000, 1000), (1.0, 1000)])
+def test_sample_positions(sample, size):
+    positions = sample_positions(1000, sample, seed=1)
+    assert len(positions) == size == len(np.unique(positions))
+    assert np.all(np.diff(positions) > 0) and positions[-1] < 1000
+    assert positions.tolist() == sample_positions(1000, sample, seed=1).tolist()
+
+
+@pytest.mark.parametrize("sample", [0.0, 1.5, 0, -3, "10"])
+def test_invalid_samples(sample):
+    with pytest.raises(ValidationError):
+        sample_positions(100, sample)
+
+
+def _statuses(column, values, **sampling):
+    assertions = [NotInColumnAssertion(column, values, **sampling), HasSameDataAssertion(column, column.copy(), **sampling),
+                  AreSomeAssertion(column, column.copy(), **sampling)]
+    for assertion in assertions:
+        assertion.run()
+    return [assertion.status for assertion in assertions]
+
+
+@pytest.mark.parametrize("data, values", [
+    ([1, 2, 3], [2]),
+    ([1, 2, 3], [9]),
+    ([1.0, np.nan], [np.nan]),
+    (["a", None], [None]),
+    ([], [1]),
+])
+def test_sampling_all_rows_matches_full_scans(data, values):
+    column = pd.Series(data, dtype=float if data == [] else None)
+    assert _statuses(column, values, sample=1.0) == _statuses(column, values)
+    assert _statuses(column, values, sample=10**6, seed=0) == _statuses(column, values)
+
+
+def test_violation_rate_within_tolerance_passes():
+    column = pd.Series(np.arange(100_000) % 100)
+    # 1% of rows violate the assertion
+    assert NotInColumnAssertion(column, [0], sample=20_000, seed=0, tolerance=0.02).run()
+    assertion = NotInColumnAssertion(column, [0], sample=20_000, seed=0, tolerance=0.005)
+    assert not assertion.run()
+    estimate = assertion.estimate
+    assert estimate.low <= 0.01 <= estimate.high and estimate.n_sampled == 20_000
+    assert set(assertion.failure.values) == {0} and "CI" in assertion.failure.message
+    assert assertion.rows_processed() == 20_000
+
+
+def test_sampled_failures_of_other_assertions():
+    df1 = pd.DataFrame({"a": np.arange(1000)})
+    df2 = df1.assign(a=-df1["a"])
+    assert not FramesHaveSameData(df1, df2, sample=0.1, seed=0).run()
+    urls = pd.Series(["http://a.com", "bad url"] * 500)
+    assertion = UrlColumnAssertion(urls, sample=100, seed=0)
+    assert not assertion.run() and set(assertion.failure.values) == {"bad url"}
+
+
+def test_exact_rate_of_all_sampled_rows():
+    assert SampleEstimate(1, 100, 100, tolerance=0.01).passed
+    assert not SampleEstimate(1, 100, 1000, tolerance=0.01).passed
+    assert not SampleEstimate(1, 100, 100).passed
+
+
+def test_tolerance_out_of_range_raises():
+    with pytest.raises(ValidationError):
+        NotInColumnAssertion(pd.Series([1]), [1], sample=1, tolerance=1.0).run()
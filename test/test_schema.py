@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pandera")
+
+from assertions.base import PanderaSchemaAssertion
+from core.exceptions import ValidationError
+from core.schema import validate
+
+
+SCHEMA = pa.DataFrameSchema({
+    "id": pa.Column(int, unique=True),
+    "price": pa.Column(float, pa.Check.ge(0), nullable=True),
+    "status": pa.Column(str, pa.Check.isin(["new", "paid"])),
+}, checks=[pa.Check(lambda df: df["price"].fillna(0) < 1000, element_wise=False)])
+
+
+def _frame(n_rows=12):
+    return pd.DataFrame({"id": np.arange(n_rows), "price": np.arange(n_rows, dtype=float),
+                         "status": ["new", "paid"] * (n_rows // 2)})
+
+
+FRAMES = {
+    "valid": _frame(),
+    "values": _frame().assign(price=lambda df: df["price"].where(df["id"] != 3, -1.0)),
+    "nan": _frame().assign(price=lambda df: df["price"].where(df["id"] != 3)),
+    "status": _frame().assign(status=lambda df: df["status"].where(df["id"] != 7, "lost")),
+    "duplicates across chunks": _frame().assign(id=lambda df: df["id"].where(df["id"] != 11, 0)),
+    "frame check": _frame().assign(price=lambda df: df["price"].where(df["id"] != 5, 5000.0)),
+    "missing column": _frame().drop(columns=["status"]),
+    "dtype": _frame().astype({"id": float}),
+    "empty": _frame().iloc[:0],
+}
+
+
+def _cases(failure_cases):
+    return sorted(map(str, failure_cases[["column", "check", "failure_case"]].itertuples(index=False)))
+
+
+@pytest.mark.parametrize("name", FRAMES)
+@pytest.mark.parametrize("split, workers", [(None, None), ("columns", 1), ("columns", 2), ("rows", 1), ("rows", 3)])
+def test_split_validation_matches_pandera(name, split, workers):
+    df = FRAMES[name]
+    try:
+        SCHEMA.validate(df, lazy=True)
+        expected = None
+    except pa.errors.SchemaErrors as errors:
+        expected = errors.failure_cases
+    assertion = PanderaSchemaAssertion(SCHEMA, df, split=split, workers=workers, chunk_rows=5, max_failure_cases=None)
+    assert assertion.run() == (expected is None)
+    if expected is not None and name != "missing column":
+        result = validate(SCHEMA, df, split=split, workers=workers, chunk_rows=5)
+        assert _cases(result) == _cases(expected)
+
+
+@pytest.mark.parametrize("split", [None, "columns", "rows"])
+def test_failure_cases_are_capped(split):
+    df = _frame(100).assign(price=-1.0)
+    result = validate(SCHEMA, df, split=split, chunk_rows=10, workers=2, n_failure_cases=7)
+    assert result.groupby(["column", "check"]).size().max() == 7
+    assertion = PanderaSchemaAssertion(SCHEMA, df, split=split, chunk_rows=10, max_failure_cases=7)
+    assert not assertion.run()
+    assert "at most 7 per check" in assertion.error_message and len(assertion.failure.values) <= 20
+
+
+def test_eager_validation_returns_the_first_error():
+    assertion = PanderaSchemaAssertion(SCHEMA, FRAMES["values"], lazy=False)
+    assert not assertion.run() and "price" in assertion.error_message
+
+
+def test_invalid_options_raise():
+    with pytest.raises(ValidationError):
+        PanderaSchemaAssertion(SCHEMA, _frame(), split="cells").run()
+    with pytest.raises(ValidationError):
+        PanderaSchemaAssertion(SCHEMA, _frame(), chunk_rows=0).run()
+    coercing = pa.DataFrameSchema({"id": pa.Column(int, coerce=True)})
+    with pytest.raises(ValidationError):
+        PanderaSchemaAssertion(coercing, _frame(), split="rows").run()
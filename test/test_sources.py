@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from core.sources import Col, Frame, LazySource
+
+
+def test_lazy_source_is_abstract():
+    with pytest.raises(TypeError):
+        LazySource("users.parquet")
+
+    class Partial(LazySource):
+        def columns(self):
+            return ["id"]
+
+    with pytest.raises(TypeError):
+        Partial("users.parquet")
+
+
+def test_sources_resolve_their_columns():
+    frame = pd.DataFrame({"id": [1, 2], "country": ["de", "fr"]})
+    assert Col("users.csv", "country").columns() == ["country"]
+    assert Col("users.csv", "country").resolve(frame).tolist() == ["de", "fr"]
+    assert Frame("users.csv").columns() is None
+    assert list(Frame("users.csv", ["id"]).resolve(frame).columns) == ["id"]
+    assert Col("users.csv", "id").key == Frame("users.csv").key
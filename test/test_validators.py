@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.validators import RegexValidator, url_validator, validate_url
+
+
+@pytest.mark.parametrize("use_arrow", [True, False])
+def test_url_matching_is_anchored_at_the_end(use_arrow):
+    validator = url_validator()
+    python = RegexValidator(validator.pattern, ignore_case=True, use_arrow=use_arrow, fullmatch=True)
+    urls = pd.Series(["http://a.com\n", "a.com\n", "http://a.com", "a.com"])
+    assert python.mask(urls).tolist() == [False, False, True, True]
+    assert validator.mask(urls).tolist() == [False, False, True, True]
+    assert not validate_url("http://a.com\n") and not validate_url(urls)
+
+
+def test_single_urls_are_case_sensitive():
+    assert validate_url("http://a.com") and not validate_url("HTTP://a.com")
+    assert validate_url(pd.Series(["HTTP://a.com"]))
+
+
+URLS = ["http://a.com", "https://a.b-c.org/path?q=1", "ftp://files.io/x", "a.com", "HTTP://A.COM", "http:/a.com",
+        "http://a", "a com", "", "http://a.com/x y", "mailto:a@b.com", "http://a.com\n"]
+# patterns of the baseline `validate_url`, matched by `str.contains`
+BASELINE = {False: r"^(ftp|http(s)?)://?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(\/\S*)?$|^([a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$)",
+            True: r'^(ftp|http|https)://?[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}(\/\S*)?$'}
+
+
+@pytest.mark.filterwarnings("ignore:This pattern is interpreted as a regular expression")
+@pytest.mark.parametrize("include_protocol", [False, True])
+@pytest.mark.parametrize("use_arrow", [True, False])
+def test_url_masks_match_the_baseline(include_protocol, use_arrow):
+    urls = pd.Series(URLS[:-1])
+    validator = url_validator(include_protocol)
+    validator = RegexValidator(validator.pattern, ignore_case=True, use_arrow=use_arrow, fullmatch=True)
+    expected = urls.str.contains(BASELINE[include_protocol], regex=True, case=False).tolist()
+    assert validator.mask(urls).tolist() == expected
+    assert validator.invalid_positions(urls).tolist() == [i for i, valid in enumerate(expected) if not valid]
+
+
+@pytest.mark.parametrize("na", [False, True])
+def test_missing_and_other_values(na):
+    validator = RegexValidator(r"^\d+$", na=na)
+    values = pd.Series(["12", None, np.nan, 5, "x"], dtype=object)
+    assert validator.mask(values).tolist() == [True, na, na, na, False]
+    assert validator.mask(pd.Series([], dtype=object)).tolist() == []
+    assert validator.mask(pd.Series([None, None])).tolist() == [na, na]
+    assert validator.match(None) is na and validator("7")
+
+
+def test_string_dtypes_and_other_backends():
+    pytest.importorskip("pyarrow")
+    pl = pytest.importorskip("polars")
+    validator = url_validator()
+    expected = validator.mask(pd.Series(URLS, dtype=object)).tolist()
+    assert validator.mask(pd.Series(URLS, dtype="string[pyarrow]")).tolist() == expected
+    assert validator.mask(pd.Index(URLS)).tolist() == expected
+    assert validator.mask(pl.Series(URLS)).tolist() == expected
+
+
+def test_parallel_chunks_match_a_single_pass():
+    pytest.importorskip("pyarrow")
+    urls = pd.Series(URLS * 100)
+    validator = url_validator()
+    assert validator.mask(urls, workers=4, chunk_rows=7).tolist() == validator.mask(urls).tolist()
+
+
+def test_patterns_without_re2_support_fall_back_to_python():
+    # RE2 has no lookahead
+    validator = RegexValidator(r"^(?!www\.)[a-z]+\.com$")
+    assert validator.mask(pd.Series(["a.com", "www.com", "b.org"])).tolist() == [True, False, False]
+
+
+def test_validate_url_rejects_other_types():
+    with pytest.raises(ValueError):
+        validate_url(["http://a.com"])
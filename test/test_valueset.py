@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.valueset import ValueSet
+
+
+@pytest.mark.parametrize("dtype", [np.int64, np.float64])
+@pytest.mark.parametrize("in_memory", [True, False])
+def test_empty_value_set_contains_nothing(tmp_path, dtype, in_memory):
+    path = tmp_path / "keys.npy"
+    ValueSet(np.array([], dtype=dtype)).save(path)
+    value_set = ValueSet.from_file(path, in_memory=in_memory)
+    assert len(value_set) == 0
+    column = pd.Series([1, 2, np.nan] if dtype == np.float64 else [1, 2, 3], dtype=dtype)
+    assert value_set.contains(column).tolist() == [False, False, False]
+    assert value_set.contains(pd.Series([], dtype=dtype)).tolist() == []
+
+
+def test_memory_mapped_value_set_matches_isin(tmp_path):
+    path = tmp_path / "keys.npy"
+    ValueSet([5.0, 1.0, np.nan]).save(path)
+    column = pd.Series([1.0, 2.0, np.nan, 5.0])
+    assert ValueSet.from_file(path, in_memory=False).contains(column).tolist() == column.isin([5.0, 1.0, np.nan]).tolist()
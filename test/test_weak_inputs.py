@@ -0,0 +1,65 @@
+import gc
+import weakref
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from assertions.base import is_data
+from assertions.columns import AreSomeAssertion, HasSameDataAssertion, InColumnAssertion, NotInColumnAssertion
+from assertions.df import AreSomeAssertion as FramesAreSome, HasSameDataAssertion as FramesHaveSameData
+from core.reporters import QuietReporter
+from core import testpipe
+
+
+def _pipe(df: pd.DataFrame, **kwargs) -> testpipe.TestPipe:
+    assertions = [InColumnAssertion(df["a"], [3]), NotInColumnAssertion(df["a"], [100]), NotInColumnAssertion(df["a"], [2])]
+    return testpipe.TestPipe("weak", assertions, reporters=[QuietReporter()], **kwargs)
+
+
+def test_weak_inputs_fused_run():
+    df = pd.DataFrame({"a": np.arange(10)})
+    column = df["a"]
+    result = _pipe(df, weak_inputs=True).run()
+    assert [r.status for r in result.results] == ["passed", "passed", "failed"]
+    assert result.results[2].failure.values == [2]
+    del column
+
+
+def test_weak_inputs_match_strong_run():
+    df = pd.DataFrame({"a": np.arange(10)})
+    column = df["a"]
+    for fuse in (True, False):
+        weak = _pipe(df, weak_inputs=True).run(fuse=fuse)
+        strong = _pipe(df).run(fuse=fuse)
+        assert [r.status for r in weak.results] == [r.status for r in strong.results]
+    del column
+
+
+def test_weak_inputs_keep_references_weak():
+    df = pd.DataFrame({"a": np.arange(10)})
+    column = df["a"]
+    pipe = _pipe(df, weak_inputs=True)
+    pipe.run()
+    assert all(assertion.weak for assertion in pipe.assertions)
+    assert not any(isinstance(assertion.column, pd.Series) for assertion in pipe.assertions)
+    del column
+
+
+@pytest.mark.parametrize("sample", [None, 0.5])
+@pytest.mark.parametrize("row_masks", [False, True])
+def test_released_inputs_are_collected(sample, row_masks):
+    df1 = pd.DataFrame({"a": np.arange(10), "b": np.arange(10)})
+    df2 = df1.assign(b=-df1["b"])
+    refs = [weakref.ref(df1), weakref.ref(df2)]
+    pipe = testpipe.TestPipe("release", [
+        HasSameDataAssertion(df1["a"], df2["b"], sample=sample, seed=0),
+        AreSomeAssertion(df1["a"], df2["a"], sample=sample, seed=0),
+        FramesHaveSameData(df1, df2, sample=sample, seed=0),
+        FramesAreSome(df1, df2, sample=sample, seed=0)], reporters=[], release_inputs=True)
+    refs += [weakref.ref(data) for assertion in pipe.assertions for data in vars(assertion).values() if is_data(data)]
+    del df1, df2
+    result = pipe.run(row_masks=row_masks)
+    assert [r.status for r in result.results] == ["failed", "passed", "failed", "failed"]
+    gc.collect()
+    assert all(ref() is None for ref in refs)